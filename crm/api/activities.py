@@ -1,40 +1,71 @@
+import base64
+import heapq
 import json
+from itertools import islice
 
 import frappe
 from bs4 import BeautifulSoup
 from frappe import _
 from frappe.desk.form.load import get_docinfo
 from frappe.query_builder import JoinType
+from frappe.utils import cint, get_datetime
 
-from crm.api import reminders as reminders_api
 from crm.fcrm.doctype.crm_call_log.crm_call_log import parse_call_log
 
+ATTACHMENT_FIELDS = [
+	"name",
+	"file_name",
+	"file_type",
+	"file_url",
+	"file_size",
+	"is_private",
+	"modified",
+	"creation",
+	"owner",
+]
+
+# Parsed version diffs per document (Redis hash: version name -> first `changed` entry)
+VERSION_CHANGE_CACHE_KEY = "crm_version_change"
+VERSION_CHANGE_CACHE_TTL = 24 * 60 * 60
+
+# Fields whose changes are not shown on the timeline
+AVOID_VERSION_FIELDS = {
+	"CRM Deal": ["lead", "response_by", "sla_creation", "sla", "first_response_time", "first_responded_on"],
+	"CRM Lead": ["converted", "response_by", "sla_creation", "sla", "first_response_time", "first_responded_on"],
+}
+
+# Page size of the incremental timeline (`since` / `before`)
+ACTIVITY_PAGE_SIZE = 50
+MAX_ACTIVITY_PAGE_SIZE = 500
+
 
 @frappe.whitelist()
-def get_activities(name):
+def get_activities(name, since=None, before=None, limit=None):
+	"""
+	Timeline of a lead or deal: (activities, calls, notes, tasks, attachments).
+
+	Without `since` / `before` the whole timeline is returned. With them only the events after
+	the `since` cursor (realtime refresh) or before the `before` cursor (load more) are read, at
+	most `limit` of them, see `get_activities_page`.
+	"""
 	if frappe.db.exists("CRM Deal", name):
-		return get_deal_activities(name)
+		doctype = "CRM Deal"
 	elif frappe.db.exists("CRM Lead", name):
-		return get_lead_activities(name)
+		doctype = "CRM Lead"
 	else:
 		frappe.throw(_("Document not found"), frappe.DoesNotExistError)
 
+	if since or before:
+		return get_activities_page(doctype, name, since=since, before=before, limit=limit)
+	if doctype == "CRM Deal":
+		return get_deal_activities(name)
+	return get_lead_activities(name)
+
 
 def get_deal_activities(name):
 	get_docinfo("", "CRM Deal", name)
 	docinfo = frappe.response["docinfo"]
-	deal_meta = frappe.get_meta("CRM Deal")
-	deal_fields = {
-		field.fieldname: {"label": field.label, "options": field.options} for field in deal_meta.fields
-	}
-	avoid_fields = [
-		"lead",
-		"response_by",
-		"sla_creation",
-		"sla",
-		"first_response_time",
-		"first_responded_on",
-	]
+	deal_fields = get_version_fields("CRM Deal")
 
 	doc = frappe.db.get_values("CRM Deal", name, ["creation", "owner", "lead"])[0]
 	lead = doc[2]
@@ -50,113 +81,39 @@ def get_deal_activities(name):
 		activities, calls, notes, tasks, attachments = get_lead_activities(lead)
 		creation_text = "converted the lead to this deal"
 
-	activities.append(
-		{
-			"activity_type": "creation",
-			"creation": doc[0],
-			"owner": doc[1],
-			"data": creation_text,
-			"is_lead": False,
-		}
-	)
+	activities.append(get_creation_activity(doc[0], doc[1], creation_text, is_lead=False))
 
 	docinfo.versions.reverse()
+	version_changes = get_version_changes("CRM Deal", name, docinfo.versions)
 
 	for version in docinfo.versions:
-		data = json.loads(version.data)
-		if not data.get("changed"):
-			continue
-
-		if change := data.get("changed")[0]:
-			field = deal_fields.get(change[0], None)
-
-			if not field or change[0] in avoid_fields or (not change[1] and not change[2]):
-				continue
-
-			field_label = field.get("label") or change[0]
-			field_option = field.get("options") or None
-
-			activity_type = "changed"
-			data = {
-				"field": change[0],
-				"field_label": field_label,
-				"old_value": change[1],
-				"value": change[2],
-			}
-
-			if not change[1] and change[2]:
-				activity_type = "added"
-				data = {
-					"field": change[0],
-					"field_label": field_label,
-					"value": change[2],
-				}
-			elif change[1] and not change[2]:
-				activity_type = "removed"
-				data = {
-					"field": change[0],
-					"field_label": field_label,
-					"value": change[1],
-				}
-
-		activity = {
-			"activity_type": activity_type,
-			"creation": version.creation,
-			"owner": version.owner,
-			"data": data,
-			"is_lead": False,
-			"options": field_option,
-		}
-		activities.append(activity)
+		activity = get_version_activity(
+			version, version_changes.get(version.name), deal_fields, AVOID_VERSION_FIELDS["CRM Deal"], False
+		)
+		if activity:
+			activities.append(activity)
+
+	attachments_map = get_attachments_map(
+		[("Comment", comment.name) for comment in docinfo.comments]
+		+ [
+			("Communication", communication.name)
+			for communication in docinfo.communications + docinfo.automated_messages
+		]
+	)
 
 	for comment in docinfo.comments:
-		activity = {
-			"name": comment.name,
-			"activity_type": "comment",
-			"creation": comment.creation,
-			"owner": comment.owner,
-			"content": comment.content,
-			"attachments": get_attachments("Comment", comment.name),
-			"is_lead": False,
-		}
-		activities.append(activity)
+		activities.append(get_comment_activity(comment, attachments_map, is_lead=False))
 
 	for communication in docinfo.communications + docinfo.automated_messages:
-		activity = {
-			"activity_type": "communication",
-			"communication_type": communication.communication_type,
-			"communication_date": communication.communication_date or communication.creation,
-			"creation": communication.creation,
-			"data": {
-				"subject": communication.subject,
-				"content": communication.content,
-				"sender_full_name": communication.sender_full_name,
-				"sender": communication.sender,
-				"recipients": communication.recipients,
-				"cc": communication.cc,
-				"bcc": communication.bcc,
-				"attachments": get_attachments("Communication", communication.name),
-				"read_by_recipient": communication.read_by_recipient,
-				"delivery_status": communication.delivery_status,
-			},
-			"is_lead": False,
-		}
-		activities.append(activity)
+		activities.append(get_communication_activity(communication, attachments_map, is_lead=False))
 
 	for attachment_log in docinfo.attachment_logs:
-		activity = {
-			"name": attachment_log.name,
-			"activity_type": "attachment_log",
-			"creation": attachment_log.creation,
-			"owner": attachment_log.owner,
-			"data": parse_attachment_log(attachment_log.content, attachment_log.comment_type),
-			"is_lead": False,
-		}
-		activities.append(activity)
+		activities.append(get_attachment_log_activity(attachment_log, is_lead=False))
 
-	calls = calls + get_linked_calls(name).get("calls", [])
-	notes = notes + get_linked_notes(name) + get_linked_calls(name).get("notes", [])
-	tasks = tasks + get_linked_tasks(name) + get_linked_calls(name).get("tasks", [])
+	linked_calls = get_linked_calls(name)
+	calls = calls + linked_calls.get("calls", [])
+	notes = notes + get_linked_notes(name) + linked_calls.get("notes", [])
+	tasks = tasks + get_linked_tasks(name) + linked_calls.get("tasks", [])
 	attachments = attachments + get_attachments("CRM Deal", name)
 
 	activities.sort(key=lambda x: x["creation"], reverse=True)
@@ -166,133 +123,46 @@ def get_deal_activities(name):
 
 
 def get_lead_activities(name):
-	ensure_lead_delayed_state(name)
 	get_docinfo("", "CRM Lead", name)
 	docinfo = frappe.response["docinfo"]
-	lead_meta = frappe.get_meta("CRM Lead")
-	lead_fields = {
-		field.fieldname: {"label": field.label, "options": field.options} for field in lead_meta.fields
-	}
-	avoid_fields = [
-		"converted",
-		"response_by",
-		"sla_creation",
-		"sla",
-		"first_response_time",
-		"first_responded_on",
-	]
+	lead_fields = get_version_fields("CRM Lead")
 
 	doc = frappe.db.get_values("CRM Lead", name, ["creation", "owner"])[0]
-	activities = [
-		{
-			"activity_type": "creation",
-			"creation": doc[0],
-			"owner": doc[1],
-			"data": "created this lead",
-			"is_lead": True,
-		}
-	]
+	activities = [get_creation_activity(doc[0], doc[1], "created this lead", is_lead=True)]
 
 	docinfo.versions.reverse()
+	version_changes = get_version_changes("CRM Lead", name, docinfo.versions)
 
 	for version in docinfo.versions:
-		data = json.loads(version.data)
-		if not data.get("changed"):
-			continue
-
-		if change := data.get("changed")[0]:
-			field = lead_fields.get(change[0], None)
-
-			if not field or change[0] in avoid_fields or (not change[1] and not change[2]):
-				continue
-
-			field_label = field.get("label") or change[0]
-			field_option = field.get("options") or None
-
-			activity_type = "changed"
-			data = {
-				"field": change[0],
-				"field_label": field_label,
-				"old_value": change[1],
-				"value": change[2],
-			}
-
-			if not change[1] and change[2]:
-				activity_type = "added"
-				data = {
-					"field": change[0],
-					"field_label": field_label,
-					"value": change[2],
-				}
-			elif change[1] and not change[2]:
-				activity_type = "removed"
-				data = {
-					"field": change[0],
-					"field_label": field_label,
-					"value": change[1],
-				}
-
-		activity = {
-			"activity_type": activity_type,
-			"creation": version.creation,
-			"owner": version.owner,
-			"data": data,
-			"is_lead": True,
-			"options": field_option,
-		}
-		activities.append(activity)
+		activity = get_version_activity(
+			version, version_changes.get(version.name), lead_fields, AVOID_VERSION_FIELDS["CRM Lead"], True
+		)
+		if activity:
+			activities.append(activity)
 
 	comment_flags = get_comment_delayed_map(name)
 
+	attachments_map = get_attachments_map(
+		[("Comment", comment.name) for comment in docinfo.comments]
+		+ [
+			("Communication", communication.name)
+			for communication in docinfo.communications + docinfo.automated_messages
+		]
+	)
+
 	for comment in docinfo.comments:
-		activity = {
-			"name": comment.name,
-			"activity_type": "comment",
-			"creation": comment.creation,
-			"owner": comment.owner,
-			"content": comment.content,
-			"attachments": get_attachments("Comment", comment.name),
-			"delayed": comment_flags.get(comment.name, 0),
-			"is_lead": True,
-		}
-		activities.append(activity)
+		activities.append(get_comment_activity(comment, attachments_map, is_lead=True, delayed_map=comment_flags))
 
 	for communication in docinfo.communications + docinfo.automated_messages:
-		activity = {
-			"activity_type": "communication",
-			"communication_type": communication.communication_type,
-			"communication_date": communication.communication_date or communication.creation,
-			"creation": communication.creation,
-			"data": {
-				"subject": communication.subject,
-				"content": communication.content,
-				"sender_full_name": communication.sender_full_name,
-				"sender": communication.sender,
-				"recipients": communication.recipients,
-				"cc": communication.cc,
-				"bcc": communication.bcc,
-				"attachments": get_attachments("Communication", communication.name),
-				"read_by_recipient": communication.read_by_recipient,
-				"delivery_status": communication.delivery_status,
-			},
-			"is_lead": True,
-		}
-		activities.append(activity)
+		activities.append(get_communication_activity(communication, attachments_map, is_lead=True))
 
 	for attachment_log in docinfo.attachment_logs:
-		activity = {
-			"name": attachment_log.name,
-			"activity_type": "attachment_log",
-			"creation": attachment_log.creation,
-			"owner": attachment_log.owner,
-			"data": parse_attachment_log(attachment_log.content, attachment_log.comment_type),
-			"is_lead": True,
-		}
-		activities.append(activity)
+		activities.append(get_attachment_log_activity(attachment_log, is_lead=True))
 
-	calls = get_linked_calls(name).get("calls", [])
-	notes = get_linked_notes(name) + get_linked_calls(name).get("notes", [])
-	tasks = get_linked_tasks(name) + get_linked_calls(name).get("tasks", [])
+	linked_calls = get_linked_calls(name)
+	calls = linked_calls.get("calls", [])
+	notes = get_linked_notes(name) + linked_calls.get("notes", [])
+	tasks = get_linked_tasks(name) + linked_calls.get("tasks", [])
 	attachments = get_attachments("CRM Lead", name)
 
 	activities.sort(key=lambda x: x["creation"], reverse=True)
@@ -301,15 +171,360 @@ def get_lead_activities(name):
 	return activities, calls, notes, tasks, attachments
 
 
-def ensure_lead_delayed_state(lead_name: str) -> None:
-	if not frappe.db.has_column("Comment", "delayed"):
-		return
+def get_activities_page(doctype, name, since=None, before=None, limit=None):
+	"""
+	Incremental timeline: at most `limit` events of `doctype` `name` (and, for a deal, of its
+	lead) after the `since` cursor or before the `before` cursor.
+
+	Events are ordered by (creation, source doctype, name), which is unique, so no event is
+	skipped or repeated between pages. `since` pages are read oldest first, so when more than
+	`limit` events arrived the next call continues right after the returned ones (`has_more`).
+	Every source table is read lazily, one keyset page at a time, and the sorted streams are
+	merged, so only about `limit` rows per source are read however long the history is.
+
+	Returns a dict with the activities (newest first), calls / notes / tasks / attachments
+	modified after `since` (empty for `before`), `has_more`, and the `since` / `before`
+	cursors of the newest / oldest returned event.
+	"""
+	frappe.has_permission(doctype, "read", doc=name, throw=True)
+
+	descending = not since
+	cursor_value = before if descending else since
+	cursor = decode_activity_cursor(cursor_value, descending) if cursor_value else None
+	limit = min(cint(limit) or ACTIVITY_PAGE_SIZE, MAX_ACTIVITY_PAGE_SIZE)
+
+	references = [(doctype, name)]
+	if doctype == "CRM Deal" and (lead := frappe.db.get_value("CRM Deal", name, "lead")):
+		references.append(("CRM Lead", lead))
+
+	streams = []
+	for reference_doctype, reference_name in references:
+		streams += get_activity_streams(reference_doctype, reference_name, cursor, descending, limit + 1)
+
+	merged = heapq.merge(*streams, key=lambda item: item[0], reverse=descending)
+	page = list(islice(merged, limit + 1))
+	has_more = len(page) > limit
+	page = page[:limit]
+	if not descending:
+		page.reverse()
+
+	result = {
+		"activities": handle_multiple_versions([activity for _key, activity in page]),
+		"calls": [],
+		"notes": [],
+		"tasks": [],
+		"attachments": [],
+		"has_more": has_more,
+		"since": encode_activity_cursor(page[0][0]) if page else since,
+		"before": encode_activity_cursor(page[-1][0]) if page else before,
+	}
+	if descending:
+		return result
+
+	modified_since = cursor[0]
+	for reference_doctype, reference_name in references:
+		linked_calls = get_linked_calls(reference_name, since=modified_since)
+		result["calls"] += linked_calls.get("calls", [])
+		result["notes"] += get_linked_notes(reference_name, since=modified_since) + linked_calls.get("notes", [])
+		result["tasks"] += get_linked_tasks(reference_name, since=modified_since) + linked_calls.get("tasks", [])
+		result["attachments"] += get_attachments(reference_doctype, reference_name, since=modified_since)
+	return result
+
+
+def encode_activity_cursor(key):
+	creation, source, name = key
+	return base64.urlsafe_b64encode(json.dumps([str(creation), source, name]).encode()).decode()
+
+
+def decode_activity_cursor(cursor, descending):
+	"""
+	(creation, source doctype, name) key of a cursor. A plain timestamp is also accepted and
+	excludes every event created at that time.
+	"""
 	try:
-		reminders_api.recalc_delayed_for_doc("CRM Lead", lead_name)
-	except frappe.PermissionError:
+		creation, source, name = json.loads(base64.urlsafe_b64decode(str(cursor).encode()))
+		return get_datetime(creation), source, name
+	except Exception:
 		pass
+	try:
+		creation = get_datetime(cursor)
 	except Exception:
-		frappe.log_error(frappe.get_traceback(), f"ensure_lead_delayed_state failed: {lead_name}")
+		creation = None
+	if not creation:
+		frappe.throw(_("Invalid cursor"), frappe.ValidationError)
+	# "" sorts before and "\uffff" after every source, so the bound excludes all of `creation`
+	return (creation, "", "") if descending else (creation, "\uffff", "")
+
+
+def get_activity_streams(doctype, name, cursor, descending=True, page_size=ACTIVITY_PAGE_SIZE):
+	"""
+	Timeline events of one document as generators of (key, activity), each sorted by its
+	(creation, source doctype, name) key and starting after `cursor`.
+	"""
+	is_lead = doctype == "CRM Lead"
+
+	def pages(source, filters, fields):
+		return iter_pages(source, filters, fields, cursor, descending, page_size)
+
+	def creation_stream():
+		doc = frappe.db.get_value(doctype, name, ["creation", "owner", *([] if is_lead else ["lead"])], as_dict=True)
+		key = (doc.creation, doctype, name)
+		if cursor and ((key >= cursor) if descending else (key <= cursor)):
+			return
+		if is_lead:
+			text = "created this lead"
+		else:
+			text = "converted the lead to this deal" if doc.lead else "created this deal"
+		yield key, get_creation_activity(doc.creation, doc.owner, text, is_lead=is_lead)
+
+	def version_stream():
+		fields = get_version_fields(doctype)
+		for versions in pages(
+			"Version",
+			{"ref_doctype": doctype, "docname": name},
+			["name", "owner", "creation", "data"],
+		):
+			changes = get_version_changes(doctype, name, versions)
+			for version in versions:
+				activity = get_version_activity(
+					version, changes.get(version.name), fields, AVOID_VERSION_FIELDS[doctype], is_lead
+				)
+				if activity:
+					yield (version.creation, "Version", version.name), activity
+
+	def comment_stream():
+		for comments in pages(
+			"Comment",
+			{"reference_doctype": doctype, "reference_name": name, "comment_type": "Comment"},
+			["name", "owner", "creation", "content"] + (["delayed"] if is_lead and _has_delayed_column() else []),
+		):
+			attachments_map = get_attachments_map([("Comment", comment.name) for comment in comments])
+			delayed_map = {comment.name: comment.get("delayed", 0) for comment in comments} if is_lead else None
+			for comment in comments:
+				activity = get_comment_activity(comment, attachments_map, is_lead=is_lead, delayed_map=delayed_map)
+				yield (comment.creation, "Comment", comment.name), activity
+
+	def communication_stream():
+		timeline_condition = (
+			"(`tabCommunication`.`reference_doctype` = {doctype} and `tabCommunication`.`reference_name` = {name})"
+			" or `tabCommunication`.`name` in (select `parent` from `tabCommunication Link`"
+			" where `link_doctype` = {doctype} and `link_name` = {name})"
+		).format(doctype=frappe.db.escape(doctype), name=frappe.db.escape(name))
+		for communications in pages(
+			"Communication",
+			[["communication_type", "in", ["Communication", "Automated Message"]], f"({timeline_condition})"],
+			[
+				"name",
+				"communication_type",
+				"communication_date",
+				"creation",
+				"subject",
+				"content",
+				"sender_full_name",
+				"sender",
+				"recipients",
+				"cc",
+				"bcc",
+				"read_by_recipient",
+				"delivery_status",
+			],
+		):
+			attachments_map = get_attachments_map(
+				[("Communication", communication.name) for communication in communications]
+			)
+			for communication in communications:
+				activity = get_communication_activity(communication, attachments_map, is_lead=is_lead)
+				yield (communication.creation, "Communication", communication.name), activity
+
+	def attachment_log_stream():
+		for attachment_logs in pages(
+			"Comment",
+			{
+				"reference_doctype": doctype,
+				"reference_name": name,
+				"comment_type": ("in", ["Attachment", "Attachment Removed"]),
+			},
+			["name", "owner", "creation", "content", "comment_type"],
+		):
+			for attachment_log in attachment_logs:
+				activity = get_attachment_log_activity(attachment_log, is_lead=is_lead)
+				yield (attachment_log.creation, "Comment", attachment_log.name), activity
+
+	return [
+		creation_stream(),
+		version_stream(),
+		comment_stream(),
+		communication_stream(),
+		attachment_log_stream(),
+	]
+
+
+def iter_pages(doctype, filters, fields, cursor=None, descending=True, page_size=ACTIVITY_PAGE_SIZE):
+	"""
+	Rows of `doctype` in (creation, name) order (newest first if `descending`) that come after
+	the (creation, source doctype, name) `cursor` of the merged timeline, fetched lazily one
+	keyset page at a time.
+	"""
+	if isinstance(filters, dict):
+		filters = [[key, *value] if isinstance(value, tuple) else [key, "=", value] for key, value in filters.items()]
+
+	direction = "desc" if descending else "asc"
+	bound = None
+	if cursor:
+		creation, source, name = cursor
+		# rows created at the cursor time sort before / after it as a whole when they are
+		# from another source doctype
+		if source != doctype:
+			name = (doctype < source) if descending else (doctype > source)
+		bound = (creation, name)
+
+	while True:
+		page_filters = list(filters)
+		if bound:
+			page_filters.append(_keyset_condition(doctype, "<" if descending else ">", *bound))
+
+		rows = frappe.get_all(
+			doctype,
+			filters=page_filters,
+			fields=fields,
+			order_by=f"creation {direction}, name {direction}",
+			limit=page_size,
+		)
+		if rows:
+			yield rows
+		if len(rows) < page_size:
+			return
+		bound = (rows[-1].creation, rows[-1].name)
+
+
+def _keyset_condition(doctype, op, creation, name):
+	"""
+	SQL condition (creation, name) `op` (`creation`, `name`); `name` True / False lets all / none of
+	the rows created at `creation` through.
+	"""
+	column = f"`tab{doctype}`.`creation`"
+	value = frappe.db.escape(str(creation))
+	if name is True:
+		return f"{column} {op}= {value}"
+	if name is False:
+		return f"{column} {op} {value}"
+	return f"({column} {op} {value} or ({column} = {value} and `tab{doctype}`.`name` {op} {frappe.db.escape(name)}))"
+
+
+def get_creation_activity(creation, owner, text, is_lead):
+	return {
+		"activity_type": "creation",
+		"creation": creation,
+		"owner": owner,
+		"data": text,
+		"is_lead": is_lead,
+	}
+
+
+def get_version_fields(doctype):
+	return {
+		field.fieldname: {"label": field.label, "options": field.options}
+		for field in frappe.get_meta(doctype).fields
+	}
+
+
+def get_version_activity(version, change, fields, avoid_fields, is_lead):
+	"""
+	Timeline entry of a Version row from its first change (None if the change is not shown).
+	"""
+	if not change:
+		return None
+
+	field = fields.get(change[0], None)
+	if not field or change[0] in avoid_fields or (not change[1] and not change[2]):
+		return None
+
+	field_label = field.get("label") or change[0]
+	field_option = field.get("options") or None
+
+	activity_type = "changed"
+	data = {
+		"field": change[0],
+		"field_label": field_label,
+		"old_value": change[1],
+		"value": change[2],
+	}
+
+	if not change[1] and change[2]:
+		activity_type = "added"
+		data = {
+			"field": change[0],
+			"field_label": field_label,
+			"value": change[2],
+		}
+	elif change[1] and not change[2]:
+		activity_type = "removed"
+		data = {
+			"field": change[0],
+			"field_label": field_label,
+			"value": change[1],
+		}
+
+	return {
+		"activity_type": activity_type,
+		"creation": version.creation,
+		"owner": version.owner,
+		"data": data,
+		"is_lead": is_lead,
+		"options": field_option,
+	}
+
+
+def get_comment_activity(comment, attachments_map, is_lead, delayed_map=None):
+	activity = {
+		"name": comment.name,
+		"activity_type": "comment",
+		"creation": comment.creation,
+		"owner": comment.owner,
+		"content": comment.content,
+		"attachments": attachments_map[("Comment", comment.name)],
+		"is_lead": is_lead,
+	}
+	if delayed_map is not None:
+		activity["delayed"] = delayed_map.get(comment.name, 0)
+	return activity
+
+
+def get_communication_activity(communication, attachments_map, is_lead):
+	return {
+		"activity_type": "communication",
+		"communication_type": communication.communication_type,
+		"communication_date": communication.communication_date or communication.creation,
+		"creation": communication.creation,
+		"data": {
+			"subject": communication.subject,
+			"content": communication.content,
+			"sender_full_name": communication.sender_full_name,
+			"sender": communication.sender,
+			"recipients": communication.recipients,
+			"cc": communication.cc,
+			"bcc": communication.bcc,
+			"attachments": attachments_map[("Communication", communication.name)],
+			"read_by_recipient": communication.read_by_recipient,
+			"delivery_status": communication.delivery_status,
+		},
+		"is_lead": is_lead,
+	}
+
+
+def get_attachment_log_activity(attachment_log, is_lead):
+	return {
+		"name": attachment_log.name,
+		"activity_type": "attachment_log",
+		"creation": attachment_log.creation,
+		"owner": attachment_log.owner,
+		"data": parse_attachment_log(attachment_log.content, attachment_log.comment_type),
+		"is_lead": is_lead,
+	}
+
+
+def _has_delayed_column():
+	return bool(frappe.db.has_column("Comment", "delayed"))
 
 
 def get_comment_delayed_map(lead_name: str) -> dict[str, int]:
@@ -327,27 +542,74 @@ def get_comment_delayed_map(lead_name: str) -> dict[str, int]:
 	return {row["name"]: row.get("delayed", 0) for row in rows}
 
 
-def get_attachments(doctype, name):
+def get_attachments(doctype, name, since=None):
+	filters = {"attached_to_doctype": doctype, "attached_to_name": name}
+	if since:
+		filters["modified"] = (">", since)
 	return (
 		frappe.db.get_all(
 			"File",
-			filters={"attached_to_doctype": doctype, "attached_to_name": name},
-			fields=[
-				"name",
-				"file_name",
-				"file_type",
-				"file_url",
-				"file_size",
-				"is_private",
-				"modified",
-				"creation",
-				"owner",
-			],
+			filters=filters,
+			fields=ATTACHMENT_FIELDS,
 		)
 		or []
 	)
 
 
+def get_attachments_map(references):
+	"""
+	Attachments of many documents in one query: {(doctype, name): [file, ...]}.
+	"""
+	attachments = {reference: [] for reference in references}
+	if not references:
+		return attachments
+
+	files = frappe.db.get_all(
+		"File",
+		filters={
+			"attached_to_doctype": ("in", list({doctype for doctype, _name in references})),
+			"attached_to_name": ("in", list({name for _doctype, name in references})),
+		},
+		fields=[*ATTACHMENT_FIELDS, "attached_to_doctype", "attached_to_name"],
+	)
+	for file in files:
+		reference = (file.pop("attached_to_doctype"), file.pop("attached_to_name"))
+		if reference in attachments:
+			attachments[reference].append(file)
+	return attachments
+
+
+def get_version_changes(doctype, name, versions):
+	"""
+	First `changed` entry of each Version row ({version: [field, old, new] or None}).
+
+	Version rows are never edited, so the parsed entries are cached in Redis per document
+	instead of decoding every version's JSON on each timeline read.
+	"""
+	if not versions:
+		return {}
+
+	key = frappe.cache().make_key(f"{VERSION_CHANGE_CACHE_KEY}:{doctype}:{name}")
+	cached = frappe.cache().hmget(key, [version.name for version in versions])
+
+	changes, missing = {}, {}
+	for version, value in zip(versions, cached, strict=True):
+		if value is not None:
+			changes[version.name] = json.loads(value)
+			continue
+		change = (json.loads(version.data).get("changed") or [None])[0]
+		changes[version.name] = change
+		missing[version.name] = json.dumps(change, default=str)
+
+	if missing:
+		pipe = frappe.cache().pipeline()
+		pipe.hset(key, mapping=missing)
+		pipe.expire(key, VERSION_CHANGE_CACHE_TTL)
+		pipe.execute()
+
+	return changes
+
+
 def handle_multiple_versions(versions):
 	activities = []
 	grouped_versions = []
@@ -385,10 +647,14 @@ def parse_grouped_versions(versions):
 	return version
 
 
-def get_linked_calls(name):
+def get_linked_calls(name, since=None):
+	"""
+	Calls of `name` and the notes / tasks linked to its calls (only the ones modified after `since`).
+	"""
+	modified_filter = {"modified": (">", since)} if since else {}
 	calls = frappe.db.get_all(
 		"CRM Call Log",
-		filters={"reference_docname": name},
+		filters={"reference_docname": name, **modified_filter},
 		fields=[
 			"name",
 			"caller",
@@ -448,20 +714,30 @@ def get_linked_calls(name):
 				tasks.append(call.link_name)
 
 		_calls = [call for call in _calls if call.get("link_doctype") not in ["FCRM Note", "CRM Task"]]
+		if since and _calls:
+			# the links above still apply to older calls: only the returned calls are filtered
+			modified_calls = set(
+				frappe.db.get_all(
+					"CRM Call Log",
+					filters={"name": ("in", [call.name for call in _calls]), **modified_filter},
+					pluck="name",
+				)
+			)
+			_calls = [call for call in _calls if call.name in modified_calls]
 		if _calls:
 			calls = calls + _calls
 
 	if notes:
 		notes = frappe.db.get_all(
 			"FCRM Note",
-			filters={"name": ("in", notes)},
+			filters={"name": ("in", notes), **modified_filter},
 			fields=["name", "title", "content", "owner", "modified"],
 		)
 
 	if tasks:
 		tasks = frappe.db.get_all(
 			"CRM Task",
-			filters={"name": ("in", tasks)},
+			filters={"name": ("in", tasks), **modified_filter},
 			fields=[
 				"name",
 				"title",
@@ -479,19 +755,25 @@ def get_linked_calls(name):
 	return {"calls": calls, "notes": notes, "tasks": tasks}
 
 
-def get_linked_notes(name):
+def get_linked_notes(name, since=None):
+	filters = {"reference_docname": name}
+	if since:
+		filters["modified"] = (">", since)
 	notes = frappe.db.get_all(
 		"FCRM Note",
-		filters={"reference_docname": name},
+		filters=filters,
 		fields=["name", "title", "content", "owner", "modified"],
 	)
 	return notes or []
 
 
-def get_linked_tasks(name):
+def get_linked_tasks(name, since=None):
+	filters = {"reference_docname": name}
+	if since:
+		filters["modified"] = (">", since)
 	tasks = frappe.db.get_all(
 		"CRM Task",
-		filters={"reference_docname": name},
+		filters=filters,
 		fields=[
 			"name",
 			"title",
@@ -1,10 +1,27 @@
+import hashlib
+import inspect
 import json
 
 import frappe
 from frappe import _
 
 from crm.fcrm.doctype.crm_dashboard.crm_dashboard import create_default_manager_dashboard
-from crm.utils import sales_user_only
+from crm.fcrm.doctype.team.team import get_team_members
+from crm.utils import run_concurrently, sales_user_only
+
+# Cached dashboard responses live for a short time and are dropped on any lead / deal write
+DASHBOARD_CACHE_TTL = 60
+DASHBOARD_CACHE_VERSION_KEY = "crm_dashboard_cache_version"
+
+# Card methods that support empty dates (all time)
+METHODS_SUPPORTING_EMPTY_DATES = (
+	"get_total_leads",
+	"get_delayed_leads",
+	"get_lead_status_count",
+	"get_leads_by_status",
+	"get_leads_by_status_chart",
+	"get_total_deals",
+)
 
 
 @frappe.whitelist()
@@ -91,65 +108,106 @@ def get_dashboard(from_date="", to_date="", user="", project=""):
 	# Add links to items that don't have them (for backward compatibility)
 	layout = _add_links_to_layout_items(layout)
 
-	# List of methods that support empty dates (all time)
-	methods_supporting_empty_dates = [
-		'get_total_leads',
-		'get_delayed_leads',
-		'get_lead_status_count',
-		'get_leads_by_status',
-		'get_leads_by_status_chart',
-		'get_total_deals',
-	]
-	
+	cache_key = _get_dashboard_cache_key(layout, from_date, to_date, user, project, team_users)
+	cached = frappe.cache().get_value(cache_key)
+	if cached is not None:
+		return cached
+
+	# Per-status breakdown shared by the leads_by_status chart and all lead_status_* cards
+	status_counts = None
+
+	# Method-based cards are collected first and evaluated together below
+	card_calls = []
+
 	for l in layout:
 		# Check if it's a dynamic lead status card
 		if l['name'].startswith('lead_status_') and 'status' in l:
 			# Dynamic status card
 			status_name = l['status']
-			if team_users:
-				l["data"] = get_lead_status_count(from_date, to_date, user, status_name, project, team_users=team_users)
-			else:
-				l["data"] = get_lead_status_count(from_date, to_date, user, status_name, project)
+			if status_counts is None:
+				status_counts = get_lead_status_counts(from_date, to_date, user, project, team_users=team_users)
+			l["data"] = get_lead_status_count(
+				from_date, to_date, user, status_name, project, team_users=team_users, status_counts=status_counts
+			)
+		elif l['name'] == 'leads_by_status':
+			if status_counts is None:
+				status_counts = get_lead_status_counts(from_date, to_date, user, project, team_users=team_users)
+			l["data"] = get_leads_by_status(
+				from_date, to_date, user, project, team_users=team_users, status_counts=status_counts
+			)
 		else:
 			# Regular method-based card
-			method_name = f"get_{l['name']}"
-			if hasattr(frappe.get_attr("crm.api.dashboard"), method_name):
-				method = getattr(frappe.get_attr("crm.api.dashboard"), method_name)
-				# Check if method accepts project parameter
-				import inspect
-				sig = inspect.signature(method)
-				
-				# For methods that don't support empty dates, use current month as default
-				if method_name not in methods_supporting_empty_dates:
-					# Use current month if dates are empty
-					if not from_date or not to_date:
-						call_from_date = frappe.utils.get_first_day(frappe.utils.nowdate())
-						call_to_date = frappe.utils.get_last_day(frappe.utils.nowdate())
-					else:
-						call_from_date = from_date
-						call_to_date = to_date
-				else:
-					# Methods that support empty dates - pass as is
-					call_from_date = from_date
-					call_to_date = to_date
-				
-				# Pass team_users if available for team filtering
-				if 'project' in sig.parameters:
-					if team_users and 'team_users' in sig.parameters:
-						l["data"] = method(call_from_date, call_to_date, user, project, team_users=team_users)
-					else:
-						l["data"] = method(call_from_date, call_to_date, user, project)
-				else:
-					if team_users and 'team_users' in sig.parameters:
-						l["data"] = method(call_from_date, call_to_date, user, team_users=team_users)
-					else:
-						l["data"] = method(call_from_date, call_to_date, user)
-			else:
+			card = DASHBOARD_CARDS.get(f"get_{l['name']}")
+			if not card:
 				l["data"] = None
+				continue
+
+			# For methods that don't support empty dates, use current month as default
+			call_from_date, call_to_date = from_date, to_date
+			if not card.supports_empty_dates and (not from_date or not to_date):
+				call_from_date = frappe.utils.get_first_day(frappe.utils.nowdate())
+				call_to_date = frappe.utils.get_last_day(frappe.utils.nowdate())
+
+			card_calls.append((l, card, (call_from_date, call_to_date, user, project, team_users)))
+
+	results = _evaluate_dashboard_cards([(card, args) for _l, card, args in card_calls])
+	for (l, _card, _args), data in zip(card_calls, results):
+		l["data"] = data
 
+	frappe.cache().set_value(cache_key, layout, expires_in_sec=DASHBOARD_CACHE_TTL)
 	return layout
 
 
+def _call_dashboard_card(card, from_date, to_date, user, project="", team_users=None):
+	"""
+	Call a card method with only the arguments it accepts.
+	"""
+	args = [from_date, to_date, user]
+	if card.accepts_project:
+		args.append(project)
+	kwargs = {"team_users": team_users} if team_users and card.accepts_team_users else {}
+	return card.method(*args, **kwargs)
+
+
+def _evaluate_dashboard_cards(card_calls):
+	"""
+	Evaluate dashboard cards, returning their data in the same order.
+
+	Each card is an independent aggregate query, so they run concurrently on the shared
+	worker pool, see `crm.utils.run_concurrently`.
+	"""
+	return run_concurrently([(_call_dashboard_card, (card, *args)) for card, args in card_calls])
+
+
+def _get_dashboard_cache_key(layout, from_date, to_date, user, project, team_users):
+	"""
+	Cache key for one dashboard response: layout + user scope + date range + project.
+	The version part changes whenever a lead or deal is written (see `clear_dashboard_cache`).
+	"""
+	version = frappe.cache().get_value(DASHBOARD_CACHE_VERSION_KEY) or ""
+	scope = json.dumps(
+		[layout, str(from_date), str(to_date), user, project, sorted(team_users or []), frappe.local.lang],
+		sort_keys=True,
+		default=str,
+	)
+	return f"crm_dashboard:{version}:{hashlib.md5(scope.encode('utf-8')).hexdigest()}"
+
+
+def clear_dashboard_cache(doc=None, method=None):
+	"""
+	Invalidate all cached dashboard responses (doc_events hook on CRM Lead / CRM Deal).
+
+	The version is bumped again after commit: a dashboard request running before the commit
+	caches the old numbers under the version bumped here.
+	"""
+	_bump_dashboard_cache_version()
+	frappe.db.after_commit.add(_bump_dashboard_cache_version)
+
+
+def _bump_dashboard_cache_version():
+	frappe.cache().set_value(DASHBOARD_CACHE_VERSION_KEY, frappe.generate_hash(length=10))
+
+
 @frappe.whitelist()
 @sales_user_only
 def get_chart(name, type, from_date="", to_date="", user="", status=None, project=""):
@@ -169,91 +227,79 @@ def get_chart(name, type, from_date="", to_date="", user="", status=None, projec
 	if name.startswith('lead_status_') and status:
 		return get_lead_status_count(from_date, to_date, user, status, project)
 	
-	method_name = f"get_{name}"
-	if hasattr(frappe.get_attr("crm.api.dashboard"), method_name):
-		method = getattr(frappe.get_attr("crm.api.dashboard"), method_name)
-		return method(from_date, to_date, user, project)
+	card = DASHBOARD_CARDS.get(f"get_{name}")
+	if card:
+		return _call_dashboard_card(card, from_date, to_date, user, project)
 	else:
 		return {"error": _("Invalid chart name")}
 
 
-def get_total_leads(from_date, to_date, user="", project="", team_users=None):
+def _get_rollup_owner_conds(user, team_users, conds, params):
 	"""
-	Get lead count for the dashboard.
+	Add owner conditions on the dashboard rollup (`record_owner`) to conds/params.
+	Handles the "__TEAM__" marker used for Sales Manager team filtering.
 	"""
-	conds = []
-	params = {}
-	
-	# Handle empty dates (all time)
-	if from_date and to_date:
-		params["from_date"] = from_date
-		params["to_date"] = to_date
-		diff = frappe.utils.date_diff(to_date, from_date)
-		if diff == 0:
-			diff = 1
-		params["prev_from_date"] = frappe.utils.add_days(from_date, -diff)
-	else:
-		# All time - no date filtering
-		from_date = None
-		to_date = None
-		params["prev_from_date"] = None
-
-	# Handle team filtering for Sales Manager
 	if user == "__TEAM__" and team_users:
 		placeholders = ", ".join([f"%(team_user_{i})s" for i in range(len(team_users))])
-		conds.append(f"lead_owner IN ({placeholders})")
+		conds.append(f"record_owner IN ({placeholders})")
 		for i, team_user in enumerate(team_users):
 			params[f"team_user_{i}"] = team_user
 	elif user and user != "__TEAM__":
-		conds.append("lead_owner = %(user)s")
+		conds.append("record_owner = %(user)s")
 		params["user"] = user
-	
+
+
+def _get_rollup_project_conds(project, conds, params):
+	"""
+	Add project conditions on the dashboard rollup to conds/params.
+	"""
 	if project:
 		conds.append("project = %(project)s")
 		params["project"] = project
 		# Exclude Duplicate leads when filtering by project
-		# Use is_duplicate field (Check field) - exclude where is_duplicate = 1
-		conds.append("COALESCE(is_duplicate, 0) = 0")
+		conds.append("is_duplicate = 0")
 
-	where_clause = ""
-	if conds:
-		where_clause = "WHERE " + " AND ".join(conds)
 
-	if from_date and to_date:
+def _get_rollup_period_params(from_date, to_date, params):
+	"""
+	Add current and previous period dates to params.
+	Returns False for "all time" (empty dates).
+	"""
+	if not (from_date and to_date):
+		return False
+
+	params["from_date"] = from_date
+	params["to_date"] = to_date
+	diff = frappe.utils.date_diff(to_date, from_date)
+	if diff == 0:
+		diff = 1
+	params["prev_from_date"] = frappe.utils.add_days(from_date, -diff)
+	return True
+
+
+def get_total_leads(from_date, to_date, user="", project="", team_users=None):
+	"""
+	Get lead count for the dashboard.
+	"""
+	conds = ["reference_doctype = 'CRM Lead'"]
+	params = {}
+
+	_get_rollup_owner_conds(user, team_users, conds, params)
+	_get_rollup_project_conds(project, conds, params)
+
+	if _get_rollup_period_params(from_date, to_date, params):
 		# Date range specified
-		result = frappe.db.sql(
-			f"""
-			SELECT
-				COUNT(CASE
-					WHEN creation >= %(from_date)s AND creation < DATE_ADD(%(to_date)s, INTERVAL 1 DAY)
-					THEN name
-					ELSE NULL
-				END) as current_month_leads,
-
-				COUNT(CASE
-					WHEN creation >= %(prev_from_date)s AND creation < %(from_date)s
-					THEN name
-					ELSE NULL
-				END) as prev_month_leads
-			FROM `tabCRM Lead`
-			{where_clause}
-			""",
-			params,
-			as_dict=1,
-		)
-	else:
-		# All time - count all leads
-		result = frappe.db.sql(
-			f"""
-			SELECT
-				COUNT(*) as current_month_leads,
-				0 as prev_month_leads
-			FROM `tabCRM Lead`
-			{where_clause}
-			""",
-			params,
-			as_dict=1,
-		)
+		conds.append("date BETWEEN %(from_date)s AND %(to_date)s")
+
+	result = frappe.db.sql(
+		f"""
+		SELECT SUM(record_count) as current_month_leads
+		FROM `tabCRM Dashboard Rollup`
+		WHERE {" AND ".join(conds)}
+		""",
+		params,
+		as_dict=1,
+	)
 
 	current_month_leads = result[0].current_month_leads or 0
 
@@ -322,38 +368,24 @@ def get_ongoing_deals(from_date, to_date, user=""):
 	"""
 	conds = ""
 
-	diff = frappe.utils.date_diff(to_date, from_date)
-	if diff == 0:
-		diff = 1
-
 	if user:
-		conds += f" AND d.deal_owner = '{user}'"
+		conds += " AND r.record_owner = %(user)s"
 
 	result = frappe.db.sql(
 		f"""
 		SELECT
-			COUNT(CASE
-				WHEN d.creation >= %(from_date)s AND d.creation < DATE_ADD(%(to_date)s, INTERVAL 1 DAY)
-					AND s.type NOT IN ('Won', 'Lost')
-					{conds}
-				THEN d.name
-				ELSE NULL
-			END) as current_month_deals,
-
-			COUNT(CASE
-				WHEN d.creation >= %(prev_from_date)s AND d.creation < %(from_date)s
-					AND s.type NOT IN ('Won', 'Lost')
-					{conds}
-				THEN d.name
-				ELSE NULL
-			END) as prev_month_deals
-		FROM `tabCRM Deal` d
-		JOIN `tabCRM Deal Status` s ON d.status = s.name
+			SUM(r.record_count) as current_month_deals
+		FROM `tabCRM Dashboard Rollup` r
+		JOIN `tabCRM Deal Status` s ON r.status = s.name
+		WHERE r.reference_doctype = 'CRM Deal'
+			AND r.date BETWEEN %(from_date)s AND %(to_date)s
+			AND s.type NOT IN ('Won', 'Lost')
+			{conds}
 	""",
 		{
 			"from_date": from_date,
 			"to_date": to_date,
-			"prev_from_date": frappe.utils.add_days(from_date, -diff),
+			"user": user,
 		},
 		as_dict=1,
 	)
@@ -708,7 +740,7 @@ def get_sales_trend(from_date="", to_date="", user="", project=""):
 	]
 	"""
 
-	lead_conds = []
+	lead_conds = ""
 	deal_conds = ""
 	params = {}
 
@@ -720,53 +752,31 @@ def get_sales_trend(from_date="", to_date="", user="", project=""):
 	params["to"] = to_date
 
 	if user:
-		lead_conds.append("lead_owner = %(user)s")
-		deal_conds += f" AND deal_owner = '{user}'"
+		lead_conds += " AND r.record_owner = %(user)s"
+		deal_conds += " AND r.record_owner = %(user)s"
 		params["user"] = user
 	
 	if project:
-		lead_conds.append("project = %(project)s")
+		lead_conds += " AND r.project = %(project)s"
 		params["project"] = project
 		# Exclude Duplicate leads when filtering by project
-		# Use is_duplicate field (Check field) - exclude where is_duplicate = 1
-		lead_conds.append("COALESCE(is_duplicate, 0) = 0")
-
-	lead_where = "DATE(creation) BETWEEN %(from)s AND %(to)s"
-	if lead_conds:
-		lead_where += " AND " + " AND ".join(lead_conds)
+		lead_conds += " AND r.is_duplicate = 0"
 
 	result = frappe.db.sql(
 		f"""
 		SELECT
-			DATE_FORMAT(date, '%%Y-%%m-%%d') AS date,
-			SUM(leads) AS leads,
-			SUM(deals) AS deals,
-			SUM(won_deals) AS won_deals
-		FROM (
-			SELECT
-				DATE(creation) AS date,
-				COUNT(*) AS leads,
-				0 AS deals,
-				0 AS won_deals
-			FROM `tabCRM Lead`
-			WHERE {lead_where}
-			GROUP BY DATE(creation)
-
-			UNION ALL
-
-			SELECT
-				DATE(d.creation) AS date,
-				0 AS leads,
-				COUNT(*) AS deals,
-				SUM(CASE WHEN s.type = 'Won' THEN 1 ELSE 0 END) AS won_deals
-			FROM `tabCRM Deal` d
-			JOIN `tabCRM Deal Status` s ON d.status = s.name
-			WHERE DATE(d.creation) BETWEEN %(from)s AND %(to)s
-			{deal_conds}
-			GROUP BY DATE(d.creation)
-		) AS daily
-		GROUP BY date
-		ORDER BY date
+			DATE_FORMAT(r.date, '%%Y-%%m-%%d') AS date,
+			SUM(CASE WHEN r.reference_doctype = 'CRM Lead' {lead_conds} THEN r.record_count ELSE 0 END) AS leads,
+			SUM(CASE WHEN r.reference_doctype = 'CRM Deal' AND s.name IS NOT NULL {deal_conds}
+				THEN r.record_count ELSE 0 END) AS deals,
+			SUM(CASE WHEN r.reference_doctype = 'CRM Deal' AND s.type = 'Won' {deal_conds}
+				THEN r.record_count ELSE 0 END) AS won_deals
+		FROM `tabCRM Dashboard Rollup` r
+		LEFT JOIN `tabCRM Deal Status` s ON r.reference_doctype = 'CRM Deal' AND r.status = s.name
+		WHERE r.date BETWEEN %(from)s AND %(to)s
+		GROUP BY r.date
+		HAVING leads > 0 OR deals > 0
+		ORDER BY r.date
 		""",
 		params,
 		as_dict=True,
@@ -882,7 +892,7 @@ def get_funnel_conversion(from_date="", to_date="", user="", project=""):
 		...
 	]
 	"""
-	lead_conds = []
+	lead_conds = ["reference_doctype = 'CRM Lead'", "date BETWEEN %(from)s AND %(to)s"]
 	deal_conds = ""
 	params = {}
 
@@ -894,7 +904,7 @@ def get_funnel_conversion(from_date="", to_date="", user="", project=""):
 	params["to"] = to_date
 
 	if user:
-		lead_conds.append("lead_owner = %(user)s")
+		lead_conds.append("record_owner = %(user)s")
 		deal_conds += f" AND deal_owner = '{user}'"
 		params["user"] = user
 	
@@ -902,26 +912,21 @@ def get_funnel_conversion(from_date="", to_date="", user="", project=""):
 		lead_conds.append("project = %(project)s")
 		params["project"] = project
 		# Exclude Duplicate leads when filtering by project
-		# Use is_duplicate field (Check field) - exclude where is_duplicate = 1
-		lead_conds.append("COALESCE(is_duplicate, 0) = 0")
-
-	lead_where = "DATE(creation) BETWEEN %(from)s AND %(to)s"
-	if lead_conds:
-		lead_where += " AND " + " AND ".join(lead_conds)
+		lead_conds.append("is_duplicate = 0")
 
 	result = []
 
 	# Get total leads
 	total_leads = frappe.db.sql(
 		f"""
-			SELECT COUNT(*) AS count
-			FROM `tabCRM Lead`
-			WHERE {lead_where}
+			SELECT SUM(record_count) AS count
+			FROM `tabCRM Dashboard Rollup`
+			WHERE {" AND ".join(lead_conds)}
 		""",
 		params,
 		as_dict=True,
 	)
-	total_leads_count = total_leads[0].count if total_leads else 0
+	total_leads_count = (total_leads[0].count or 0) if total_leads else 0
 
 	result.append({"stage": "Leads", "count": total_leads_count})
 
@@ -968,22 +973,24 @@ def get_deals_by_stage_axis(from_date="", to_date="", user=""):
 		to_date = frappe.utils.get_last_day(to_date or frappe.utils.nowdate())
 
 	if user:
-		deal_conds += f" AND d.deal_owner = '{user}'"
+		deal_conds += " AND r.record_owner = %(user)s"
 
 	result = frappe.db.sql(
 		f"""
 		SELECT
-			d.status AS stage,
-			COUNT(*) AS count,
+			r.status AS stage,
+			SUM(r.record_count) AS count,
 			s.type AS status_type
-		FROM `tabCRM Deal` AS d
-		JOIN `tabCRM Deal Status` s ON d.status = s.name
-		WHERE DATE(d.creation) BETWEEN %(from)s AND %(to)s AND s.type NOT IN ('Lost')
+		FROM `tabCRM Dashboard Rollup` AS r
+		JOIN `tabCRM Deal Status` s ON r.status = s.name
+		WHERE r.reference_doctype = 'CRM Deal'
+			AND r.date BETWEEN %(from)s AND %(to)s AND s.type NOT IN ('Lost')
 		{deal_conds}
-		GROUP BY d.status
+		GROUP BY r.status
+		HAVING count > 0
 		ORDER BY count DESC
 		""",
-		{"from": from_date, "to": to_date},
+		{"from": from_date, "to": to_date, "user": user},
 		as_dict=True,
 	)
 
@@ -1018,22 +1025,24 @@ def get_deals_by_stage_donut(from_date="", to_date="", user=""):
 		to_date = frappe.utils.get_last_day(to_date or frappe.utils.nowdate())
 
 	if user:
-		deal_conds += f" AND d.deal_owner = '{user}'"
+		deal_conds += " AND r.record_owner = %(user)s"
 
 	result = frappe.db.sql(
 		f"""
 		SELECT
-			d.status AS stage,
-			COUNT(*) AS count,
+			r.status AS stage,
+			SUM(r.record_count) AS count,
 			s.type AS status_type
-		FROM `tabCRM Deal` AS d
-		JOIN `tabCRM Deal Status` s ON d.status = s.name
-		WHERE DATE(d.creation) BETWEEN %(from)s AND %(to)s
+		FROM `tabCRM Dashboard Rollup` AS r
+		JOIN `tabCRM Deal Status` s ON r.status = s.name
+		WHERE r.reference_doctype = 'CRM Deal'
+			AND r.date BETWEEN %(from)s AND %(to)s
 		{deal_conds}
-		GROUP BY d.status
+		GROUP BY r.status
+		HAVING count > 0
 		ORDER BY count DESC
 		""",
-		{"from": from_date, "to": to_date},
+		{"from": from_date, "to": to_date, "user": user},
 		as_dict=True,
 	)
 
@@ -1072,7 +1081,7 @@ def get_lost_deal_reasons(from_date="", to_date="", user=""):
 			COUNT(*) AS count
 		FROM `tabCRM Deal` AS d
 		JOIN `tabCRM Deal Status` s ON d.status = s.name
-		WHERE DATE(d.creation) BETWEEN %(from)s AND %(to)s AND s.type = 'Lost'
+		WHERE d.creation >= %(from)s AND d.creation < DATE_ADD(%(to)s, INTERVAL 1 DAY) AND s.type = 'Lost'
 		{deal_conds}
 		GROUP BY d.lost_reason
 		HAVING reason IS NOT NULL AND reason != ''
@@ -1109,7 +1118,7 @@ def get_leads_by_source(from_date="", to_date="", user="", project=""):
 		...
 	]
 	"""
-	lead_conds = []
+	lead_conds = ["reference_doctype = 'CRM Lead'", "date BETWEEN %(from)s AND %(to)s"]
 	params = {}
 
 	if not from_date or not to_date:
@@ -1120,28 +1129,24 @@ def get_leads_by_source(from_date="", to_date="", user="", project=""):
 	params["to"] = to_date
 
 	if user:
-		lead_conds.append("lead_owner = %(user)s")
+		lead_conds.append("record_owner = %(user)s")
 		params["user"] = user
 	
 	if project:
 		lead_conds.append("project = %(project)s")
 		params["project"] = project
 		# Exclude Duplicate leads when filtering by project
-		# Use is_duplicate field (Check field) - exclude where is_duplicate = 1
-		lead_conds.append("COALESCE(is_duplicate, 0) = 0")
-
-	lead_where = "DATE(creation) BETWEEN %(from)s AND %(to)s"
-	if lead_conds:
-		lead_where += " AND " + " AND ".join(lead_conds)
+		lead_conds.append("is_duplicate = 0")
 
 	result = frappe.db.sql(
 		f"""
 		SELECT
-			IFNULL(source, 'Empty') AS source,
-			COUNT(*) AS count
-		FROM `tabCRM Lead`
-		WHERE {lead_where}
+			IF(source = '', 'Empty', source) AS source,
+			SUM(record_count) AS count
+		FROM `tabCRM Dashboard Rollup`
+		WHERE {" AND ".join(lead_conds)}
 		GROUP BY source
+		HAVING count > 0
 		ORDER BY count DESC
 		""",
 		params,
@@ -1173,20 +1178,22 @@ def get_deals_by_source(from_date="", to_date="", user=""):
 		to_date = frappe.utils.get_last_day(to_date or frappe.utils.nowdate())
 
 	if user:
-		deal_conds += f" AND deal_owner = '{user}'"
+		deal_conds += " AND record_owner = %(user)s"
 
 	result = frappe.db.sql(
 		f"""
 		SELECT
-			IFNULL(source, 'Empty') AS source,
-			COUNT(*) AS count
-		FROM `tabCRM Deal`
-		WHERE DATE(creation) BETWEEN %(from)s AND %(to)s
+			IF(source = '', 'Empty', source) AS source,
+			SUM(record_count) AS count
+		FROM `tabCRM Dashboard Rollup`
+		WHERE reference_doctype = 'CRM Deal'
+			AND date BETWEEN %(from)s AND %(to)s
 		{deal_conds}
 		GROUP BY source
+		HAVING count > 0
 		ORDER BY count DESC
 		""",
-		{"from": from_date, "to": to_date},
+		{"from": from_date, "to": to_date, "user": user},
 		as_dict=True,
 	)
 
@@ -1215,21 +1222,23 @@ def get_deals_by_territory(from_date="", to_date="", user=""):
 		to_date = frappe.utils.get_last_day(to_date or frappe.utils.nowdate())
 
 	if user:
-		deal_conds += f" AND d.deal_owner = '{user}'"
+		deal_conds += " AND r.record_owner = %(user)s"
 
 	result = frappe.db.sql(
 		f"""
 		SELECT
-			IFNULL(d.territory, 'Empty') AS territory,
-			COUNT(*) AS deals,
-			SUM(COALESCE(d.deal_value, 0) * IFNULL(d.exchange_rate, 1)) AS value
-		FROM `tabCRM Deal` AS d
-		WHERE DATE(d.creation) BETWEEN %(from)s AND %(to)s
+			IF(r.territory = '', 'Empty', r.territory) AS territory,
+			SUM(r.record_count) AS deals,
+			SUM(r.deal_value) AS value
+		FROM `tabCRM Dashboard Rollup` AS r
+		WHERE r.reference_doctype = 'CRM Deal'
+			AND r.date BETWEEN %(from)s AND %(to)s
 		{deal_conds}
-		GROUP BY d.territory
+		GROUP BY r.territory
+		HAVING deals > 0
 		ORDER BY value DESC
 		""",
-		{"from": from_date, "to": to_date},
+		{"from": from_date, "to": to_date, "user": user},
 		as_dict=True,
 	)
 
@@ -1271,22 +1280,24 @@ def get_deals_by_salesperson(from_date="", to_date="", user=""):
 		to_date = frappe.utils.get_last_day(to_date or frappe.utils.nowdate())
 
 	if user:
-		deal_conds += f" AND d.deal_owner = '{user}'"
+		deal_conds += " AND r.record_owner = %(user)s"
 
 	result = frappe.db.sql(
 		f"""
 		SELECT
-			IFNULL(u.full_name, d.deal_owner) AS salesperson,
-			COUNT(*)                           AS deals,
-			SUM(COALESCE(d.deal_value, 0) * IFNULL(d.exchange_rate, 1)) AS value
-		FROM `tabCRM Deal` AS d
-		LEFT JOIN `tabUser` AS u ON u.name = d.deal_owner
-		WHERE DATE(d.creation) BETWEEN %(from)s AND %(to)s
+			IFNULL(u.full_name, NULLIF(r.record_owner, '')) AS salesperson,
+			SUM(r.record_count)                AS deals,
+			SUM(r.deal_value)                  AS value
+		FROM `tabCRM Dashboard Rollup` AS r
+		LEFT JOIN `tabUser` AS u ON u.name = r.record_owner
+		WHERE r.reference_doctype = 'CRM Deal'
+			AND r.date BETWEEN %(from)s AND %(to)s
 		{deal_conds}
-		GROUP BY d.deal_owner
+		GROUP BY r.record_owner
+		HAVING deals > 0
 		ORDER BY value DESC
 		""",
-		{"from": from_date, "to": to_date},
+		{"from": from_date, "to": to_date, "user": user},
 		as_dict=True,
 	)
 
@@ -1348,7 +1359,7 @@ def get_deal_status_change_counts(from_date, to_date, deal_conds=""):
 			scl.to IS NOT NULL
 			AND scl.to != ''
 			AND s.type != 'Lost'
-			AND DATE(d.creation) BETWEEN %(from)s AND %(to)s
+			AND d.creation >= %(from)s AND d.creation < DATE_ADD(%(to)s, INTERVAL 1 DAY)
 			{deal_conds}
 		GROUP BY
 			scl.to, st.position
@@ -1361,106 +1372,66 @@ def get_deal_status_change_counts(from_date, to_date, deal_conds=""):
 	return result or []
 
 
-def get_leads_by_status(from_date, to_date, user="", project="", team_users=None):
+def get_lead_status_counts(from_date, to_date, user="", project="", team_users=None):
 	"""
-	Get lead count by status for the dashboard.
-	Returns data for both number chart and donut chart.
+	Get current and previous period lead counts for every status in a single
+	GROUP BY pass over the dashboard rollup.
+	Returns a dict mapping status name to {"current_count", "prev_count"}.
 	"""
-	base_conds = []
-	base_params = {}
-	
-	# Handle empty dates (all time)
-	if from_date and to_date:
-		base_params["from_date"] = from_date
-		base_params["to_date"] = to_date
-		diff = frappe.utils.date_diff(to_date, from_date)
-		if diff == 0:
-			diff = 1
-		base_params["prev_from_date"] = frappe.utils.add_days(from_date, -diff)
-	else:
-		# All time - no date filtering
-		from_date = None
-		to_date = None
-		base_params["prev_from_date"] = None
+	conds = ["reference_doctype = 'CRM Lead'"]
+	params = {}
 
-	# Handle team filtering for Sales Manager
-	if user == "__TEAM__" and team_users:
-		placeholders = ", ".join([f"%(team_user_{i})s" for i in range(len(team_users))])
-		base_conds.append(f"lead_owner IN ({placeholders})")
-		for i, team_user in enumerate(team_users):
-			base_params[f"team_user_{i}"] = team_user
-	elif user and user != "__TEAM__":
-		base_conds.append("lead_owner = %(user)s")
-		base_params["user"] = user
-	
-	if project:
-		base_conds.append("project = %(project)s")
-		base_params["project"] = project
-		# Exclude Duplicate leads when filtering by project
-		# Use is_duplicate field (Check field) - exclude where is_duplicate = 1
-		base_conds.append("COALESCE(is_duplicate, 0) = 0")
+	_get_rollup_owner_conds(user, team_users, conds, params)
+	_get_rollup_project_conds(project, conds, params)
 
-	# Get all statuses ordered by position
-	statuses = frappe.db.sql(
-		"""
-		SELECT lead_status, color, position
-		FROM `tabCRM Lead Status`
-		ORDER BY position ASC
+	if _get_rollup_period_params(from_date, to_date, params):
+		# Date range specified
+		conds.append("date BETWEEN %(prev_from_date)s AND %(to_date)s")
+		current = "SUM(CASE WHEN date >= %(from_date)s THEN record_count ELSE 0 END)"
+		prev = "SUM(CASE WHEN date < %(from_date)s THEN record_count ELSE 0 END)"
+	else:
+		# All time - count all leads per status
+		current = "SUM(record_count)"
+		prev = "0"
+
+	counts = frappe.db.sql(
+		f"""
+		SELECT
+			status,
+			{current} as current_count,
+			{prev} as prev_count
+		FROM `tabCRM Dashboard Rollup`
+		WHERE {" AND ".join(conds)}
+		GROUP BY status
 		""",
+		params,
 		as_dict=1,
 	)
 
+	return {
+		row.status: {
+			"current_count": row.current_count or 0,
+			"prev_count": row.prev_count or 0,
+		}
+		for row in counts
+	}
+
+
+def get_leads_by_status(from_date, to_date, user="", project="", team_users=None, status_counts=None):
+	"""
+	Get lead count by status for the dashboard.
+	Returns data for both number chart and donut chart.
+	Pass `status_counts` (from `get_lead_status_counts`) to reuse an existing breakdown.
+	"""
+	if status_counts is None:
+		status_counts = get_lead_status_counts(from_date, to_date, user, project, team_users=team_users)
+
 	result = []
-	for status in statuses:
+	for status in get_all_lead_statuses():
 		status_name = status.lead_status
-		
-		# Build conditions for this status
-		conds = base_conds.copy()
-		conds.append("status = %(status)s")
-		params = base_params.copy()
-		params["status"] = status_name
-		
-		where_clause = "WHERE " + " AND ".join(conds)
-		
-		# Get current and previous period counts
-		if from_date and to_date:
-			# Date range specified
-			counts = frappe.db.sql(
-				f"""
-				SELECT
-					COUNT(CASE
-						WHEN creation >= %(from_date)s AND creation < DATE_ADD(%(to_date)s, INTERVAL 1 DAY)
-						THEN name
-						ELSE NULL
-					END) as current_count,
-
-					COUNT(CASE
-						WHEN creation >= %(prev_from_date)s AND creation < %(from_date)s
-						THEN name
-						ELSE NULL
-					END) as prev_count
-				FROM `tabCRM Lead`
-				{where_clause}
-				""",
-				params,
-				as_dict=1,
-			)
-		else:
-			# All time - count all leads with this status
-			counts = frappe.db.sql(
-				f"""
-				SELECT
-					COUNT(*) as current_count,
-					0 as prev_count
-				FROM `tabCRM Lead`
-				{where_clause}
-				""",
-				params,
-				as_dict=1,
-			)
-
-		current_count = counts[0].current_count or 0
-		prev_count = counts[0].prev_count or 0
+		counts = status_counts.get(status_name, {})
+		current_count = counts.get("current_count", 0)
+		prev_count = counts.get("prev_count", 0)
 
 		delta_in_percentage = (
 			(current_count - prev_count) / prev_count * 100 if prev_count else 0
@@ -1499,85 +1470,25 @@ def get_delayed_leads(from_date, to_date, user="", project="", team_users=None):
 			"value": 0,
 		}
 	
-	conds = []
+	conds = ["reference_doctype = 'CRM Lead'", "`delayed` = 1"]
 	params = {}
-	
-	# Handle empty dates (all time)
-	if from_date and to_date:
-		params["from_date"] = from_date
-		params["to_date"] = to_date
-		diff = frappe.utils.date_diff(to_date, from_date)
-		if diff == 0:
-			diff = 1
-		params["prev_from_date"] = frappe.utils.add_days(from_date, -diff)
-	else:
-		# All time - no date filtering
-		from_date = None
-		to_date = None
-		params["prev_from_date"] = None
 
-	# Handle team filtering for Sales Manager
-	if user == "__TEAM__" and team_users:
-		placeholders = ", ".join([f"%(team_user_{i})s" for i in range(len(team_users))])
-		conds.append(f"lead_owner IN ({placeholders})")
-		for i, team_user in enumerate(team_users):
-			params[f"team_user_{i}"] = team_user
-	elif user and user != "__TEAM__":
-		conds.append("lead_owner = %(user)s")
-		params["user"] = user
-	
-	if project:
-		conds.append("project = %(project)s")
-		params["project"] = project
-		# Exclude Duplicate leads when filtering by project
-		# Use is_duplicate field (Check field) - exclude where is_duplicate = 1
-		conds.append("COALESCE(is_duplicate, 0) = 0")
+	_get_rollup_owner_conds(user, team_users, conds, params)
+	_get_rollup_project_conds(project, conds, params)
 
-	where_clause = ""
-	if conds:
-		where_clause = "WHERE " + " AND ".join(conds)
-
-	if from_date and to_date:
+	if _get_rollup_period_params(from_date, to_date, params):
 		# Date range specified
-		result = frappe.db.sql(
-			f"""
-			SELECT
-				COUNT(CASE
-					WHEN creation >= %(from_date)s AND creation < DATE_ADD(%(to_date)s, INTERVAL 1 DAY)
-						AND `delayed` = 1
-					THEN name
-					ELSE NULL
-				END) as current_delayed,
-
-				COUNT(CASE
-					WHEN creation >= %(prev_from_date)s AND creation < %(from_date)s
-						AND `delayed` = 1
-					THEN name
-					ELSE NULL
-				END) as prev_delayed
-			FROM `tabCRM Lead`
-			{where_clause}
-			""",
-			params,
-			as_dict=1,
-		)
-	else:
-		# All time - count all delayed leads
-		result = frappe.db.sql(
-			f"""
-			SELECT
-				COUNT(CASE
-					WHEN `delayed` = 1
-					THEN name
-					ELSE NULL
-				END) as current_delayed,
-				0 as prev_delayed
-			FROM `tabCRM Lead`
-			{where_clause}
-			""",
-			params,
-			as_dict=1,
-		)
+		conds.append("date BETWEEN %(from_date)s AND %(to_date)s")
+
+	result = frappe.db.sql(
+		f"""
+		SELECT SUM(record_count) as current_delayed
+		FROM `tabCRM Dashboard Rollup`
+		WHERE {" AND ".join(conds)}
+		""",
+		params,
+		as_dict=1,
+	)
 
 	current_delayed = result[0].current_delayed or 0
 
@@ -1592,65 +1503,28 @@ def get_total_deals(from_date, to_date, user=""):
 	"""
 	Get total deal count for the dashboard.
 	"""
-	conds = []
+	conds = ["reference_doctype = 'CRM Deal'"]
 	params = {}
-	
-	# Handle empty dates (all time)
+
 	if from_date and to_date:
+		# Date range specified
+		conds.append("date BETWEEN %(from_date)s AND %(to_date)s")
 		params["from_date"] = from_date
 		params["to_date"] = to_date
-		diff = frappe.utils.date_diff(to_date, from_date)
-		if diff == 0:
-			diff = 1
-		params["prev_from_date"] = frappe.utils.add_days(from_date, -diff)
-	else:
-		# All time - no date filtering
-		from_date = None
-		to_date = None
-		params["prev_from_date"] = None
 
 	if user:
-		conds.append(f"deal_owner = '{user}'")
-
-	where_clause = ""
-	if conds:
-		where_clause = "WHERE " + " AND ".join(conds)
+		conds.append("record_owner = %(user)s")
+		params["user"] = user
 
-	if from_date and to_date:
-		# Date range specified
-		result = frappe.db.sql(
-			f"""
-			SELECT
-				COUNT(CASE
-					WHEN creation >= %(from_date)s AND creation < DATE_ADD(%(to_date)s, INTERVAL 1 DAY)
-					THEN name
-					ELSE NULL
-				END) as current_deals,
-
-				COUNT(CASE
-					WHEN creation >= %(prev_from_date)s AND creation < %(from_date)s
-					THEN name
-					ELSE NULL
-				END) as prev_deals
-			FROM `tabCRM Deal`
-			{where_clause}
-			""",
-			params,
-			as_dict=1,
-		)
-	else:
-		# All time - count all deals
-		result = frappe.db.sql(
-			f"""
-			SELECT
-				COUNT(*) as current_deals,
-				0 as prev_deals
-			FROM `tabCRM Deal`
-			{where_clause}
-			""",
-			params,
-			as_dict=1,
-		)
+	result = frappe.db.sql(
+		f"""
+		SELECT SUM(record_count) as current_deals
+		FROM `tabCRM Dashboard Rollup`
+		WHERE {" AND ".join(conds)}
+		""",
+		params,
+		as_dict=1,
+	)
 
 	current_deals = result[0].current_deals or 0
 
@@ -1665,53 +1539,36 @@ def get_leads_by_status_chart(from_date="", to_date="", user="", project=""):
 	"""
 	Get lead data by status for chart display.
 	"""
-	lead_conds = []
+	lead_conds = ["r.reference_doctype = 'CRM Lead'"]
 	params = {}
 
 	# Handle empty dates (all time)
 	if from_date and to_date:
+		lead_conds.append("r.date BETWEEN %(from)s AND %(to)s")
 		params["from"] = from_date
 		params["to"] = to_date
-	else:
-		# All time - no date filtering
-		from_date = None
-		to_date = None
 
 	if user:
-		lead_conds.append("l.lead_owner = %(user)s")
+		lead_conds.append("r.record_owner = %(user)s")
 		params["user"] = user
 	
 	if project:
-		lead_conds.append("l.project = %(project)s")
+		lead_conds.append("r.project = %(project)s")
 		params["project"] = project
 		# Exclude Duplicate leads when filtering by project
-		# Use is_duplicate field (Check field) - exclude where is_duplicate = 1
-		lead_conds.append("COALESCE(l.is_duplicate, 0) = 0")
-
-	if from_date and to_date:
-		# Date range specified
-		date_cond = "DATE(l.creation) BETWEEN %(from)s AND %(to)s"
-		if lead_conds:
-			where_clause = f"WHERE {date_cond} AND " + " AND ".join(lead_conds)
-		else:
-			where_clause = f"WHERE {date_cond}"
-	else:
-		# All time - no date filtering
-		if lead_conds:
-			where_clause = "WHERE " + " AND ".join(lead_conds)
-		else:
-			where_clause = ""
+		lead_conds.append("r.is_duplicate = 0")
 
 	result = frappe.db.sql(
 		f"""
 		SELECT
-			l.status AS status,
-			COUNT(*) AS count,
+			r.status AS status,
+			SUM(r.record_count) AS count,
 			s.color AS color
-		FROM `tabCRM Lead` AS l
-		JOIN `tabCRM Lead Status` s ON l.status = s.lead_status
-		{where_clause}
-		GROUP BY l.status, s.position, s.color
+		FROM `tabCRM Dashboard Rollup` AS r
+		JOIN `tabCRM Lead Status` s ON r.status = s.lead_status
+		WHERE {" AND ".join(lead_conds)}
+		GROUP BY r.status, s.position, s.color
+		HAVING count > 0
 		ORDER BY s.position ASC
 		""",
 		params,
@@ -1736,88 +1593,15 @@ def get_leads_by_status_chart(from_date="", to_date="", user="", project=""):
 	}
 
 
-def get_lead_status_count(from_date, to_date, user, status_name, project="", team_users=None):
+def get_lead_status_count(from_date, to_date, user, status_name, project="", team_users=None, status_counts=None):
 	"""
 	Helper function to get count for a specific status.
+	Pass `status_counts` (from `get_lead_status_counts`) to reuse an existing breakdown.
 	"""
-	conds = []
-	params = {
-		"status": status_name,
-	}
-	
-	# Handle empty dates (all time)
-	if from_date and to_date:
-		params["from_date"] = from_date
-		params["to_date"] = to_date
-		diff = frappe.utils.date_diff(to_date, from_date)
-		if diff == 0:
-			diff = 1
-		params["prev_from_date"] = frappe.utils.add_days(from_date, -diff)
-	else:
-		# All time - no date filtering
-		from_date = None
-		to_date = None
-		params["prev_from_date"] = None
-
-	# Handle team filtering for Sales Manager
-	if user == "__TEAM__" and team_users:
-		placeholders = ", ".join([f"%(team_user_{i})s" for i in range(len(team_users))])
-		conds.append(f"lead_owner IN ({placeholders})")
-		for i, team_user in enumerate(team_users):
-			params[f"team_user_{i}"] = team_user
-	elif user and user != "__TEAM__":
-		conds.append("lead_owner = %(user)s")
-		params["user"] = user
-	
-	if project:
-		conds.append("project = %(project)s")
-		params["project"] = project
-		# Exclude Duplicate leads when filtering by project
-		# Use is_duplicate field (Check field) - exclude where is_duplicate = 1
-		conds.append("COALESCE(is_duplicate, 0) = 0")
+	if status_counts is None:
+		status_counts = get_lead_status_counts(from_date, to_date, user, project, team_users=team_users)
 
-	# Always filter by status
-	conds.append("status = %(status)s")
-
-	where_clause = "WHERE " + " AND ".join(conds)
-
-	if from_date and to_date:
-		# Date range specified
-		result = frappe.db.sql(
-			f"""
-			SELECT
-				COUNT(CASE
-					WHEN creation >= %(from_date)s AND creation < DATE_ADD(%(to_date)s, INTERVAL 1 DAY)
-					THEN name
-					ELSE NULL
-				END) as current_count,
-
-				COUNT(CASE
-					WHEN creation >= %(prev_from_date)s AND creation < %(from_date)s
-					THEN name
-					ELSE NULL
-				END) as prev_count
-			FROM `tabCRM Lead`
-			{where_clause}
-			""",
-			params,
-			as_dict=1,
-		)
-	else:
-		# All time - count all leads with this status
-		result = frappe.db.sql(
-			f"""
-			SELECT
-				COUNT(*) as current_count,
-				0 as prev_count
-			FROM `tabCRM Lead`
-			{where_clause}
-			""",
-			params,
-			as_dict=1,
-		)
-
-	current_count = result[0].current_count or 0
+	current_count = status_counts.get(status_name, {}).get("current_count", 0)
 
 	return {
 		"title": _(status_name),
@@ -2008,30 +1792,27 @@ def _get_team_members_for_leader(team_leader):
 	"""
 	if not team_leader:
 		return []
-	
-	# Find Team where current user is team_leader
-	teams = frappe.get_all(
-		"Team",
-		filters={"team_leader": team_leader},
-		fields=["name"],
-		limit=1
-	)
-	
-	if not teams:
-		return []
-	
-	team_name = teams[0].name
-	
-	# Get team members from Member child table
-	members = frappe.get_all(
-		"Member",
-		filters={
-			"parent": team_name,
-			"parenttype": "Team"
-		},
-		fields=["member"],
-		pluck="member"
-	)
-	
-	# Filter out None/empty values
-	return [m for m in members if m]
+
+	return get_team_members(team_leader)
+
+
+def _resolve_dashboard_cards():
+	"""
+	Resolve the card methods (get_<card name>) of this module once, at import.
+	"""
+	cards = {}
+	for name, method in list(globals().items()):
+		if not name.startswith("get_") or not inspect.isfunction(method) or method.__module__ != __name__:
+			continue
+		parameters = inspect.signature(method).parameters
+		cards[name] = frappe._dict(
+			method=method,
+			accepts_project="project" in parameters,
+			accepts_team_users="team_users" in parameters,
+			supports_empty_dates=name in METHODS_SUPPORTING_EMPTY_DATES,
+		)
+	return cards
+
+
+# Must stay at the end of the module, after every get_* card function
+DASHBOARD_CARDS = _resolve_dashboard_cards()
@@ -10,9 +10,10 @@ from frappe.model.document import get_controller
 from frappe.utils import make_filter_tuple
 from pypika import Criterion
 
+from crm.api.task_status import apply_late_status, get_late_status_fields
 from crm.api.views import get_views
 from crm.fcrm.doctype.crm_form_script.crm_form_script import get_form_script
-from crm.utils import get_dynamic_linked_docs, get_linked_docs
+from crm.utils import conditional_get, get_dynamic_linked_docs, get_linked_docs
 
 
 @frappe.whitelist(allow_guest=True)
@@ -274,7 +275,47 @@ def update_in_standard_filter(fieldname, doctype, value):
         )
 
 
+# Besides the listed doctype, get_data reads views, assignments (ToDo -> _assign),
+# comments (_comments) and, for kanban / permissions, these doctypes
+GET_DATA_DEPENDENCIES = {
+    "CRM Lead": ["CRM Lead Status", "CRM Lead Visibility"],
+    "CRM Deal": ["CRM Deal Status"],
+}
+
+
+def _get_data_doctypes(kwargs):
+    doctype = kwargs.get("doctype")
+    # CRM Form Script: the payload carries the form / list scripts of the doctype
+    doctypes = [
+        doctype,
+        "CRM View Settings",
+        "ToDo",
+        "Comment",
+        "CRM Form Script",
+        *GET_DATA_DEPENDENCIES.get(doctype, []),
+    ]
+    view = kwargs.get("view")
+    if isinstance(view, str):
+        view = frappe.parse_json(view or "{}")
+    if (view or {}).get("view_type") == "kanban":
+        # kanban cards carry the activity badge counts
+        doctypes += [source for source, _field, _filters in COUNT_SOURCES.values() if source != "Comment"]
+        # columns are the records of the doctype the column field links to
+        column_field = kwargs.get("column_field")
+        field = doctype and column_field and frappe.get_meta(doctype).get_field(column_field)
+        if field and field.fieldtype == "Link" and field.options:
+            doctypes.append(field.options)
+    return doctypes
+
+
+def _get_data_vary(kwargs):
+    # the late status of tasks is computed against the current time
+    if kwargs.get("doctype") == "CRM Task":
+        return frappe.utils.now_datetime().strftime("%Y-%m-%d %H:%M")
+
+
 @frappe.whitelist(allow_guest=True)
+@conditional_get(_get_data_doctypes, vary=_get_data_vary)
 def get_data(
     doctype=None,
     filters=None,
@@ -373,28 +414,6 @@ def get_data(
 
     # ---------- LIST / GROUP VIEW ----------
     if view_type != "kanban":
-        # تحديث المهام المتأخرة قبل قراءة البيانات (لـ CRM Task فقط)
-        if doctype == "CRM Task":
-            try:
-                from frappe.utils import now_datetime
-                current_dt = now_datetime()
-                # تحديث مباشر في قاعدة البيانات
-                frappe.db.sql(
-                    """
-                    UPDATE `tabCRM Task`
-                    SET status = 'late'
-                    WHERE due_date < %s
-                    AND status NOT IN ('Done', 'late')
-                    AND due_date IS NOT NULL
-                """,
-                    (current_dt,),
-                    as_dict=False,
-                )
-                frappe.db.commit()
-            except Exception as e:
-                frappe.log_error(f"Error updating overdue tasks in list view: {str(e)}")
-                pass
-
         if columns or rows:
             custom_view = True
             is_default = False
@@ -442,62 +461,21 @@ def get_data(
         if group_by_field and group_by_field not in rows:
             rows.append(group_by_field)
 
-        # لـ CRM Task: تحديث قاعدة البيانات أولاً ثم قراءة البيانات
-        if doctype == "CRM Task":
-            from frappe.utils import now_datetime
-            current_dt = now_datetime()
-            try:
-                frappe.db.sql(
-                    """
-                    UPDATE `tabCRM Task`
-                    SET status = 'late'
-                    WHERE due_date < %s
-                    AND status NOT IN ('Done', 'late')
-                    AND due_date IS NOT NULL
-                """,
-                    (current_dt,),
-                )
-                frappe.db.commit()
-                frappe.clear_cache(doctype="CRM Task")
-            except Exception as e:
-                frappe.log_error(f"Error updating overdue tasks: {str(e)}")
-
         data = (
             frappe.get_list(
                 doctype,
-                fields=rows,
+                fields=get_late_status_fields(doctype, rows),
                 filters=filters,
                 order_by=order_by,
                 page_length=page_length,
             )
             or []
         )
+        data = apply_late_status(doctype, data, rows)
         data = parse_list_data(data, doctype)
 
     # ---------- KANBAN VIEW ----------
     if view_type == "kanban":
-        # تحديث المهام المتأخرة قبل قراءة البيانات (لـ CRM Task فقط)
-        if doctype == "CRM Task":
-            try:
-                from frappe.utils import now_datetime
-                current_dt = now_datetime()
-                frappe.db.sql(
-                    """
-                    UPDATE `tabCRM Task`
-                    SET status = 'late'
-                    WHERE due_date < %s
-                    AND status NOT IN ('Done', 'late')
-                    AND due_date IS NOT NULL
-                """,
-                    (current_dt,),
-                    as_dict=False,
-                )
-                frappe.db.commit()
-                frappe.clear_cache(doctype="CRM Task")
-            except Exception as e:
-                frappe.log_error(f"Error updating overdue tasks in kanban view: {str(e)}")
-                pass
-
         if not rows:
             rows = default_rows
 
@@ -550,16 +528,17 @@ def get_data(
 
                 if order:
                     column_data = get_records_based_on_order(
-                        doctype, rows, column_filters, col_page_length, order
+                        doctype, get_late_status_fields(doctype, rows), column_filters, col_page_length, order
                     )
                 else:
                     column_data = frappe.get_list(
                         doctype,
-                        fields=rows,
+                        fields=get_late_status_fields(doctype, rows),
                         filters=column_filters,
                         order_by=order_by,
                         page_length=col_page_length,
                     )
+                column_data = apply_late_status(doctype, column_data, rows)
 
                 all_count = frappe.get_list(
                     doctype,
@@ -578,6 +557,9 @@ def get_data(
 
             data.append({"column": kc, "fields": kanban_fields, "data": column_data})
 
+        # activity badges of all cards, with one grouped query per source
+        add_counts(doctype, [row for column in data for row in column["data"]])
+
     # ---------- FIELD META ----------
     fields = frappe.get_meta(doctype).fields
     fields = [field for field in fields if field.fieldtype not in no_value_fields]
@@ -720,7 +702,15 @@ def get_records_based_on_order(doctype, rows, filters, page_length, order):
     return records
 
 
+def _get_fields_meta_doctypes(kwargs):
+    doctype = kwargs.get("doctype")
+    if not doctype:
+        return []
+    return [doctype] + [df.options for df in frappe.get_meta(doctype).get_table_fields()]
+
+
 @frappe.whitelist(allow_guest=True)
+@conditional_get(meta=_get_fields_meta_doctypes)
 def get_fields_meta(doctype, restricted_fieldtypes=None, as_array=False, only_required=False):
     not_allowed_fieldtypes = [
         "Tab Break",
@@ -1047,37 +1037,64 @@ def get_fields(doctype: str, allow_all_fieldtypes: bool = False):
     return _fields
 
 
-def getCounts(d, doctype):
-    d["_email_count"] = (
-        frappe.db.count(
-            "Communication",
-            filters={
-                "reference_doctype": doctype,
-                "reference_name": d.get("name"),
-                "communication_type": "Communication",
-            },
-        )
-        or 0
-    )
-    d["_email_count"] = d["_email_count"] + frappe.db.count(
+# Activity badge counts of a document: count key -> (source doctype, reference name field, extra filters)
+COUNT_SOURCES = {
+    "_email_count": (
         "Communication",
-        filters={
-            "reference_doctype": doctype,
-            "reference_name": d.get("name"),
-            "communication_type": "Automated Message",
-        },
-    )
-    d["_comment_count"] = frappe.db.count(
-        "Comment",
-        filters={"reference_doctype": doctype, "reference_name": d.get("name"), "comment_type": "Comment"},
-    )
-    d["_task_count"] = frappe.db.count(
-        "CRM Task", filters={"reference_doctype": doctype, "reference_docname": d.get("name")}
-    )
-    d["_note_count"] = frappe.db.count(
-        "FCRM Note", filters={"reference_doctype": doctype, "reference_docname": d.get("name")}
-    )
-    return d
+        "reference_name",
+        {"communication_type": ("in", ["Communication", "Automated Message"])},
+    ),
+    "_comment_count": ("Comment", "reference_name", {"comment_type": "Comment"}),
+    "_task_count": ("CRM Task", "reference_docname", {}),
+    "_note_count": ("FCRM Note", "reference_docname", {}),
+}
+
+
+def get_counts_map(doctype, names):
+    """
+    Email, comment, task and note counts of many documents, with one grouped query per source:
+    {name: {"_email_count": 0, "_comment_count": 0, "_task_count": 0, "_note_count": 0}}.
+    """
+    names = list(dict.fromkeys(name for name in names if name))
+    counts = {name: dict.fromkeys(COUNT_SOURCES, 0) for name in names}
+    if not names:
+        return counts
+
+    for key, (source, name_field, filters) in COUNT_SOURCES.items():
+        rows = frappe.get_all(
+            source,
+            filters={"reference_doctype": doctype, name_field: ("in", names), **filters},
+            fields=[f"{name_field} as reference", "count(*) as total"],
+            group_by=name_field,
+        )
+        for row in rows:
+            if row.reference in counts:
+                counts[row.reference][key] = row.total
+    return counts
+
+
+def add_counts(doctype, rows):
+    """Set the badge counts on list / kanban rows (dicts with a `name`)."""
+    counts = get_counts_map(doctype, [row.get("name") for row in rows])
+    for row in rows:
+        row.update(counts.get(row.get("name")) or dict.fromkeys(COUNT_SOURCES, 0))
+    return rows
+
+
+@frappe.whitelist()
+def get_counts(doctype, names):
+    """
+    Badge counts of the given list rows ({name: counts}), limited to the documents the user can read.
+    """
+    names = frappe.parse_json(names) if isinstance(names, str) else names
+    if not names:
+        return {}
+    readable = frappe.get_list(doctype, filters={"name": ("in", list(names))}, pluck="name", limit=len(names))
+    return get_counts_map(doctype, readable)
+
+
+def getCounts(d, doctype):
+    return add_counts(doctype, [d])[0]
 
 
 @frappe.whitelist(allow_guest=True)
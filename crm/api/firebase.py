@@ -1,8 +1,28 @@
-import frappe
-from typing import List, Optional
+import json
+import time
 
 import firebase_admin
+import frappe
 from firebase_admin import credentials, messaging
+from frappe.utils import cint
+
+# Redis list of pending Notification Log pushes, drained by `flush_push_queue`
+PUSH_QUEUE_KEY = "crm_fcm_push_queue"
+PUSH_FLUSH_JOB_ID = "crm_fcm_push_flush"
+# How long the flush job waits so that pushes created close together go out in one batch
+PUSH_BATCH_WINDOW = 0.3
+# FCM accepts at most 500 messages per batch request
+PUSH_BATCH_SIZE = 500
+PUSH_MAX_ATTEMPTS = 4
+PUSH_RETRY_BACKOFF = 0.5
+# Pushes that still fail after the in-flush retries are re-queued for the next flush, at most
+# PUSH_MAX_DELIVERIES times; then they are kept in a capped dead-letter list for inspection
+PUSH_MAX_DELIVERIES = 5
+PUSH_DEAD_LETTER_KEY = "crm_fcm_push_dead_letter"
+PUSH_DEAD_LETTER_SIZE = 10000
+
+DEAD_TOKEN_CODES = {"NOT_FOUND", "UNREGISTERED"}
+TRANSIENT_CODES = {"UNAVAILABLE", "INTERNAL", "DEADLINE_EXCEEDED", "RESOURCE_EXHAUSTED"}
 
 
 # -----------------------------
@@ -26,84 +46,179 @@ def _get_firebase_app():
 # Token helpers
 # -----------------------------
 
-def _get_user_tokens(user: str) -> List[str]:
+def _get_user_tokens(user: str) -> list[str]:
     """Get all active FCM tokens stored for this user."""
-    filters = {"user": user}
+    return _get_tokens_by_user([user]).get(user, [])
+
+
+def _get_tokens_by_user(users: list[str]) -> dict[str, list[str]]:
+    """Get active FCM tokens of several users in one query: {user: [token, ...]}."""
+    filters = {"user": ["in", list(users)]}
     # لو عندك حقل active استخدمه
-    if "active" in [d.fieldname for d in frappe.get_meta("User Device Token").fields]:
+    if _has_active_field():
         filters["active"] = 1
 
-    return frappe.get_all(
-        "User Device Token",
-        filters=filters,
-        pluck="fcm_token"
-    )
+    res: dict[str, list[str]] = {}
+    for row in frappe.get_all("User Device Token", filters=filters, fields=["user", "fcm_token"]):
+        if row.fcm_token:
+            res.setdefault(row.user, []).append(row.fcm_token)
+    return res
+
+
+def _has_active_field() -> bool:
+    return any(df.fieldname == "active" for df in frappe.get_meta("User Device Token").fields)
+
+
+# -----------------------------
+# FCM transports
+# -----------------------------
+
+class FirebaseTransport:
+    """Sends messages through the Firebase Admin SDK batch API (one HTTP call per chunk)."""
+
+    def send_each(self, messages: list[dict]) -> list[Exception | None]:
+        _get_firebase_app()  # ensure Firebase is initialized
+        response = messaging.send_each(
+            [
+                messaging.Message(
+                    notification=messaging.Notification(title=m["title"], body=m["body"]),
+                    data=m.get("data") or {},
+                    token=m["token"],
+                )
+                for m in messages
+            ]
+        )
+        return [None if r.success else r.exception for r in response.responses]
+
 
+class FakeFCMError(Exception):
+    def __init__(self, code: str, message: str = ""):
+        super().__init__(message or code)
+        self.code = code
 
-def _send_push_to_tokens(tokens: List[str], title: str, body: str, data: Optional[dict] = None):
+
+class FakeFCMTransport:
     """
-    Send push notification via Firebase Admin SDK (FCM v1) – one token at a time.
-    Handles invalid tokens by deactivating them.
+    Offline transport for tests: records every message and fails tokens on demand.
+
+    `failures` maps a token to the errors to raise for it, one per attempt, e.g.
+    {"dead-token": [FakeFCMError("NOT_FOUND")], "flaky": [FakeFCMError("UNAVAILABLE")]}
     """
-    if not tokens:
-        return {"sent": 0, "failed": 0, "errors": []}
 
-    _get_firebase_app()  # ensure Firebase is initialized
+    def __init__(self, failures: dict[str, list[Exception]] | None = None):
+        self.failures = {token: list(errors) for token, errors in (failures or {}).items()}
+        self.sent: list[dict] = []
+        self.batches: list[int] = []
 
-    data = data or {}
+    def send_each(self, messages: list[dict]) -> list[Exception | None]:
+        self.batches.append(len(messages))
+        results = []
+        for message in messages:
+            errors = self.failures.get(message["token"])
+            if errors:
+                results.append(errors.pop(0))
+            else:
+                self.sent.append(message)
+                results.append(None)
+        return results
+
+
+def _get_fcm_transport():
+    # الاختبارات بتحط FakeFCMTransport في frappe.flags.crm_fcm_transport
+    return frappe.flags.crm_fcm_transport or FirebaseTransport()
+
+
+# -----------------------------
+# Sending
+# -----------------------------
+
+def _is_dead_token_error(error: Exception) -> bool:
+    message = str(error)
+    return (
+        getattr(error, "code", None) in DEAD_TOKEN_CODES
+        or "registration token is not a valid FCM" in message
+        or "UNREGISTERED" in message
+        or "Requested entity was not found" in message
+        or "registration-token-not-registered" in message
+    )
+
+
+def _is_transient_error(error: Exception) -> bool:
+    return getattr(error, "code", None) in TRANSIENT_CODES
+
+
+def _send_messages(messages: list[dict]) -> dict:
+    """
+    Send messages in FCM batches of up to PUSH_BATCH_SIZE.
+    Transient failures are retried with exponential backoff; dead tokens are deactivated in bulk.
+    Messages that failed for any other reason are returned in `failed_messages`.
+    """
+    transport = _get_fcm_transport()
     sent = 0
-    failed = 0
     errors = []
-
-    for token in tokens:
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=title,
-                body=body,
-            ),
-            data=data,
-            token=token,
-        )
-        try:
-            messaging.send(message)
-            sent += 1
-        except Exception as e:
-            failed += 1
-            errors.append({"token": token, "error": str(e)})
-
-            # لو التوكن باظ نشيله أو نعمله inactive
-            if (
-                "registration token is not a valid FCM" in str(e)
-                or "UNREGISTERED" in str(e)
-                or "Requested entity was not found" in str(e)
-                or "registration-token-not-registered" in str(e)
-            ):
-                _deactivate_token(token)
+    failed_messages = []
+    dead_tokens = set()
+
+    pending = messages
+    for attempt in range(PUSH_MAX_ATTEMPTS):
+        retry = []
+        for i in range(0, len(pending), PUSH_BATCH_SIZE):
+            chunk = pending[i : i + PUSH_BATCH_SIZE]
+            for message, error in zip(chunk, transport.send_each(chunk), strict=True):
+                if error is None:
+                    sent += 1
+                elif _is_transient_error(error) and attempt < PUSH_MAX_ATTEMPTS - 1:
+                    retry.append(message)
+                else:
+                    errors.append({"token": message["token"], "error": str(error)})
+                    if _is_dead_token_error(error):
+                        dead_tokens.add(message["token"])
+                    else:
+                        failed_messages.append(message)
+
+        if not retry:
+            break
+        pending = retry
+        time.sleep(PUSH_RETRY_BACKOFF * (2**attempt))
+
+    # لو التوكن باظ نشيله أو نعمله inactive
+    _deactivate_tokens(list(dead_tokens))
 
     return {
         "sent": sent,
-        "failed": failed,
+        "failed": len(errors),
         "errors": errors,
+        "failed_messages": failed_messages,
     }
 
 
+def _send_push_to_tokens(tokens: list[str], title: str, body: str, data: dict | None = None):
+    """
+    Send push notification via Firebase Admin SDK (FCM v1) to all tokens in one batch.
+    Handles invalid tokens by deactivating them.
+    """
+    if not tokens:
+        return {"sent": 0, "failed": 0, "errors": []}
+
+    data = data or {}
+    return _send_messages([{"token": token, "title": title, "body": body, "data": data} for token in tokens])
+
+
 def _deactivate_token(token: str):
     """Mark token inactive or delete row when Firebase says it's invalid."""
-    meta = frappe.get_meta("User Device Token")
-    has_active = any(df.fieldname == "active" for df in meta.fields)
+    _deactivate_tokens([token])
 
-    rows = frappe.get_all(
-        "User Device Token",
-        filters={"fcm_token": token},
-        pluck="name"
-    )
-    for name in rows:
-        if has_active:
-            doc = frappe.get_doc("User Device Token", name)
-            doc.active = 0
-            doc.save(ignore_permissions=True)
-        else:
-            frappe.delete_doc("User Device Token", name, ignore_permissions=True)
+
+def _deactivate_tokens(tokens: list[str]):
+    """Mark tokens inactive (or delete their rows) with one statement."""
+    if not tokens:
+        return
+
+    filters = {"fcm_token": ["in", tokens]}
+    if _has_active_field():
+        frappe.db.set_value("User Device Token", filters, "active", 0, update_modified=False)
+    else:
+        frappe.db.delete("User Device Token", filters)
 
 
 # -----------------------------
@@ -112,10 +227,10 @@ def _deactivate_token(token: str):
 
 @frappe.whitelist(allow_guest=False, methods=["POST"])
 def save_fcm_token(
-    fcm_token: Optional[str] = None,
-    device_info: Optional[str] = None,
-    platform: Optional[str] = None,
-    app_version: Optional[str] = None,
+    fcm_token: str | None = None,
+    device_info: str | None = None,
+    platform: str | None = None,
+    app_version: str | None = None,
 ):
     """
     Called by Flutter after login to register / refresh device token.
@@ -170,7 +285,7 @@ def save_fcm_token(
 
 
 @frappe.whitelist(allow_guest=False, methods=["POST"])
-def unregister_fcm_token(fcm_token: Optional[str] = None):
+def unregister_fcm_token(fcm_token: str | None = None):
     """
     Optional: called by app on logout/uninstall to deactivate a specific token.
     """
@@ -189,7 +304,7 @@ def unregister_fcm_token(fcm_token: Optional[str] = None):
 
 @frappe.whitelist(methods=["POST", "GET"])
 def send_test_push(
-    user: Optional[str] = None,
+    user: str | None = None,
     title: str = "Test notification",
     body: str = "Hello from Frappe + Firebase v1"
 ):
@@ -220,16 +335,12 @@ def send_test_push(
 def send_push_for_notification_log(doc, method=None):
     """
     Doc event for Notification Log (after_insert).
-    Sends a push to the target user when a new Notification Log is created.
+    Queues a push to the target user; `flush_push_queue` sends it in the background.
     """
     target_user = getattr(doc, "for_user", None) or getattr(doc, "owner", None)
     if not target_user:
         return
 
-    tokens = _get_user_tokens(target_user)
-    if not tokens:
-        return
-
     # Title + body for push
     title = "New notification"
     body = (doc.subject or doc.email_content or "You have a new notification").strip()
@@ -242,7 +353,100 @@ def send_push_for_notification_log(doc, method=None):
         "type": doc.type or "",
     }
 
-    try:
-        _send_push_to_tokens(tokens, title, body, data=data)
-    except Exception:
-        frappe.log_error(frappe.get_traceback(), "Error sending FCM push from Notification Log")
+    item = {"user": target_user, "title": title, "body": body, "data": data}
+    if frappe.flags.in_test:
+        _queue_push(item)
+    else:
+        # nothing is queued if the transaction that created the log rolls back
+        frappe.db.after_commit.add(lambda: _queue_push(item))
+
+
+def _queue_push(item: dict):
+    frappe.cache().rpush(PUSH_QUEUE_KEY, json.dumps(item))
+    # one flush job at a time; it waits PUSH_BATCH_WINDOW so nearby notifications share a batch
+    frappe.enqueue(
+        "crm.api.firebase.flush_push_queue",
+        queue="short",
+        job_id=PUSH_FLUSH_JOB_ID,
+        deduplicate=True,
+        now=frappe.flags.in_test,
+        wait=0 if frappe.flags.in_test else PUSH_BATCH_WINDOW,
+    )
+
+
+def flush_push_queue(wait: float = 0):
+    """
+    Background job (and per-minute safety net, see `crm.reminder_runner.dispatch_due_items`):
+    send all queued Notification Log pushes.
+    Pushes that could not be sent are re-queued for the next flush, see `_requeue_pushes`.
+    """
+    if wait:
+        time.sleep(wait)
+
+    failed = []
+    while True:
+        items = []
+        while len(items) < PUSH_BATCH_SIZE:
+            raw = frappe.cache().lpop(PUSH_QUEUE_KEY)
+            if not raw:
+                break
+            items.append(json.loads(raw))
+        if not items:
+            break
+
+        try:
+            failed += _send_queued_pushes(items)
+        except Exception:
+            frappe.log_error(frappe.get_traceback(), "Error sending FCM push from Notification Log")
+            failed += items
+
+    # after the loop, so that this flush does not pop them again
+    _requeue_pushes(failed)
+
+
+def _send_queued_pushes(items: list[dict]) -> list[dict]:
+    """
+    Send queued pushes in one batch; return the pushes (restricted to their failed tokens)
+    that failed for another reason than a dead token.
+    """
+    lookup_users = {item["user"] for item in items if "tokens" not in item}
+    tokens_by_user = _get_tokens_by_user(lookup_users) if lookup_users else {}
+
+    messages, item_of_message = [], {}
+    for item in items:
+        for token in item.get("tokens") or tokens_by_user.get(item["user"], []):
+            message = {"token": token, "title": item["title"], "body": item["body"], "data": item["data"]}
+            messages.append(message)
+            item_of_message[id(message)] = item
+    if not messages:
+        return []
+
+    failed_tokens = {}
+    for message in _send_messages(messages)["failed_messages"]:
+        item = item_of_message[id(message)]
+        failed_tokens.setdefault(id(item), (item, []))[1].append(message["token"])
+    return [{**item, "tokens": tokens} for item, tokens in failed_tokens.values()]
+
+
+def _requeue_pushes(items: list[dict]):
+    """
+    Put failed pushes back on the queue for the next flush, or, after PUSH_MAX_DELIVERIES
+    flushes, on the dead-letter list (capped at PUSH_DEAD_LETTER_SIZE).
+    """
+    if not items:
+        return
+
+    dead = []
+    for item in items:
+        item = {**item, "attempts": cint(item.get("attempts")) + 1}
+        if item["attempts"] < PUSH_MAX_DELIVERIES:
+            frappe.cache().rpush(PUSH_QUEUE_KEY, json.dumps(item))
+        else:
+            frappe.cache().rpush(PUSH_DEAD_LETTER_KEY, json.dumps(item))
+            dead.append(item)
+
+    if dead:
+        frappe.cache().ltrim(PUSH_DEAD_LETTER_KEY, -PUSH_DEAD_LETTER_SIZE, -1)
+        frappe.log_error(
+            json.dumps(dead, indent=1), f"FCM push undeliverable after {PUSH_MAX_DELIVERIES} flushes"
+        )
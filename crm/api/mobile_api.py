@@ -6,11 +6,20 @@ Most endpoints require authentication via Frappe session or OAuth token.
 The `get_oauth_config` endpoint allows guest access for retrieving site-specific OAuth settings.
 """
 
+import base64
+import hashlib
+import json
+
 import frappe
 import os
 from frappe import _
+from frappe.model import table_fields
 from frappe.utils import today, getdate, nowdate, cint, strip_html, add_days
 from frappe.desk.form.assign_to import add as assign_task, remove as unassign_task
+from crm.fcrm.doctype.team.team import get_team_members, get_team_name, is_team_leader
+from crm.fcrm.permissions.leads_permissions import get_permission_query_conditions as get_lead_conditions
+from crm.api.notifications import get_unseen_count
+from crm.utils import etag_response, get_version_token, run_concurrently
 
 
 def _safe_fields(dt, want):
@@ -25,6 +34,138 @@ def _safe_fields(dt, want):
 	return [f for f in want if f in have]
 
 
+def _lead_permission_filters(user=None):
+	"""
+	Lead visibility (owner OR assigned to the user OR to a member of their team) as a
+	SQL condition for `frappe.get_all` filters, so the rule is evaluated by the database
+	(semi-join on CRM Lead Visibility) instead of shipping lead names back as IN lists.
+	Empty for System Managers.
+	"""
+	condition = get_lead_conditions(user or frappe.session.user)
+	return [condition] if condition else []
+
+
+def _assigned_to_condition(user):
+	"""
+	SQL condition for `frappe.get_all` filters: the lead has a non-cancelled ToDo allocated to `user`.
+	"""
+	return f"""exists (
+		select 1 from `tabToDo` td
+		where td.`reference_type` = 'CRM Lead'
+			and td.`reference_name` = `tabCRM Lead`.`name`
+			and td.`allocated_to` = {frappe.db.escape(user)}
+			and td.`status` != 'Cancelled'
+	)"""
+
+
+# Totals of cursor requests are cached per user + filter set while a client scrolls through
+MOBILE_COUNT_CACHE_TTL = 30
+
+# The composite home screen payload is cached per user for a short time, and keyed on the
+# version token of what it is built from, so a write shows up on the next launch
+HOME_CACHE_TTL = 30
+HOME_DOCTYPES = ("CRM Task", "CRM Lead", "ToDo", "Comment", "Notification Log", "CRM Notification", "Team")
+
+# Columns a cursor can order by; (column, name) is the keyset
+CURSOR_ORDER_COLUMNS = ("modified", "creation")
+
+
+def _count_rows(doctype, filters):
+	"""
+	Count rows of `doctype` matching `filters` (list filters or SQL conditions).
+	"""
+	return cint(frappe.get_all(doctype, filters=filters, fields=["count(*) as total"])[0].total)
+
+
+def _cached_count(doctype, filters):
+	"""
+	Same as `_count_rows`, cached for MOBILE_COUNT_CACHE_TTL seconds so that scrolling with a
+	cursor does not recount the whole list on every page. Only used in cursor mode: page-number
+	requests keep an exact total.
+	"""
+	key = "crm_mobile_count:" + hashlib.md5(
+		frappe.as_json([doctype, frappe.session.user, filters]).encode()
+	).hexdigest()
+	total = frappe.cache().get_value(key)
+	if total is None:
+		total = _count_rows(doctype, filters)
+		frappe.cache().set_value(key, total, expires_in_sec=MOBILE_COUNT_CACHE_TTL)
+	return cint(total)
+
+
+def _parse_cursor_order(order_by):
+	"""
+	(column, direction) of an `order_by` usable with cursors, e.g. "modified desc".
+	"""
+	parts = str(order_by or "").replace("`", "").split()
+	column = parts[0].split(".")[-1] if parts else ""
+	direction = parts[1].lower() if len(parts) > 1 else "asc"
+	if "," in str(order_by) or len(parts) > 2 or column not in CURSOR_ORDER_COLUMNS or direction not in ("asc", "desc"):
+		frappe.throw(
+			_("Cursor pagination can only order by {0}").format(", ".join(CURSOR_ORDER_COLUMNS)),
+			frappe.ValidationError,
+		)
+	return column, direction
+
+
+def _encode_cursor(row, column):
+	return base64.urlsafe_b64encode(json.dumps([str(row.get(column)), row.get("name")]).encode()).decode()
+
+
+def _decode_cursor(cursor):
+	try:
+		value, name = json.loads(base64.urlsafe_b64decode(str(cursor).encode()))
+	except Exception:
+		frappe.throw(_("Invalid cursor"), frappe.ValidationError)
+	return value, name
+
+
+def _keyset_page(doctype, filters, fields, order_by, cursor, limit):
+	"""
+	One page of a list in cursor mode.
+
+	Rows are ordered by (column, name) and the page starts right after the row encoded in
+	`cursor` (empty for the first page), so the database seeks on the index instead of
+	skipping an ever growing offset.
+
+	Returns:
+		(rows, next_cursor) - next_cursor is None on the last page
+	"""
+	column, direction = _parse_cursor_order(order_by)
+	filters = list(filters or [])
+	if cursor:
+		value, name = _decode_cursor(cursor)
+		op = "<" if direction == "desc" else ">"
+		col = f"`tab{doctype}`.`{column}`"
+		filters.append(
+			f"({col} {op} {frappe.db.escape(value)} or ({col} = {frappe.db.escape(value)}"
+			f" and `tab{doctype}`.`name` {op} {frappe.db.escape(name)}))"
+		)
+
+	fields = list(fields) + [f for f in (column, "name") if f not in fields]
+	rows = frappe.get_all(
+		doctype,
+		filters=filters,
+		fields=fields,
+		order_by=f"{column} {direction}, name {direction}",
+		limit_page_length=limit + 1,
+	)
+	next_cursor = _encode_cursor(rows[limit - 1], column) if len(rows) > limit else None
+	return rows[:limit], next_cursor
+
+
+def _cursor_response(data, limit, next_cursor, total=None):
+	return {
+		"message": {
+			"data": data,
+			"page_size": limit,
+			"total": total,
+			"next_cursor": next_cursor,
+			"has_next": bool(next_cursor),
+		}
+	}
+
+
 def _get_assigned_users(doctype, docname):
 	"""
 	Get all assigned users for a document with full user details.
@@ -99,6 +240,163 @@ def _get_assigned_users(doctype, docname):
 	return assigned_users
 
 
+def _get_user_details_map(user_emails):
+	"""
+	Get user details for many users in a single query.
+	
+	Args:
+		user_emails: Iterable of User names/emails
+		
+	Returns:
+		Dict mapping user name to user object with email, name, and profile_pic
+	"""
+	user_emails = list({email for email in user_emails if email})
+	if not user_emails:
+		return {}
+	
+	users = frappe.get_all(
+		"User",
+		filters={"name": ["in", user_emails]},
+		fields=["name", "email", "full_name", "user_image"]
+	)
+	
+	return {
+		user.name: {
+			"email": user.email or user.name,
+			"name": user.full_name or user.name,
+			"profile_pic": user.user_image or None,
+		}
+		for user in users
+	}
+
+
+def _get_assigned_users_map(doctype, docnames):
+	"""
+	Batched variant of `_get_assigned_users` for a whole page of documents.
+	Runs one ToDo query, one fallback query on the `assigned_to` field (if the
+	doctype has one) and one User query, regardless of the number of documents.
+	
+	Args:
+		doctype: Document type (e.g., "CRM Task")
+		docnames: Iterable of document names
+		
+	Returns:
+		Dict mapping docname to list of user objects with email, name, and profile_pic
+	"""
+	docnames = list({name for name in docnames if name})
+	if not docnames:
+		return {}
+	
+	todos = frappe.get_all(
+		"ToDo",
+		filters={
+			"reference_type": doctype,
+			"reference_name": ["in", docnames],
+			"status": "Open"
+		},
+		fields=["reference_name", "allocated_to"],
+		distinct=True
+	)
+	
+	emails_by_doc = {}
+	for todo in todos:
+		if todo.allocated_to:
+			emails = emails_by_doc.setdefault(todo.reference_name, [])
+			if todo.allocated_to not in emails:
+				emails.append(todo.allocated_to)
+	
+	# If no users found in ToDo, check the assigned_to field directly
+	unassigned = [name for name in docnames if name not in emails_by_doc]
+	if unassigned and frappe.get_meta(doctype).has_field("assigned_to"):
+		for row in frappe.get_all(
+			doctype,
+			filters={"name": ["in", unassigned]},
+			fields=["name", "assigned_to"]
+		):
+			if row.assigned_to:
+				emails_by_doc[row.name] = [row.assigned_to]
+	
+	users = _get_user_details_map(
+		email for emails in emails_by_doc.values() for email in emails
+	)
+	
+	return {
+		name: [users[email] for email in emails if email in users]
+		for name, emails in emails_by_doc.items()
+	}
+
+
+# Link fields expanded by the compact serializers:
+# (fieldname, target doctype, title fields in order of preference, dynamic doctype field)
+# When a dynamic doctype field is given, the link is only expanded for rows where
+# that field equals the target doctype.
+TASK_LINK_FIELDS = (
+	("lead", "CRM Lead", ("lead_name", "organization", "email"), None),
+	("reference_docname", "CRM Lead", ("lead_name", "organization", "email"), "reference_doctype"),
+	("project", "Real Estate Project", ("project_name",), None),
+	("unit", "Unit", ("unit_name",), None),
+	("project_unit", "Project Unit", ("unit_name",), None),
+)
+
+LEAD_LINK_FIELDS = (
+	("status", "CRM Lead Status", ("lead_status",), None),
+	("source", "CRM Lead Source", ("source_name",), None),
+	("industry", "CRM Industry", ("industry_name",), None),
+	("lead_owner", "User", ("full_name",), None),
+	("project", "Real Estate Project", ("project_name",), None),
+	("project_unit", "Project Unit", ("unit_name",), None),
+	("single_unit", "Unit", ("unit_name",), None),
+)
+
+
+def _expand_link_fields(results, link_fields):
+	"""
+	Replace link IDs with their display titles for a whole page of results.
+	Runs one query per target doctype. For every expanded field the original ID
+	is kept in `<fieldname>_id`; IDs that do not resolve are left untouched.
+	
+	Args:
+		results: List of serialized rows (dicts), updated in place
+		link_fields: Tuple of link field specs (see TASK_LINK_FIELDS)
+	"""
+	ids_by_doctype = {}
+	title_fields_by_doctype = {}
+	for fieldname, doctype, title_fields, doctype_field in link_fields:
+		title_fields_by_doctype.setdefault(doctype, [])
+		for title_field in title_fields:
+			if title_field not in title_fields_by_doctype[doctype]:
+				title_fields_by_doctype[doctype].append(title_field)
+		for result in results:
+			if doctype_field and result.get(doctype_field) != doctype:
+				continue
+			if result.get(fieldname):
+				ids_by_doctype.setdefault(doctype, set()).add(result[fieldname])
+	
+	titles_by_doctype = {}
+	for doctype, ids in ids_by_doctype.items():
+		titles_by_doctype[doctype] = {}
+		try:
+			fields = ["name"] + _safe_fields(doctype, title_fields_by_doctype[doctype])
+			for row in frappe.get_all(doctype, filters={"name": ["in", list(ids)]}, fields=fields):
+				titles_by_doctype[doctype][row.name] = row
+		except Exception:
+			# Leave IDs unexpanded if the target doctype can't be read
+			continue
+	
+	for fieldname, doctype, title_fields, doctype_field in link_fields:
+		titles = titles_by_doctype.get(doctype, {})
+		for result in results:
+			if doctype_field and result.get(doctype_field) != doctype:
+				continue
+			link_id = result.get(fieldname)
+			if not link_id:
+				continue
+			row = titles.get(link_id)
+			if row is not None:
+				result[fieldname] = next((row.get(f) for f in title_fields if row.get(f)), None) or link_id
+			result[f"{fieldname}_id"] = link_id
+
+
 def _ensure_user_from_mobile_data(email=None, name=None, profile_pic=None, user_id=None):
 	"""
 	Ensure a user exists from mobile app data.
@@ -165,9 +463,13 @@ def _ensure_user_from_mobile_data(email=None, name=None, profile_pic=None, user_
 			return email
 
 
-def get_compact_task(task, return_all_fields=False):
+# Fields of a full task that are always present, even when empty (documents and dict rows alike)
+TASK_ALWAYS_PRESENT_FIELDS = ("name", "modified", "creation", "owner", "modified_by", "description")
+
+
+def _serialize_task(task, return_all_fields=False):
 	"""
-	Return task representation.
+	Return task fields without link expansion or assignees.
 	Accepts both Document objects and dict-like objects (frappe._dict).
 	
 	Args:
@@ -190,7 +492,7 @@ def get_compact_task(task, return_all_fields=False):
 		if isinstance(task, dict):
 			# Dict-like object - copy all fields except internal ones
 			for key, value in task.items():
-				if key not in ['doctype'] and value is not None:
+				if key not in ['doctype'] and (value is not None or key in TASK_ALWAYS_PRESENT_FIELDS):
 					result[key] = value
 			# Clean HTML from description field if it exists
 			if 'description' in result and result['description']:
@@ -208,9 +510,7 @@ def get_compact_task(task, return_all_fields=False):
 				# Get field value
 				value = getattr(task, fieldname, None)
 				# Include field if it has a value or is a standard/important field
-				# Always include description even if empty (it's an important field)
-				important_fields = ['name', 'modified', 'creation', 'owner', 'modified_by', 'description']
-				if value is not None or fieldname in important_fields:
+				if value is not None or fieldname in TASK_ALWAYS_PRESENT_FIELDS:
 					result[fieldname] = value
 			# Ensure standard fields are included
 			result['name'] = task.name
@@ -242,90 +542,157 @@ def get_compact_task(task, return_all_fields=False):
 		if due_date is not None:
 			result["due_date"] = due_date
 	
+	return result
+
+
+def get_compact_tasks(tasks, return_all_fields=False):
+	"""
+	Return task representations for a whole page of tasks.
+	Assigned users and link titles (lead, project, unit, project unit) are
+	resolved with one query per target doctype instead of per row.
+	
+	Args:
+		tasks: List of task documents or dicts
+		return_all_fields: If True, return all available fields from task objects
+	"""
+	results = [_serialize_task(task, return_all_fields) for task in tasks]
+	if not results:
+		return results
+	
 	# Get assigned users with full details (always override assigned_to field)
 	try:
-		assigned_users = _get_assigned_users("CRM Task", task_name)
-		if assigned_users:
-			result["assigned_to"] = assigned_users
-		else:
-			# Fallback: check if assigned_to field exists (single user)
-			assigned_to = _get(task, "assigned_to")
-			if assigned_to:
-				# Try to get user details for single assigned user
-				try:
-					user = frappe.get_doc("User", assigned_to)
-					result["assigned_to"] = [{
-						"email": user.email or assigned_to,
-						"name": user.full_name or user.name,
-						"profile_pic": getattr(user, "user_image", None) or getattr(user, "photo", None) or None
-					}]
-				except Exception:
-					# If user doesn't exist or error, return empty array
-					result["assigned_to"] = []
-			else:
-				result["assigned_to"] = []
+		assigned_users = _get_assigned_users_map("CRM Task", [r.get("name") for r in results])
 	except Exception:
-		# Error getting assigned users, return empty array
-		result["assigned_to"] = []
+		# Error getting assigned users, return empty arrays
+		assigned_users = {}
+	for result in results:
+		result["assigned_to"] = assigned_users.get(result.get("name"), [])
 	
 	# Expand link fields to return names instead of IDs
-	# Lead field - return lead_name instead of ID
-	lead_id = _get(result, "lead")
-	if lead_id:
-		try:
-			lead_doc = frappe.get_doc("CRM Lead", lead_id)
-			lead_name = lead_doc.get("lead_name") or lead_doc.get("organization") or lead_doc.get("email") or lead_id
-			result["lead"] = lead_name
-			result["lead_id"] = lead_id
-		except Exception:
-			result["lead_id"] = lead_id
+	_expand_link_fields(results, TASK_LINK_FIELDS)
 	
-	# Reference DocName (Lead) - return lead name
-	reference_docname = _get(result, "reference_docname")
-	reference_doctype = _get(result, "reference_doctype")
-	if reference_docname and reference_doctype == "CRM Lead":
-		try:
-			lead_doc = frappe.get_doc("CRM Lead", reference_docname)
-			lead_name = lead_doc.get("lead_name") or lead_doc.get("organization") or lead_doc.get("email") or reference_docname
-			result["reference_docname"] = lead_name
-			result["reference_docname_id"] = reference_docname
-		except Exception:
-			result["reference_docname_id"] = reference_docname
+	return results
+
+
+def get_compact_task(task, return_all_fields=False):
+	"""
+	Return task representation.
+	Accepts both Document objects and dict-like objects (frappe._dict).
+	Use `get_compact_tasks` when serializing more than one task.
 	
-	# Project field - return project_name instead of ID
-	project_id = _get(result, "project")
-	if project_id:
-		try:
-			project_doc = frappe.get_doc("Real Estate Project", project_id)
-			project_name = project_doc.get("project_name") or project_id
-			result["project"] = project_name
-			result["project_id"] = project_id
-		except Exception:
-			result["project_id"] = project_id
+	Args:
+		task: Task document or dict
+		return_all_fields: If True, return all available fields from task object
+	"""
+	return get_compact_tasks([task], return_all_fields)[0]
+
+
+def _get_task_fields():
+	"""
+	Every value field of CRM Task (what `frappe.get_doc` would load, without child tables).
+	"""
+	meta = frappe.get_meta("CRM Task")
+	return ["name", "owner", "creation", "modified", "modified_by"] + [
+		f.fieldname for f in meta.fields
+		if f.fieldtype not in ["Tab Break", "Section Break", "Column Break", *table_fields]
+	]
+
+
+def _attach_task_child_rows(tasks):
+	"""
+	Load the child tables of CRM Task (e.g. meeting_attendees) for a whole page of
+	serialized tasks, one query per table, and attach them as `frappe.get_doc` would.
+	"""
+	task_names = [t.get("name") for t in tasks if t.get("name")]
+	if not task_names:
+		return tasks
 	
-	# Unit field - return unit_name instead of ID
-	unit_id = _get(result, "unit")
-	if unit_id:
-		try:
-			unit_doc = frappe.get_doc("Unit", unit_id)
-			unit_name = unit_doc.get("unit_name") or unit_doc.get("name") or unit_id
-			result["unit"] = unit_name
-			result["unit_id"] = unit_id
-		except Exception:
-			result["unit_id"] = unit_id
+	for df in frappe.get_meta("CRM Task").get_table_fields():
+		rows_by_task = {}
+		for row in frappe.get_all(
+			df.options,
+			filters=[
+				["parenttype", "=", "CRM Task"],
+				["parentfield", "=", df.fieldname],
+				["parent", "in", task_names]
+			],
+			fields=["*"],
+			order_by="parent, idx"
+		):
+			row["doctype"] = df.options
+			rows_by_task.setdefault(row.get("parent"), []).append(row)
+		for task in tasks:
+			task[df.fieldname] = rows_by_task.get(task.get("name"), [])
+	return tasks
+
+
+def _get_task_lists(queries):
+	"""
+	Serialized tasks (all fields) of several task lists, e.g. the home screen buckets.
+	Each list is one query; assignees and link titles of all lists are resolved together.
 	
-	# Project Unit field - return unit_name instead of ID
-	project_unit_id = _get(result, "project_unit")
-	if project_unit_id:
-		try:
-			project_unit_doc = frappe.get_doc("Project Unit", project_unit_id)
-			project_unit_name = project_unit_doc.get("unit_name") or project_unit_doc.get("name") or project_unit_id
-			result["project_unit"] = project_unit_name
-			result["project_unit_id"] = project_unit_id
-		except Exception:
-			result["project_unit_id"] = project_unit_id
+	Args:
+		queries: List of {"filters", "order_by", "limit"} dicts
 	
-	return result
+	Returns:
+		List of task lists, in the order of `queries`
+	"""
+	fields = _get_task_fields()
+	pages = [
+		frappe.get_all(
+			"CRM Task",
+			filters=query["filters"],
+			fields=fields,
+			order_by=query["order_by"],
+			page_length=query["limit"]
+		)
+		for query in queries
+	]
+	
+	tasks = _attach_task_child_rows(
+		get_compact_tasks([row for page in pages for row in page], return_all_fields=True)
+	)
+	
+	lists, start = [], 0
+	for page in pages:
+		lists.append(tasks[start : start + len(page)])
+		start += len(page)
+	return lists
+
+
+def _get_task_bucket_queries(today_limit, min_count):
+	"""
+	Queries of the home screen task lists: today, late and upcoming (by start_date).
+	"""
+	today_date = today()
+	tomorrow_date = add_days(today_date, 1)
+	
+	# Active statuses (not Done or Canceled)
+	active_statuses = ["Backlog", "Todo", "In Progress"]
+	
+	return [
+		{
+			"filters": [
+				["start_date", ">=", f"{today_date} 00:00:00"],
+				["start_date", "<", f"{tomorrow_date} 00:00:00"]
+			],
+			"order_by": "priority desc, modified desc, name desc",
+			"limit": today_limit,
+		},
+		{
+			"filters": [
+				["start_date", "<", f"{today_date} 00:00:00"],
+				["status", "in", active_statuses]
+			],
+			"order_by": "start_date asc, priority desc, name asc",
+			"limit": min_count,
+		},
+		{
+			"filters": [["start_date", ">=", f"{tomorrow_date} 00:00:00"]],
+			"order_by": "start_date asc, priority desc, name asc",
+			"limit": min_count,
+		},
+	]
 
 
 def _validate_host():
@@ -1349,7 +1716,7 @@ def filter_tasks(date_from=None, date_to=None, importance=None, status=None,
 	total = frappe.db.count("CRM Task", filters=filters)
 	
 	# Format tasks using compact helper
-	data = [get_compact_task(task) for task in tasks]
+	data = get_compact_tasks(tasks)
 	
 	# Calculate if there are more pages
 	has_next = (start + len(data)) < total
@@ -1373,7 +1740,7 @@ def get_all_tasks(page=1, limit=20, order_by="modified desc",
 				  due_date_from=None, due_date_to=None,
 				  status=None, assigned_to=None,
 				  reference_doctype=None, reference_docname=None,
-				  description=None, **kwargs):
+				  description=None, cursor=None, with_count=None, **kwargs):
 	"""
 	Get all CRM Tasks with pagination and filtering on all fields.
 	Returns all available fields for each task.
@@ -1396,6 +1763,9 @@ def get_all_tasks(page=1, limit=20, order_by="modified desc",
 		reference_doctype: Reference document type
 		reference_docname: Reference document name
 		description: Description text search (partial match)
+		cursor: Opaque cursor for keyset pagination ("" for the first page, then the
+			returned next_cursor). Replaces page; order_by must be "modified|creation asc|desc"
+		with_count: Also return the total in cursor mode (default: 0)
 	
 	Returns:
 		{
@@ -1409,6 +1779,7 @@ def get_all_tasks(page=1, limit=20, order_by="modified desc",
 				"has_previous": boolean
 			}
 		}
+		In cursor mode: {"message": {"data", "page_size", "total" (None unless with_count), "next_cursor", "has_next"}}
 	"""
 	# Get parameters from form_dict for GET requests
 	if hasattr(frappe, 'form_dict') and frappe.form_dict:
@@ -1428,6 +1799,8 @@ def get_all_tasks(page=1, limit=20, order_by="modified desc",
 		page = frappe.form_dict.get('page') if 'page' in frappe.form_dict else page
 		limit = frappe.form_dict.get('limit') if 'limit' in frappe.form_dict else limit
 		order_by = frappe.form_dict.get('order_by') if 'order_by' in frappe.form_dict else order_by
+		cursor = frappe.form_dict.get('cursor') if 'cursor' in frappe.form_dict else cursor
+		with_count = frappe.form_dict.get('with_count') if 'with_count' in frappe.form_dict else with_count
 	
 	page = cint(page) or 1
 	limit = cint(limit) or 20
@@ -1546,8 +1919,12 @@ def get_all_tasks(page=1, limit=20, order_by="modified desc",
 	if description:
 		filters.append(["description", "like", f"%{description}%"])
 	
-	# Get total count with filters
-	total = frappe.db.count("CRM Task", filters=filters if filters else None)
+	# Get total count with filters (optional and cached in cursor mode)
+	total = None
+	if cursor is None:
+		total = _count_rows("CRM Task", filters)
+	elif cint(with_count):
+		total = _cached_count("CRM Task", filters)
 	
 	# Get safe fields for CRM Task
 	base_fields = ["name", "title", "status", "priority", "start_date", "due_date", 
@@ -1557,17 +1934,20 @@ def get_all_tasks(page=1, limit=20, order_by="modified desc",
 	fields = _safe_fields("CRM Task", base_fields)
 	
 	# Get tasks with pagination
-	tasks = frappe.get_all(
-		"CRM Task",
-		filters=filters if filters else None,
-		fields=fields,
-		order_by=order_by,
-		limit_start=start,
-		limit_page_length=limit
-	)
+	if cursor is not None:
+		tasks, next_cursor = _keyset_page("CRM Task", filters, fields, order_by, cursor, limit)
+	else:
+		tasks = frappe.get_all(
+			"CRM Task",
+			filters=filters if filters else None,
+			fields=fields,
+			order_by=order_by,
+			limit_start=start,
+			limit_page_length=limit
+		)
 	
 	# Format tasks using compact helper
-	data = [get_compact_task(task, return_all_fields=True) for task in tasks]
+	data = get_compact_tasks(tasks, return_all_fields=True)
 	
 	# Add reminder_at to each task
 	if data:
@@ -1597,6 +1977,9 @@ def get_all_tasks(page=1, limit=20, order_by="modified desc",
 			for task in data:
 				task["reminder_at"] = None
 	
+	if cursor is not None:
+		return _cursor_response(data, limit, next_cursor, total)
+	
 	# Calculate pagination info
 	total_pages = (total + limit - 1) // limit if total > 0 else 0
 	has_next = (start + len(data)) < total
@@ -1625,36 +2008,16 @@ def home_tasks(limit=5):
 	Returns:
 		{"today": [tasks...], "limit": N}
 	"""
-	today_date = today()
-	tomorrow_date = add_days(today_date, 1)
+	limit = cint(limit) or 5
 	
-	# Get task names first (lightweight query)
+	# Today's tasks: one query with all fields, assignees and link titles batched
 	# NOTE: Using start_date (not due_date) to filter today's tasks
-	# start_date is Datetime field, so we need to use range filter
-	task_names = frappe.get_all(
-		"CRM Task",
-		filters=[
-			["start_date", ">=", f"{today_date} 00:00:00"],
-			["start_date", "<", f"{tomorrow_date} 00:00:00"]
-		],
-		fields=["name"],
-		order_by="priority desc, modified desc",
-		page_length=cint(limit) or 5
-	)
-	
-	# Get full task documents with all fields
-	data = []
-	for task_name_obj in task_names:
-		try:
-			task_doc = frappe.get_doc("CRM Task", task_name_obj.name)
-			data.append(get_compact_task(task_doc, return_all_fields=True))
-		except Exception:
-			# Skip tasks that can't be loaded (permissions, deleted, etc.)
-			continue
+	today_query = _get_task_bucket_queries(limit, limit)[0]
+	data = _get_task_lists([today_query])[0]
 	
 	return {
 		"today": data,
-		"limit": cint(limit) or 5
+		"limit": limit
 	}
 
 
@@ -1676,60 +2039,12 @@ def main_page_buckets(min_each=5):
 			"min_each": N
 		}
 	"""
-	today_date = today()
-	tomorrow_date = add_days(today_date, 1)
 	min_count = cint(min_each) or 5
 	
-	# Active statuses (not Done or Canceled)
-	active_statuses = ["Backlog", "Todo", "In Progress"]
-	
-	def get_tasks_with_all_fields(filters, order_by, page_length):
-		"""Helper to get task names first, then load full documents."""
-		task_names = frappe.get_all(
-			"CRM Task",
-			filters=filters,
-			fields=["name"],
-			order_by=order_by,
-			page_length=page_length
-		)
-		
-		tasks = []
-		for task_name_obj in task_names:
-			try:
-				task_doc = frappe.get_doc("CRM Task", task_name_obj.name)
-				tasks.append(get_compact_task(task_doc, return_all_fields=True))
-			except Exception:
-				# Skip tasks that can't be loaded (permissions, deleted, etc.)
-				continue
-		return tasks
-	
-	# Today's tasks - using start_date (not due_date)
-	# start_date is Datetime field, so we need to use range filter
-	today_tasks = get_tasks_with_all_fields(
-		filters=[
-			["start_date", ">=", f"{today_date} 00:00:00"],
-			["start_date", "<", f"{tomorrow_date} 00:00:00"]
-		],
-		order_by="priority desc, modified desc",
-		page_length=min_count
-	)
-	
-	# Late tasks (before today and still active) - using start_date (not due_date)
-	late_tasks = get_tasks_with_all_fields(
-		filters=[
-			["start_date", "<", f"{today_date} 00:00:00"],
-			["status", "in", active_statuses]
-		],
-		order_by="start_date asc, priority desc",
-		page_length=min_count
-	)
-	
-	# Upcoming tasks (after today) - using start_date (not due_date)
-	upcoming_tasks = get_tasks_with_all_fields(
-		filters=[["start_date", ">=", f"{tomorrow_date} 00:00:00"]],
-		order_by="start_date asc, priority desc",
-		page_length=min_count
-	)
+	# One query per bucket with all fields; assignees and link titles of all
+	# buckets are resolved together
+	# NOTE: Buckets use start_date (not due_date)
+	today_tasks, late_tasks, upcoming_tasks = _get_task_lists(_get_task_bucket_queries(min_count, min_count))
 	
 	return {
 		"today": today_tasks,
@@ -2051,15 +2366,7 @@ def get_my_team_members():
 			"message": "Guest users cannot be Team Leaders"
 		}
 	
-	# Find Team where current user is team_leader
-	teams = frappe.get_all(
-		"Team",
-		filters={"team_leader": user},
-		fields=["name", "team_leader"],
-		limit=1
-	)
-	
-	if not teams:
+	if not is_team_leader(user):
 		return {
 			"team_leader": user,
 			"team_name": None,
@@ -2068,49 +2375,30 @@ def get_my_team_members():
 			"message": "User is not a Team Leader"
 		}
 	
-	team = teams[0]
-	team_name = team.name
+	team_name = get_team_name(user)
 	
-	# Get team members from Member child table
-	members = frappe.get_all(
-		"Member",
-		filters={
-			"parent": team_name,
-			"parenttype": "Team"
-		},
-		fields=["member"],
-		order_by="member asc"
-	)
+	# Get user details of all members with one query (order of the team kept)
+	members = get_team_members(user)
+	users = {
+		row.name: row
+		for row in frappe.get_all(
+			"User",
+			filters={"name": ["in", members]},
+			fields=["name", "email", "full_name", "user_image"]
+		)
+	} if members else {}
 	
-	# Get user details for each member
 	member_list = []
-	for member_row in members:
-		member_email = member_row.get("member")
-		if not member_email:
-			continue
-		
-		try:
-			user_doc = frappe.get_doc("User", member_email)
-			member_data = {
-				"email": user_doc.email or member_email,
-				"name": user_doc.full_name or user_doc.name,
-			}
-			
-			# Get profile picture if available
-			if hasattr(user_doc, "user_image") and user_doc.user_image:
-				member_data["profile_pic"] = user_doc.user_image
-			elif hasattr(user_doc, "photo") and user_doc.photo:
-				member_data["profile_pic"] = user_doc.photo
-			else:
-				member_data["profile_pic"] = None
-			
-			member_list.append(member_data)
-		except frappe.DoesNotExistError:
+	for member_email in members:
+		row = users.get(member_email)
+		if not row:
 			# User doesn't exist, skip
 			continue
-		except Exception:
-			# Error fetching user, skip
-			continue
+		member_list.append({
+			"email": row.email or member_email,
+			"name": row.full_name or row.name,
+			"profile_pic": row.user_image or None,
+		})
 	
 	return {
 		"team_leader": user,
@@ -2120,9 +2408,9 @@ def get_my_team_members():
 	}
 
 
-def get_compact_lead(lead, return_all_fields=False):
+def _serialize_lead(lead, return_all_fields=False):
 	"""
-	Return lead representation.
+	Return lead fields without link expansion or assignees.
 	Accepts both Document objects and dict-like objects (frappe._dict).
 	
 	Args:
@@ -2199,93 +2487,272 @@ def get_compact_lead(lead, return_all_fields=False):
 		if organization is not None:
 			result["organization"] = organization
 	
+	return result
+
+
+def get_compact_leads(leads, return_all_fields=False, include_assigned=True):
+	"""
+	Return lead representations for a whole page of leads.
+	Link titles (status, source, industry, owner, project, units) and assigned
+	users are resolved with one query per target doctype instead of per row.
+	
+	Args:
+		leads: List of lead documents or dicts
+		return_all_fields: If True, return all available fields from lead objects
+		include_assigned: If False, skip the `assigned_to` lookup
+	"""
+	results = [_serialize_lead(lead, return_all_fields) for lead in leads]
+	if not results:
+		return results
+	
 	# Expand link fields to return names instead of IDs
-	# Status field - return status name
-	status_id = _get(result, "status")
-	if status_id:
-		try:
-			status_doc = frappe.get_doc("CRM Lead Status", status_id)
-			result["status"] = status_doc.get("lead_status") or status_id
-			result["status_id"] = status_id
-		except Exception:
-			result["status_id"] = status_id
+	_expand_link_fields(results, LEAD_LINK_FIELDS)
 	
-	# Source field - return source name
-	source_id = _get(result, "source")
-	if source_id:
-		try:
-			source_doc = frappe.get_doc("CRM Lead Source", source_id)
-			result["source"] = source_doc.get("source_name") or source_id
-			result["source_id"] = source_id
-		except Exception:
-			result["source_id"] = source_id
+	if not include_assigned:
+		return results
 	
-	# Industry field - return industry name
-	industry_id = _get(result, "industry")
-	if industry_id:
-		try:
-			industry_doc = frappe.get_doc("CRM Industry", industry_id)
-			result["industry"] = industry_doc.get("industry_name") or industry_id
-			result["industry_id"] = industry_id
-		except Exception:
-			result["industry_id"] = industry_id
+	# Get assigned users from ToDo records only (ignore assigned_to field)
+	# This matches what's shown in the left sidebar in Frappe UI
+	try:
+		assigned_users = _get_assigned_users_map("CRM Lead", [r.get("name") for r in results])
+	except Exception:
+		# Error getting assigned users, return empty arrays
+		assigned_users = {}
+	for result in results:
+		result["assigned_to"] = assigned_users.get(result.get("name"), [])
 	
-	# Lead Owner field - return user full name
-	lead_owner_id = _get(result, "lead_owner")
-	if lead_owner_id:
-		try:
-			user_doc = frappe.get_doc("User", lead_owner_id)
-			result["lead_owner"] = user_doc.get("full_name") or user_doc.get("name") or lead_owner_id
-			result["lead_owner_id"] = lead_owner_id
-		except Exception:
-			result["lead_owner_id"] = lead_owner_id
+	return results
+
+
+def get_compact_lead(lead, return_all_fields=False):
+	"""
+	Return lead representation.
+	Accepts both Document objects and dict-like objects (frappe._dict).
+	Use `get_compact_leads` when serializing more than one lead.
 	
-	# Project field - return project_name instead of ID
-	project_id = _get(result, "project")
-	if project_id:
-		try:
-			project_doc = frappe.get_doc("Real Estate Project", project_id)
-			project_name = project_doc.get("project_name") or project_id
-			result["project"] = project_name
-			result["project_id"] = project_id
-		except Exception:
-			result["project_id"] = project_id
+	Args:
+		lead: Lead document or dict
+		return_all_fields: If True, return all available fields from lead object
+	"""
+	return get_compact_leads([lead], return_all_fields)[0]
+
+
+# Related data that can be attached to a lead payload (`include=`)
+LEAD_INCLUDES = (
+	"assigned_to",
+	"last_comment",
+	"comments",
+	"duplicate_leads",
+	"status_change_log",
+	"property_preference_details",
+	"products",
+)
+
+# Default projection of each screen (`profile=`); "*" means every field / include
+LEAD_PROFILES = {
+	"list": {
+		"fields": (
+			"name", "lead_name", "first_name", "last_name", "organization", "email",
+			"mobile_no", "phone", "status", "source", "project", "lead_owner",
+			"assigned_date", "delayed", "converted", "creation", "modified",
+		),
+		"include": ("assigned_to", "last_comment"),
+	},
+	"detail": {"fields": "*", "include": "*"},
+}
+LEAD_PROFILES["home"] = LEAD_PROFILES["list"]
+LEAD_PROFILES["full"] = LEAD_PROFILES["detail"]
+
+LEAD_COMMENT_FIELDS = [
+	"name", "reference_name", "reference_doctype", "reference_owner",
+	"comment_type", "comment_email", "comment_by", "subject",
+	"content", "creation", "modified", "published", "seen",
+	"delayed", "ip_address",
+]
+
+# include -> (child doctype, fields); `parent` and `doctype` are dropped from the rows
+# (`from` / `to` are reserved words and have to be quoted)
+LEAD_CHILD_TABLES = {
+	"duplicate_leads": ("Duplicate Lead Entry", ["parent", "name", "lead", "created_on", "note", "source"]),
+	"status_change_log": (
+		"CRM Status Change Log",
+		["parent", "name", "`from`", "`to`", "from_date", "to_date", "duration", "log_owner"],
+	),
+	"property_preference_details": ("Property Preference", ["parent", "name", "*"]),
+	"products": ("CRM Products", ["parent", "name", "*"]),
+}
+
+
+def _parse_projection(value):
+	"""
+	A `fields` / `include` argument (JSON list, comma-separated string or list) as a list.
+	"*" is returned as is, None when the argument was not passed.
+	"""
+	if value is None:
+		return None
+	if isinstance(value, str):
+		value = value.strip()
+		if value == "*":
+			return "*"
+		value = json.loads(value) if value.startswith("[") else value.split(",")
+	return [str(v).strip() for v in value if v and str(v).strip()]
+
+
+def _get_lead_projection(fields=None, include=None, profile=None, default_profile="list"):
+	"""
+	Fieldnames to query and related data to attach for a lead payload.
+	`fields` and `include` override the defaults of `profile` (list, home, detail or full).
 	
-	# Project Unit field - return unit_name instead of ID
-	project_unit_id = _get(result, "project_unit")
-	if project_unit_id:
-		try:
-			project_unit_doc = frappe.get_doc("Project Unit", project_unit_id)
-			project_unit_name = project_unit_doc.get("unit_name") or project_unit_doc.get("name") or project_unit_id
-			result["project_unit"] = project_unit_name
-			result["project_unit_id"] = project_unit_id
-		except Exception:
-			result["project_unit_id"] = project_unit_id
+	Returns:
+		(fieldnames, includes) - fieldnames always starts with "name"
+	"""
+	defaults = LEAD_PROFILES.get(profile or default_profile) or LEAD_PROFILES[default_profile]
 	
-	# Single Unit field - return unit_name instead of ID
-	single_unit_id = _get(result, "single_unit")
-	if single_unit_id:
-		try:
-			unit_doc = frappe.get_doc("Unit", single_unit_id)
-			unit_name = unit_doc.get("unit_name") or unit_doc.get("name") or single_unit_id
-			result["single_unit"] = unit_name
-			result["single_unit_id"] = single_unit_id
-		except Exception:
-			result["single_unit_id"] = single_unit_id
+	meta = frappe.get_meta("CRM Lead")
+	all_fieldnames = ["name", "owner", "creation", "modified", "modified_by"] + [
+		f.fieldname for f in meta.fields
+		if f.fieldtype not in ["Tab Break", "Section Break", "Column Break", "Table"]
+	]
 	
-	# Get assigned users from ToDo records only (ignore assigned_to field)
-	# This matches what's shown in the left sidebar in Frappe UI
+	fieldnames = _parse_projection(fields) or defaults["fields"]
+	if fieldnames == "*":
+		fieldnames = all_fieldnames
+	else:
+		fieldnames = ["name"] + [f for f in fieldnames if f in all_fieldnames and f != "name"]
+	
+	includes = _parse_projection(include)
+	if includes is None:
+		includes = defaults["include"]
+	includes = set(LEAD_INCLUDES) if includes == "*" else set(includes) & set(LEAD_INCLUDES)
+	
+	return fieldnames, includes
+
+
+def _fetch_lead_comments(lead_names, latest_only=False):
+	"""
+	Comments of the given leads, newest first: {lead: [comment, ...]}.
+	With `latest_only` a window query returns just the newest comment of each lead.
+	"""
+	if latest_only:
+		columns = ", ".join(f"c.`{f}`" for f in LEAD_COMMENT_FIELDS)
+		comments = frappe.db.sql(
+			f"""
+			select {", ".join(f"t.`{f}`" for f in LEAD_COMMENT_FIELDS)}
+			from (
+				select {columns},
+					row_number() over (partition by c.`reference_name` order by c.`creation` desc) as rn
+				from `tabComment` c
+				where c.`reference_doctype` = 'CRM Lead'
+					and c.`reference_name` in %(leads)s
+					and c.`comment_type` = 'Comment'
+			) t
+			where t.rn = 1
+			""",
+			{"leads": tuple(lead_names)},
+			as_dict=True,
+		)
+	else:
+		comments = frappe.get_all(
+			"Comment",
+			filters=[
+				["reference_doctype", "=", "CRM Lead"],
+				["reference_name", "in", lead_names],
+				["comment_type", "=", "Comment"]
+			],
+			fields=LEAD_COMMENT_FIELDS,
+			order_by="creation desc"
+		)
+	
+	comments_by_lead = {}
+	for comment in comments:
+		comments_by_lead.setdefault(comment.reference_name, []).append(dict(comment))
+	return comments_by_lead
+
+
+def _fetch_lead_child_rows(key, lead_names):
+	"""
+	Rows of the child table `key` (see LEAD_CHILD_TABLES) of the given leads: {lead: [row, ...]}.
+	"""
+	doctype, fields = LEAD_CHILD_TABLES[key]
+	rows_by_lead = {}
+	for row in frappe.get_all(
+		doctype,
+		filters=[["parenttype", "=", "CRM Lead"], ["parent", "in", lead_names]],
+		fields=fields,
+		order_by="parent, idx"
+	):
+		rows_by_lead.setdefault(row.get("parent"), []).append(
+			{k: v for k, v in row.items() if k not in ["parent", "doctype"]}
+		)
+	return rows_by_lead
+
+
+def _guarded_fetch(fn, *args):
+	"""
+	Run a fetcher, returning (result, error) so that one failing fetch does not drop the others.
+	"""
 	try:
-		if lead_name:  # Only get assigned users if lead_name is not None
-			assigned_users = _get_assigned_users("CRM Lead", lead_name)
-			result["assigned_to"] = assigned_users if assigned_users else []
-		else:
-			result["assigned_to"] = []
-	except Exception:
-		# Error getting assigned users, return empty array
-		result["assigned_to"] = []
+		return fn(*args), None
+	except Exception as e:
+		return {}, e
+
+
+def enrich_leads(data, includes, error_title="lead_enrichment_error", concurrent=None):
+	"""
+	Attach the requested related data (comments, last_comment and the child tables of
+	LEAD_CHILD_TABLES) to a page of serialized leads, in place.
 	
-	return result
+	Runs at most one batched query per include, however many leads are on the page.
+	The fetches are independent, so with `concurrent` (default: site config
+	`crm_mobile_concurrent_enrichment`) they run on worker threads, see `crm.utils.run_concurrently`.
+	A failing fetch is logged and its data left empty.
+	
+	Args:
+		data: List of serialized leads (dicts with `name`)
+		includes: Set of LEAD_INCLUDES to attach (assigned_to is handled by get_compact_leads)
+		error_title: Title of the Error Log entries of failed fetches
+		concurrent: Run the fetches on worker threads
+	"""
+	lead_names = [lead.get("name") for lead in data if lead.get("name")]
+	wanted_comments = includes & {"comments", "last_comment"}
+	
+	fetches = []
+	if wanted_comments:
+		fetches.append(("comments", _fetch_lead_comments, (lead_names, "comments" not in wanted_comments)))
+	for key in LEAD_CHILD_TABLES:
+		if key in includes:
+			fetches.append((key, _fetch_lead_child_rows, (key, lead_names)))
+	if not data or not fetches:
+		return data
+	
+	calls = [(_guarded_fetch, (fn, *args)) for _key, fn, args in fetches] if lead_names else []
+	if concurrent is None:
+		concurrent = cint(frappe.conf.get("crm_mobile_concurrent_enrichment"))
+	if not calls:
+		results = [({}, None)] * len(fetches)
+	elif concurrent:
+		results = run_concurrently(calls)
+	else:
+		results = [fn(*args) for fn, args in calls]
+	
+	fetched = {}
+	for (key, _fn, _args), (result, error) in zip(fetches, results):
+		if error:
+			frappe.log_error(f"Error fetching {key}: {str(error)}", error_title)
+		fetched[key] = result
+	
+	for lead in data:
+		lead_name = lead.get("name")
+		if wanted_comments:
+			comments = fetched["comments"].get(lead_name, [])
+			if "last_comment" in wanted_comments:
+				lead["last_comment"] = comments[0] if comments else None
+			if "comments" in wanted_comments:
+				lead["comments"] = comments
+		for key in LEAD_CHILD_TABLES:
+			if key in fetched:
+				lead[key] = fetched[key].get(lead_name, [])
+	return data
 
 
 @frappe.whitelist()
@@ -3017,10 +3484,12 @@ def get_all_leads(page=1, limit=20, order_by="modified desc",
 				  budget_from=None, budget_to=None,
 				  space_from=None, space_to=None,
 				  best_time_contacte_from=None, best_time_contacte_to=None,
+				  cursor=None, with_count=None,
+				  fields=None, include=None, profile=None,
 				  **kwargs):
 	"""
 	Get all CRM Leads with pagination and filtering on all fields.
-	Returns all available fields for each lead.
+	Returns the fields / related data of the requested profile (see `fields`, `include`).
 	
 	Args:
 		page: Page number (1-based, default: 1)
@@ -3061,6 +3530,14 @@ def get_all_leads(page=1, limit=20, order_by="modified desc",
 		space_to: Space filter to (maximum value in square meters)
 		best_time_contacte_from: Best time to contact filter from (HH:MM:SS format, hours only)
 		best_time_contacte_to: Best time to contact filter to (HH:MM:SS format, hours only)
+		cursor: Opaque cursor for keyset pagination ("" for the first page, then the
+			returned next_cursor). Replaces page; order_by must be "modified|creation asc|desc"
+		with_count: Also return the total in cursor mode (default: 0)
+		fields: Lead fields to return (comma-separated or JSON list, "*" for all)
+		include: Related data to attach (comma-separated or JSON list, "*" for all):
+			assigned_to, last_comment, comments, duplicate_leads, status_change_log,
+			property_preference_details, products
+		profile: Default fields/include of a screen: list (default), detail / full (every field and include)
 	
 	Returns:
 		{
@@ -3074,6 +3551,7 @@ def get_all_leads(page=1, limit=20, order_by="modified desc",
 				"has_previous": boolean
 			}
 		}
+		In cursor mode: {"message": {"data", "page_size", "total" (None unless with_count), "next_cursor", "has_next"}}
 	"""
 	# Get parameters from form_dict for GET requests
 	if hasattr(frappe, 'form_dict') and frappe.form_dict:
@@ -3114,6 +3592,11 @@ def get_all_leads(page=1, limit=20, order_by="modified desc",
 		page = frappe.form_dict.get('page') if 'page' in frappe.form_dict else page
 		limit = frappe.form_dict.get('limit') if 'limit' in frappe.form_dict else limit
 		order_by = frappe.form_dict.get('order_by') if 'order_by' in frappe.form_dict else order_by
+		cursor = frappe.form_dict.get('cursor') if 'cursor' in frappe.form_dict else cursor
+		with_count = frappe.form_dict.get('with_count') if 'with_count' in frappe.form_dict else with_count
+		fields = frappe.form_dict.get('fields') if 'fields' in frappe.form_dict else fields
+		include = frappe.form_dict.get('include') if 'include' in frappe.form_dict else include
+		profile = frappe.form_dict.get('profile') if 'profile' in frappe.form_dict else profile
 	
 	page = cint(page) or 1
 	limit = cint(limit) or 20
@@ -3191,9 +3674,11 @@ def get_all_leads(page=1, limit=20, order_by="modified desc",
 			filters.append(["lead_owner", "=", lead_owner])
 	
 	if assigned_to and str(assigned_to).strip():
-		# For assigned_to, we need to check ToDo records
-		# This will be handled after getting leads
-		pass
+		# Leads with a (non-cancelled) ToDo for the user, as a semi-join so the
+		# count and the page are filtered by the database before pagination
+		assigned_to = str(assigned_to).strip()
+		user = frappe.db.get_value("User", {"email": assigned_to}, "name") or assigned_to
+		filters.append(_assigned_to_condition(user))
 	
 	# Project filters (support names or IDs)
 	if project and str(project).strip():
@@ -3366,330 +3851,41 @@ def get_all_leads(page=1, limit=20, order_by="modified desc",
 		if len(time_to) == 8 and time_to.count(":") == 2:
 			filters.append(["best_time_contacte", "<=", time_to])
 	
-	# Helper function to get member user column
-	def _get_member_user_col():
-		try:
-			meta = frappe.get_meta("Member", cached=True)
-			for f in meta.get("fields", []):
-				if getattr(f, "fieldtype", None) == "Link" and getattr(f, "options", None) == "User":
-					return "Member", f.fieldname
-			for alt in ("user", "member", "user_id", "user_email", "allocated_to"):
-				if meta.get_field(alt):
-					return "Member", alt
-		except Exception:
-			pass
-		return "Member", "user"
-	
 	# Apply user-based permission filtering
 	# Each user should only see leads they own, assigned to them, or assigned to their team
-	current_user = frappe.session.user
-	if current_user and current_user != "Guest":
-		user_roles = set(frappe.get_roles(current_user))
-		
-		# System Manager can see all leads (no additional filtering)
-		if "System Manager" not in user_roles:
-			# Build permission filters: owner OR assigned_to OR assigned_to_team
-			permission_filters = []
-			
-			# 1. Owner filter
-			permission_filters.append(["owner", "=", current_user])
-			
-			# 2. Assigned to current user (via ToDo)
-			# Get all leads assigned to current user
-			assigned_leads = frappe.get_all(
-				"ToDo",
-				filters=[
-					["reference_type", "=", "CRM Lead"],
-					["allocated_to", "=", current_user],
-					["status", "=", "Open"]
-				],
-				fields=["reference_name"],
-				pluck="reference_name"
-			)
-			
-			# 3. Assigned to team members (if user is Team Leader)
-			# Get team members
-			member_dt, member_col = _get_member_user_col()
-			team_members = frappe.db.sql_list(
-				f"""
-				SELECT DISTINCT m.`{member_col}`
-				FROM `tab{member_dt}` m
-				JOIN `tabTeam` t ON m.`parent` = t.`name`
-				WHERE t.`team_leader` = %s
-				""",
-				(current_user,),
-			) or []
-			
-			# Get leads assigned to team members
-			team_assigned_leads = []
-			if team_members:
-				team_assigned_leads = frappe.get_all(
-					"ToDo",
-					filters=[
-						["reference_type", "=", "CRM Lead"],
-						["allocated_to", "in", team_members],
-						["status", "=", "Open"]
-					],
-					fields=["reference_name"],
-					pluck="reference_name"
-				)
-			
-			# Combine all allowed lead names (assigned + team)
-			allowed_lead_names = set(assigned_leads + team_assigned_leads)
-			
-			# Build permission filter: owner = current_user OR name in allowed_leads
-			# We'll use a more efficient approach by getting owned leads and combining
-			if allowed_lead_names:
-				# Get owned leads and combine with assigned/team leads
-				owned_leads = frappe.get_all(
-					"CRM Lead",
-					filters=[["owner", "=", current_user]],
-					fields=["name"],
-					pluck="name"
-				)
-				# Combine all allowed lead names
-				allowed_lead_names.update(owned_leads)
-				
-				# Add filter to only include allowed leads
-				# This efficiently combines owner + assigned + team in one filter
-				filters.append(["name", "in", list(allowed_lead_names)])
-			else:
-				# No assigned/team leads, only show owned leads
-				filters.append(["owner", "=", current_user])
-	
-	# Get total count with filters
-	total = frappe.db.count("CRM Lead", filters=filters if filters else None)
-	
-	# Get all fields from CRM Lead doctype (use "*" to get all fields automatically)
-	# This ensures all fields including custom fields are returned
-	meta = frappe.get_meta("CRM Lead")
-	all_fieldnames = [f.fieldname for f in meta.fields 
-	                  if f.fieldtype not in ['Tab Break', 'Section Break', 'Column Break', 'Table']]
+	filters.extend(_lead_permission_filters())
 	
-	# Ensure 'name' field is always included (it's a system field)
-	if 'name' not in all_fieldnames:
-		all_fieldnames.insert(0, 'name')
+	# Get total count with filters (optional and cached in cursor mode)
+	total = None
+	if cursor is None:
+		total = _count_rows("CRM Lead", filters)
+	elif cint(with_count):
+		total = _cached_count("CRM Lead", filters)
 	
-	# Use _safe_fields to filter out any problematic fields
-	fields = _safe_fields("CRM Lead", all_fieldnames)
+	# Fields to query and related data to attach (defaults: "list" profile)
+	fields, includes = _get_lead_projection(fields, include, profile, default_profile="list")
 	
 	# Get leads with pagination (same approach as get_all_tasks)
-	leads = frappe.get_all(
-		"CRM Lead",
-		filters=filters if filters else None,
-		fields=fields,
-		order_by=order_by,
-		limit_start=start,
-		limit_page_length=limit
-	)
+	if cursor is not None:
+		leads, next_cursor = _keyset_page("CRM Lead", filters, fields, order_by, cursor, limit)
+	else:
+		leads = frappe.get_all(
+			"CRM Lead",
+			filters=filters if filters else None,
+			fields=fields,
+			order_by=order_by,
+			limit_start=start,
+			limit_page_length=limit
+		)
 	
 	# Format leads using compact helper
-	data = [get_compact_lead(lead, return_all_fields=True) for lead in leads]
+	data = get_compact_leads(leads, return_all_fields=True, include_assigned="assigned_to" in includes)
 	
-	# Filter by assigned_to if specified (check ToDo records)
-	if assigned_to and str(assigned_to).strip():
-		try:
-			# Resolve user email/name to user ID
-			user = frappe.db.get_value("User", {"email": assigned_to}, "name") or frappe.db.get_value("User", assigned_to, "name")
-			if user:
-				# Get leads assigned to this user via ToDo
-				todo_leads = frappe.get_all(
-					"ToDo",
-					filters=[
-						["reference_type", "=", "CRM Lead"],
-						["allocated_to", "=", user],
-						["status", "!=", "Cancelled"]
-					],
-					fields=["reference_name"],
-					pluck="reference_name"
-				)
-				# Filter data to only include leads assigned to this user
-				data = [lead for lead in data if lead.get("name") in todo_leads]
-				# Recalculate total for assigned_to filter
-				total = len(data)
-		except Exception as e:
-			frappe.log_error(f"Error filtering by assigned_to: {str(e)}", "get_all_leads_assigned_to_error")
-	
-	# Get all comments and last comment for each lead
-	if data:
-		try:
-			lead_names = [lead.get("name") for lead in data if lead.get("name")]
-			if lead_names:
-				# Get all comments for each lead (with all available fields)
-				all_comments = frappe.get_all(
-					"Comment",
-					filters=[
-						["reference_doctype", "=", "CRM Lead"],
-						["reference_name", "in", lead_names],
-						["comment_type", "=", "Comment"]
-					],
-					fields=["name", "reference_name", "reference_doctype", "reference_owner",
-					        "comment_type", "comment_email", "comment_by", "subject",
-					        "content", "creation", "modified", "published", "seen",
-					        "delayed", "ip_address"],
-					order_by="creation desc"
-				)
-				
-				# Create dictionaries mapping lead_name to comments
-				last_comments = {}  # Last comment only
-				all_comments_dict = {}  # All comments grouped by lead
-				
-				for comment in all_comments:
-					lead_name = comment.get("reference_name")
-					if lead_name:
-						# Format comment data with all fields
-						comment_data = {
-							"name": comment.get("name"),
-							"reference_name": comment.get("reference_name"),
-							"reference_doctype": comment.get("reference_doctype"),
-							"reference_owner": comment.get("reference_owner"),
-							"comment_type": comment.get("comment_type"),
-							"comment_email": comment.get("comment_email"),
-							"comment_by": comment.get("comment_by"),
-							"subject": comment.get("subject"),
-							"content": comment.get("content"),
-							"creation": comment.get("creation"),
-							"modified": comment.get("modified"),
-							"published": comment.get("published"),
-							"seen": comment.get("seen"),
-							"delayed": comment.get("delayed"),
-							"ip_address": comment.get("ip_address")
-						}
-						
-						# Store last comment (first one encountered is the most recent due to order_by)
-						if lead_name not in last_comments:
-							last_comments[lead_name] = comment_data
-						
-						# Store all comments
-						if lead_name not in all_comments_dict:
-							all_comments_dict[lead_name] = []
-						all_comments_dict[lead_name].append(comment_data)
-				
-				# Add last_comment and comments to each lead in data
-				for lead in data:
-					lead_name = lead.get("name")
-					# Always add comments fields, even if lead_name is None
-					if lead_name and lead_name in last_comments:
-						lead["last_comment"] = last_comments[lead_name]
-					else:
-						lead["last_comment"] = None
-					
-					if lead_name and lead_name in all_comments_dict:
-						# Sort comments by creation desc (newest first)
-						lead["comments"] = sorted(
-							all_comments_dict[lead_name],
-							key=lambda x: x.get("creation", ""),
-							reverse=True
-						)
-					else:
-						lead["comments"] = []
-		except Exception as e:
-			frappe.log_error(f"Error fetching comments: {str(e)}", "get_all_leads_comments_error")
-			# If error occurs, set last_comment and comments to None/empty for all leads
-			for lead in data:
-				lead["last_comment"] = None
-				lead["comments"] = []
+	# Attach the requested comments and child tables
+	enrich_leads(data, includes, "get_all_leads_enrichment_error")
 	
-	# Add Table fields (child tables) for each lead
-	if data:
-		try:
-			lead_names = [lead.get("name") for lead in data if lead.get("name")]
-			if lead_names:
-				# Get duplicate_leads table data
-				duplicate_leads_data = frappe.get_all(
-					"Duplicate Lead Entry",
-					filters=[["parent", "in", lead_names]],
-					fields=["parent", "name", "lead", "lead_name", "email", "mobile_no"],
-					order_by="parent, idx"
-				)
-				duplicate_leads_dict = {}
-				for row in duplicate_leads_data:
-					parent = row.get("parent")
-					if parent not in duplicate_leads_dict:
-						duplicate_leads_dict[parent] = []
-					duplicate_leads_dict[parent].append({
-						"name": row.get("name"),
-						"lead": row.get("lead"),
-						"lead_name": row.get("lead_name"),
-						"email": row.get("email"),
-						"mobile_no": row.get("mobile_no")
-					})
-				
-				# Get status_change_log table data
-				status_change_log_data = frappe.get_all(
-					"CRM Status Change Log",
-					filters=[["parent", "in", lead_names]],
-					fields=["parent", "name", "from_status", "to_status", "changed_by", "changed_on", "reason"],
-					order_by="parent, idx"
-				)
-				status_change_log_dict = {}
-				for row in status_change_log_data:
-					parent = row.get("parent")
-					if parent not in status_change_log_dict:
-						status_change_log_dict[parent] = []
-					status_change_log_dict[parent].append({
-						"name": row.get("name"),
-						"from_status": row.get("from_status"),
-						"to_status": row.get("to_status"),
-						"changed_by": row.get("changed_by"),
-						"changed_on": row.get("changed_on"),
-						"reason": row.get("reason")
-					})
-				
-				# Get property_preference_details table data
-				property_preference_data = frappe.get_all(
-					"Property Preference",
-					filters=[["parent", "in", lead_names]],
-					fields=["parent", "name", "*"],
-					order_by="parent, idx"
-				)
-				property_preference_dict = {}
-				for row in property_preference_data:
-					parent = row.get("parent")
-					if parent not in property_preference_dict:
-						property_preference_dict[parent] = []
-					# Remove parent and doctype from row data
-					row_data = {k: v for k, v in row.items() if k not in ["parent", "doctype"]}
-					property_preference_dict[parent].append(row_data)
-				
-				# Get products table data
-				products_data = frappe.get_all(
-					"CRM Products",
-					filters=[["parent", "in", lead_names]],
-					fields=["parent", "name", "*"],
-					order_by="parent, idx"
-				)
-				products_dict = {}
-				for row in products_data:
-					parent = row.get("parent")
-					if parent not in products_dict:
-						products_dict[parent] = []
-					# Remove parent and doctype from row data
-					row_data = {k: v for k, v in row.items() if k not in ["parent", "doctype"]}
-					products_dict[parent].append(row_data)
-				
-				# Add table fields to each lead
-				for lead in data:
-					lead_name = lead.get("name")
-					if lead_name:  # Only process if lead_name is not None
-						lead["duplicate_leads"] = duplicate_leads_dict.get(lead_name, [])
-						lead["status_change_log"] = status_change_log_dict.get(lead_name, [])
-						lead["property_preference_details"] = property_preference_dict.get(lead_name, [])
-						lead["products"] = products_dict.get(lead_name, [])
-					else:
-						# If lead_name is None, set empty arrays
-						lead["duplicate_leads"] = []
-						lead["status_change_log"] = []
-						lead["property_preference_details"] = []
-						lead["products"] = []
-		except Exception as e:
-			frappe.log_error(f"Error fetching table fields: {str(e)}", "get_all_leads_table_fields_error")
-			# If error occurs, set table fields to empty arrays for all leads
-			for lead in data:
-				lead["duplicate_leads"] = []
-				lead["status_change_log"] = []
-				lead["property_preference_details"] = []
-				lead["products"] = []
+	if cursor is not None:
+		return _cursor_response(data, limit, next_cursor, total)
 	
 	# Calculate pagination info
 	total_pages = (total + limit - 1) // limit if total > 0 else 0
@@ -3718,6 +3914,7 @@ def get_all_comments(page=1, limit=None, order_by="creation desc",
 					 delayed=None, ip_address=None,
 					 creation_from=None, creation_to=None,
 					 modified_from=None, modified_to=None,
+					 cursor=None, with_count=None,
 					 **kwargs):
 	"""
 	Get all Comments with pagination and filtering on all fields.
@@ -3745,6 +3942,9 @@ def get_all_comments(page=1, limit=None, order_by="creation desc",
 		creation_to: Creation date filter to (YYYY-MM-DD or DD-MM-YYYY)
 		modified_from: Modified date filter from (YYYY-MM-DD or DD-MM-YYYY)
 		modified_to: Modified date filter to (YYYY-MM-DD or DD-MM-YYYY)
+		cursor: Opaque cursor for keyset pagination ("" for the first page, then the
+			returned next_cursor). Replaces page; order_by must be "modified|creation asc|desc"
+		with_count: Also return the total in cursor mode (default: 0)
 	
 	Returns:
 		{
@@ -3758,6 +3958,7 @@ def get_all_comments(page=1, limit=None, order_by="creation desc",
 				"has_previous": boolean
 			}
 		}
+		In cursor mode: {"message": {"data", "page_size", "total" (None unless with_count), "next_cursor", "has_next"}}
 	"""
 	# Get parameters from form_dict for GET requests
 	if hasattr(frappe, 'form_dict') and frappe.form_dict:
@@ -3783,6 +3984,8 @@ def get_all_comments(page=1, limit=None, order_by="creation desc",
 		if 'limit' in frappe.form_dict:
 			limit = frappe.form_dict.get('limit')
 		order_by = frappe.form_dict.get('order_by') if 'order_by' in frappe.form_dict else order_by
+		cursor = frappe.form_dict.get('cursor') if 'cursor' in frappe.form_dict else cursor
+		with_count = frappe.form_dict.get('with_count') if 'with_count' in frappe.form_dict else with_count
 	
 	page = cint(page) or 1
 	# If limit is 0, None, or not provided, get all comments (no pagination)
@@ -3801,6 +4004,11 @@ def get_all_comments(page=1, limit=None, order_by="creation desc",
 	if page < 1:
 		page = 1
 	
+	# Cursor mode always pages (limit defaults to 20)
+	if cursor is not None:
+		get_all = False
+		limit = min(limit or 20, 100)
+	
 	# Calculate offset (only if pagination is enabled)
 	if get_all:
 		start = 0
@@ -3909,8 +4117,12 @@ def get_all_comments(page=1, limit=None, order_by="creation desc",
 			else:
 				filters.append(["modified", "<=", modified_to])
 	
-	# Get total count with filters
-	total = frappe.db.count("Comment", filters=filters if filters else None)
+	# Get total count with filters (optional and cached in cursor mode)
+	total = None
+	if cursor is None:
+		total = _count_rows("Comment", filters)
+	elif cint(with_count):
+		total = _cached_count("Comment", filters)
 	
 	# Get safe fields for Comment
 	base_fields = ["name", "comment_type", "comment_email", "comment_by",
@@ -3920,7 +4132,9 @@ def get_all_comments(page=1, limit=None, order_by="creation desc",
 	fields = _safe_fields("Comment", base_fields)
 	
 	# Get comments with or without pagination
-	if get_all:
+	if cursor is not None:
+		comments, next_cursor = _keyset_page("Comment", filters, fields, order_by, cursor, limit)
+	elif get_all:
 		# Get all comments (no pagination)
 		comments = frappe.get_all(
 			"Comment",
@@ -3951,7 +4165,9 @@ def get_all_comments(page=1, limit=None, order_by="creation desc",
 		data.append(comment_dict)
 	
 	# Calculate pagination info
-	if get_all:
+	if cursor is not None:
+		return _cursor_response(data, limit, next_cursor, total)
+	elif get_all:
 		# No pagination - return all data
 		return {
 			"message": {
@@ -3984,11 +4200,11 @@ def get_all_comments(page=1, limit=None, order_by="creation desc",
 
 
 @frappe.whitelist()
-def home_leads(limit=5):
+def home_leads(limit=5, fields=None, include=None, profile=None):
 	"""
 	Get today's top leads for home screen.
 	Returns leads where assigned_date is today.
-	Returns all available fields for each lead.
+	Returns the fields / related data of the requested profile (see `fields`, `include`).
 	
 	Permission logic:
 	- Each user sees only their own leads (owner = current_user)
@@ -3996,12 +4212,15 @@ def home_leads(limit=5):
 	
 	Args:
 		limit: Maximum number of leads to return (default: 5)
+		fields: Lead fields to return (comma-separated or JSON list, "*" for all)
+		include: Related data to attach (comma-separated or JSON list, "*" for all),
+			see `get_all_leads`
+		profile: Default fields/include: home (default), detail / full
 	
 	Returns:
 		{"today": [leads...], "limit": N}
 	"""
 	today_date = today()
-	current_user = frappe.session.user
 	
 	# Build filters for assigned_date = today
 	filters = [
@@ -4010,291 +4229,23 @@ def home_leads(limit=5):
 	
 	# Apply user-based permission filtering
 	# Each user should only see leads they own, assigned to them, or assigned to their team
-	if current_user and current_user != "Guest":
-		user_roles = set(frappe.get_roles(current_user))
-		
-		# System Manager can see all leads (no additional filtering)
-		if "System Manager" not in user_roles:
-			# Build permission filters: owner OR assigned_to OR assigned_to_team
-			
-			# 2. Assigned to current user (via ToDo)
-			# Get all leads assigned to current user
-			assigned_leads = frappe.get_all(
-				"ToDo",
-				filters=[
-					["reference_type", "=", "CRM Lead"],
-					["allocated_to", "=", current_user],
-					["status", "=", "Open"]
-				],
-				fields=["reference_name"],
-				pluck="reference_name"
-			)
-			
-			# 3. Assigned to team members (if user is Team Leader)
-			# Get team members - find Team where current user is team_leader
-			teams = frappe.get_all(
-				"Team",
-				filters={"team_leader": current_user},
-				fields=["name"],
-				limit=1
-			)
-			
-			team_members = []
-			if teams:
-				team_name = teams[0].name
-				# Get team members from Member child table
-				members = frappe.get_all(
-					"Member",
-					filters={
-						"parent": team_name,
-						"parenttype": "Team"
-					},
-					fields=["member"],
-					pluck="member"
-				)
-				# Filter out None/empty values
-				team_members = [m for m in members if m]
-			
-			# Get leads assigned to team members
-			team_assigned_leads = []
-			if team_members:
-				team_assigned_leads = frappe.get_all(
-					"ToDo",
-					filters=[
-						["reference_type", "=", "CRM Lead"],
-						["allocated_to", "in", team_members],
-						["status", "=", "Open"]
-					],
-					fields=["reference_name"],
-					pluck="reference_name"
-				)
-			
-			# Combine all allowed lead names (assigned + team)
-			allowed_lead_names = set(assigned_leads + team_assigned_leads)
-			
-			# Build permission filter: owner = current_user OR name in allowed_leads
-			# We'll use a more efficient approach by getting owned leads and combining
-			if allowed_lead_names:
-				# Get owned leads and combine with assigned/team leads
-				owned_leads = frappe.get_all(
-					"CRM Lead",
-					filters=[["owner", "=", current_user]],
-					fields=["name"],
-					pluck="name"
-				)
-				# Combine all allowed lead names
-				allowed_lead_names.update(owned_leads)
-				
-				# Add filter to only include allowed leads
-				# This efficiently combines owner + assigned + team in one filter
-				filters.append(["name", "in", list(allowed_lead_names)])
-			else:
-				# No assigned/team leads, only show owned leads
-				filters.append(["owner", "=", current_user])
+	filters.extend(_lead_permission_filters())
+	
+	# Fields to query and related data to attach (defaults: "home" profile)
+	fields, includes = _get_lead_projection(fields, include, profile, default_profile="home")
 	
 	# Get leads with assigned_date = today and permission filters
 	leads = frappe.get_all(
 		"CRM Lead",
 		filters=filters,
-		fields=["name"],
+		fields=fields,
 		order_by="modified desc",
 		page_length=cint(limit) or 5
 	)
+	data = get_compact_leads(leads, return_all_fields=True, include_assigned="assigned_to" in includes)
 	
-	# Get full lead documents with all fields
-	data = []
-	lead_names_list = [lead.name for lead in leads][:cint(limit) or 5]
-	
-	for lead_name in lead_names_list:
-		try:
-			lead_doc = frappe.get_doc("CRM Lead", lead_name)
-			lead_data = get_compact_lead(lead_doc, return_all_fields=True)
-			data.append(lead_data)
-		except Exception as e:
-			# Skip leads that can't be loaded (permissions, deleted, etc.)
-			frappe.log_error(f"Error loading lead {lead_name}: {str(e)}", "home_leads_error")
-			continue
-	
-	# Get all comments and last comment for each lead
-	if data:
-		try:
-			lead_names = [lead.get("name") for lead in data if lead.get("name")]
-			if lead_names:
-				# Get all comments for each lead (with all available fields)
-				all_comments = frappe.get_all(
-					"Comment",
-					filters=[
-						["reference_doctype", "=", "CRM Lead"],
-						["reference_name", "in", lead_names],
-						["comment_type", "=", "Comment"]
-					],
-					fields=["name", "reference_name", "reference_doctype", "reference_owner",
-					        "comment_type", "comment_email", "comment_by", "subject",
-					        "content", "creation", "modified", "published", "seen",
-					        "delayed", "ip_address"],
-					order_by="creation desc"
-				)
-				
-				# Create dictionaries mapping lead_name to comments
-				last_comments = {}  # Last comment only
-				all_comments_dict = {}  # All comments grouped by lead
-				
-				for comment in all_comments:
-					lead_name = comment.get("reference_name")
-					if lead_name:
-						# Format comment data with all fields
-						comment_data = {
-							"name": comment.get("name"),
-							"reference_name": comment.get("reference_name"),
-							"reference_doctype": comment.get("reference_doctype"),
-							"reference_owner": comment.get("reference_owner"),
-							"comment_type": comment.get("comment_type"),
-							"comment_email": comment.get("comment_email"),
-							"comment_by": comment.get("comment_by"),
-							"subject": comment.get("subject"),
-							"content": comment.get("content"),
-							"creation": comment.get("creation"),
-							"modified": comment.get("modified"),
-							"published": comment.get("published"),
-							"seen": comment.get("seen"),
-							"delayed": comment.get("delayed"),
-							"ip_address": comment.get("ip_address")
-						}
-						
-						# Store last comment (first one encountered is the most recent due to order_by)
-						if lead_name not in last_comments:
-							last_comments[lead_name] = comment_data
-						
-						# Store all comments
-						if lead_name not in all_comments_dict:
-							all_comments_dict[lead_name] = []
-						all_comments_dict[lead_name].append(comment_data)
-				
-				# Add last_comment and comments to each lead in data
-				for lead in data:
-					lead_name = lead.get("name")
-					# Always add comments fields, even if lead_name is None
-					if lead_name and lead_name in last_comments:
-						lead["last_comment"] = last_comments[lead_name]
-					else:
-						lead["last_comment"] = None
-					
-					if lead_name and lead_name in all_comments_dict:
-						# Sort comments by creation desc (newest first)
-						lead["comments"] = sorted(
-							all_comments_dict[lead_name],
-							key=lambda x: x.get("creation", ""),
-							reverse=True
-						)
-					else:
-						lead["comments"] = []
-		except Exception as e:
-			frappe.log_error(f"Error fetching comments: {str(e)}", "home_leads_comments_error")
-			# If error occurs, set last_comment and comments to None/empty for all leads
-			for lead in data:
-				lead["last_comment"] = None
-				lead["comments"] = []
-	
-	# Add Table fields (child tables) for each lead
-	if data:
-		try:
-			lead_names = [lead.get("name") for lead in data if lead.get("name")]
-			if lead_names:
-				# Get duplicate_leads table data
-				duplicate_leads_data = frappe.get_all(
-					"Duplicate Lead Entry",
-					filters=[["parent", "in", lead_names]],
-					fields=["parent", "name", "lead", "lead_name", "email", "mobile_no"],
-					order_by="parent, idx"
-				)
-				duplicate_leads_dict = {}
-				for row in duplicate_leads_data:
-					parent = row.get("parent")
-					if parent not in duplicate_leads_dict:
-						duplicate_leads_dict[parent] = []
-					duplicate_leads_dict[parent].append({
-						"name": row.get("name"),
-						"lead": row.get("lead"),
-						"lead_name": row.get("lead_name"),
-						"email": row.get("email"),
-						"mobile_no": row.get("mobile_no")
-					})
-				
-				# Get status_change_log table data
-				status_change_log_data = frappe.get_all(
-					"CRM Status Change Log",
-					filters=[["parent", "in", lead_names]],
-					fields=["parent", "name", "from_status", "to_status", "changed_by", "changed_on", "reason"],
-					order_by="parent, idx"
-				)
-				status_change_log_dict = {}
-				for row in status_change_log_data:
-					parent = row.get("parent")
-					if parent not in status_change_log_dict:
-						status_change_log_dict[parent] = []
-					status_change_log_dict[parent].append({
-						"name": row.get("name"),
-						"from_status": row.get("from_status"),
-						"to_status": row.get("to_status"),
-						"changed_by": row.get("changed_by"),
-						"changed_on": row.get("changed_on"),
-						"reason": row.get("reason")
-					})
-				
-				# Get property_preference_details table data
-				property_preference_data = frappe.get_all(
-					"Property Preference",
-					filters=[["parent", "in", lead_names]],
-					fields=["parent", "name", "*"],
-					order_by="parent, idx"
-				)
-				property_preference_dict = {}
-				for row in property_preference_data:
-					parent = row.get("parent")
-					if parent not in property_preference_dict:
-						property_preference_dict[parent] = []
-					# Remove parent and doctype from row data
-					row_data = {k: v for k, v in row.items() if k not in ["parent", "doctype"]}
-					property_preference_dict[parent].append(row_data)
-				
-				# Get products table data
-				products_data = frappe.get_all(
-					"CRM Products",
-					filters=[["parent", "in", lead_names]],
-					fields=["parent", "name", "*"],
-					order_by="parent, idx"
-				)
-				products_dict = {}
-				for row in products_data:
-					parent = row.get("parent")
-					if parent not in products_dict:
-						products_dict[parent] = []
-					# Remove parent and doctype from row data
-					row_data = {k: v for k, v in row.items() if k not in ["parent", "doctype"]}
-					products_dict[parent].append(row_data)
-				
-				# Add table fields to each lead
-				for lead in data:
-					lead_name = lead.get("name")
-					if lead_name:  # Only process if lead_name is not None
-						lead["duplicate_leads"] = duplicate_leads_dict.get(lead_name, [])
-						lead["status_change_log"] = status_change_log_dict.get(lead_name, [])
-						lead["property_preference_details"] = property_preference_dict.get(lead_name, [])
-						lead["products"] = products_dict.get(lead_name, [])
-					else:
-						# If lead_name is None, set empty arrays
-						lead["duplicate_leads"] = []
-						lead["status_change_log"] = []
-						lead["property_preference_details"] = []
-						lead["products"] = []
-		except Exception as e:
-			frappe.log_error(f"Error fetching table fields: {str(e)}", "home_leads_table_fields_error")
-			# If error occurs, set table fields to empty arrays for all leads
-			for lead in data:
-				lead["duplicate_leads"] = []
-				lead["status_change_log"] = []
-			lead["property_preference_details"] = []
-			lead["products"] = []
+	# Attach the requested comments and child tables
+	enrich_leads(data, includes, "home_leads_enrichment_error")
 	
 	return {
 		"today": data,
@@ -4302,6 +4253,59 @@ def home_leads(limit=5):
 	}
 
 
+@frappe.whitelist()
+def home(limit=5, min_each=5):
+	"""
+	Everything the home screen renders, in one call.
+	
+	Cached per user for HOME_CACHE_TTL seconds, or until a task, lead, assignment, comment,
+	notification or team is written (see HOME_DOCTYPES). The response carries an ETag; send it
+	back as If-None-Match to get an empty 304 when nothing changed.
+	
+	Args:
+		limit: Number of today's tasks / leads (default: 5)
+		min_each: Number of tasks per bucket (default: 5)
+	
+	Returns:
+		{
+			"home_tasks": {...},          # as home_tasks
+			"main_page_buckets": {...},   # as main_page_buckets
+			"home_leads": {...},          # as home_leads (home profile)
+			"unseen_count": int,          # as notifications.get_unseen_count
+			"current_user_role": {...},   # as get_current_user_role
+			"my_team_members": {...}      # as get_my_team_members
+		}
+	"""
+	limit, min_count = cint(limit) or 5, cint(min_each) or 5
+	version = hashlib.md5(get_version_token(HOME_DOCTYPES).encode()).hexdigest()
+	cache_key = f"crm_mobile_home:{frappe.session.user}:{today()}:{limit}:{min_count}:{version}"
+	
+	cached = frappe.cache().get_value(cache_key)
+	if cached is None:
+		# Today's tasks of home_tasks and of the buckets come from one query
+		today_tasks, late_tasks, upcoming_tasks = _get_task_lists(
+			_get_task_bucket_queries(max(limit, min_count), min_count)
+		)
+		data = {
+			"home_tasks": {"today": today_tasks[:limit], "limit": limit},
+			"main_page_buckets": {
+				"today": today_tasks[:min_count],
+				"late": late_tasks,
+				"upcoming": upcoming_tasks,
+				"min_each": min_count
+			},
+			"home_leads": home_leads(limit=limit),
+			"unseen_count": get_unseen_count(),
+			"current_user_role": get_current_user_role(),
+			"my_team_members": get_my_team_members(),
+		}
+		body = frappe.as_json(data, indent=None, separators=(",", ":"))
+		cached = {"data": json.loads(body), "etag": hashlib.md5(body.encode()).hexdigest()}
+		frappe.cache().set_value(cache_key, cached, expires_in_sec=HOME_CACHE_TTL)
+	
+	return etag_response(cached["data"], cached["etag"])
+
+
 @frappe.whitelist(allow_guest=True)
 def get_app_logo():
 	"""
@@ -4352,13 +4356,17 @@ def get_app_logo():
 
 
 @frappe.whitelist()
-def get_lead_by_id(lead_id=None, name=None):
+def get_lead_by_id(lead_id=None, name=None, fields=None, include=None, profile=None):
 	"""
 	Get a single CRM Lead by ID with all fields, comments, and table data.
 	
 	Args:
 		lead_id: Lead ID (name) - required (can also use 'name')
 		name: Lead name (alias for lead_id)
+		fields: Lead fields to return (comma-separated or JSON list, "*" for all)
+		include: Related data to attach (comma-separated or JSON list, "*" for all),
+			see `get_all_leads`
+		profile: Default fields/include: detail (default, everything), list / home
 	
 	Returns:
 		{
@@ -4381,20 +4389,9 @@ def get_lead_by_id(lead_id=None, name=None):
 		}
 	
 	try:
-		# Get all fields from CRM Lead doctype (same approach as get_all_leads)
-		# This ensures all fields including custom fields are returned
-		meta = frappe.get_meta("CRM Lead")
-		all_fieldnames = [f.fieldname for f in meta.fields 
-		                  if f.fieldtype not in ['Tab Break', 'Section Break', 'Column Break', 'Table']]
+		# Fields to query and related data to attach (defaults: "detail" profile, everything)
+		fields, includes = _get_lead_projection(fields, include, profile, default_profile="detail")
 		
-		# Ensure 'name' field is always included (it's a system field)
-		if 'name' not in all_fieldnames:
-			all_fieldnames.insert(0, 'name')
-		
-		# Use _safe_fields to filter out any problematic fields
-		fields = _safe_fields("CRM Lead", all_fieldnames)
-		
-		# Get lead with all fields using frappe.get_all (same as get_all_leads)
 		leads = frappe.get_all(
 			"CRM Lead",
 			filters={"name": lead_name},
@@ -4407,157 +4404,10 @@ def get_lead_by_id(lead_id=None, name=None):
 				"error": f"Lead with ID '{lead_name}' not found"
 			}
 		
-		# Get lead document for get_compact_lead
-		lead_doc = frappe.get_doc("CRM Lead", lead_name)
-		
-		# Get all fields using get_compact_lead
-		lead_data = get_compact_lead(lead_doc, return_all_fields=True)
-		
-		# Ensure all fields from frappe.get_all are included (especially assigned_to_display)
-		# Merge fields from frappe.get_all to ensure we have all fields including computed ones
-		for fieldname in fields:
-			if fieldname in leads[0]:
-				# Only override if the field exists in the get_all result
-				# This ensures computed fields like assigned_to_display are included
-				if fieldname not in lead_data or lead_data.get(fieldname) is None:
-					lead_data[fieldname] = leads[0].get(fieldname)
+		lead_data = get_compact_leads(leads, return_all_fields=True, include_assigned="assigned_to" in includes)[0]
 		
-		# Ensure name is always present
-		if not lead_data.get("name"):
-			lead_data["name"] = lead_name
-		
-		# Get all comments and last comment
-		try:
-			# Get all comments for this lead
-			all_comments = frappe.get_all(
-				"Comment",
-				filters=[
-					["reference_doctype", "=", "CRM Lead"],
-					["reference_name", "=", lead_name],
-					["comment_type", "=", "Comment"]
-				],
-				fields=["name", "reference_name", "reference_doctype", "reference_owner",
-				        "comment_type", "comment_email", "comment_by", "subject",
-				        "content", "creation", "modified", "published", "seen",
-				        "delayed", "ip_address"],
-				order_by="creation desc"
-			)
-			
-			# Format comments
-			comments_list = []
-			last_comment = None
-			
-			for comment in all_comments:
-				comment_data = {
-					"name": comment.get("name"),
-					"reference_name": comment.get("reference_name"),
-					"reference_doctype": comment.get("reference_doctype"),
-					"reference_owner": comment.get("reference_owner"),
-					"comment_type": comment.get("comment_type"),
-					"comment_email": comment.get("comment_email"),
-					"comment_by": comment.get("comment_by"),
-					"subject": comment.get("subject"),
-					"content": comment.get("content"),
-					"creation": comment.get("creation"),
-					"modified": comment.get("modified"),
-					"published": comment.get("published"),
-					"seen": comment.get("seen"),
-					"delayed": comment.get("delayed"),
-					"ip_address": comment.get("ip_address")
-				}
-				
-				comments_list.append(comment_data)
-				
-				# First comment is the most recent (due to order_by)
-				if last_comment is None:
-					last_comment = comment_data
-			
-			# Sort comments by creation desc (newest first)
-			comments_list = sorted(
-				comments_list,
-				key=lambda x: x.get("creation", ""),
-				reverse=True
-			)
-			
-			lead_data["last_comment"] = last_comment
-			lead_data["comments"] = comments_list
-		except Exception as e:
-			frappe.log_error(f"Error fetching comments for lead {lead_name}: {str(e)}", "get_lead_by_id_comments_error")
-			lead_data["last_comment"] = None
-			lead_data["comments"] = []
-		
-		# Get Table fields (child tables)
-		try:
-			# Get duplicate_leads table data
-			duplicate_leads_data = frappe.get_all(
-				"Duplicate Lead Entry",
-				filters=[["parent", "=", lead_name]],
-				fields=["parent", "name", "lead", "lead_name", "email", "mobile_no"],
-				order_by="idx"
-			)
-			duplicate_leads_list = []
-			for row in duplicate_leads_data:
-				duplicate_leads_list.append({
-					"name": row.get("name"),
-					"lead": row.get("lead"),
-					"lead_name": row.get("lead_name"),
-					"email": row.get("email"),
-					"mobile_no": row.get("mobile_no")
-				})
-			lead_data["duplicate_leads"] = duplicate_leads_list
-			
-			# Get status_change_log table data
-			status_change_log_data = frappe.get_all(
-				"CRM Status Change Log",
-				filters=[["parent", "=", lead_name]],
-				fields=["parent", "name", "from_status", "to_status", "changed_by", "changed_on", "reason"],
-				order_by="idx"
-			)
-			status_change_log_list = []
-			for row in status_change_log_data:
-				status_change_log_list.append({
-					"name": row.get("name"),
-					"from_status": row.get("from_status"),
-					"to_status": row.get("to_status"),
-					"changed_by": row.get("changed_by"),
-					"changed_on": row.get("changed_on"),
-					"reason": row.get("reason")
-				})
-			lead_data["status_change_log"] = status_change_log_list
-			
-			# Get property_preference_details table data
-			property_preference_data = frappe.get_all(
-				"Property Preference",
-				filters=[["parent", "=", lead_name]],
-				fields=["parent", "name", "*"],
-				order_by="idx"
-			)
-			property_preference_list = []
-			for row in property_preference_data:
-				# Remove parent and doctype from row data
-				row_data = {k: v for k, v in row.items() if k not in ["parent", "doctype"]}
-				property_preference_list.append(row_data)
-			lead_data["property_preference_details"] = property_preference_list
-			
-			# Get products table data
-			products_data = frappe.get_all(
-				"CRM Products",
-				filters=[["parent", "=", lead_name]],
-				fields=["parent", "name", "*"],
-				order_by="idx"
-			)
-			products_list = []
-			for row in products_data:
-				# Remove parent and doctype from row data
-				row_data = {k: v for k, v in row.items() if k not in ["parent", "doctype"]}
-				products_list.append(row_data)
-			lead_data["products"] = products_list
-		except Exception as e:
-			frappe.log_error(f"Error fetching table fields for lead {lead_name}: {str(e)}", "get_lead_by_id_table_fields_error")
-			lead_data["duplicate_leads"] = []
-			lead_data["status_change_log"] = []
-			lead_data["property_preference_details"] = []
-			lead_data["products"] = []
+		# Attach the requested comments and child tables
+		enrich_leads([lead_data], includes, "get_lead_by_id_enrichment_error")
 		
 		return {
 			"lead": lead_data
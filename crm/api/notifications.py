@@ -108,28 +108,26 @@ def get_hash(n):
 
 # ----------------------- Unseen Count -----------------------
 
-def _get_unseen_count_for(user: str) -> int:
-    """يحسب إجمالي غير المقروء للمستخدم من Notification Log + CRM Notification (لو موجودة)."""
-    total = 0
+# عدّاد غير المقروء لكل مستخدم في Redis: يُحدَّث من hooks الإدراج/القراءة بعد الـ commit فقط
+# (معاملة تم التراجع عنها لا تغيّره) ويُصحَّح دوريًا (reconcile_unseen_counts) أو عند انتهاء صلاحيته
+UNSEEN_COUNT_KEY = "crm_unseen_count"
+UNSEEN_COUNT_TTL = 6 * 60 * 60
+
+# يزيد/ينقص العدّاد فقط لو كان موجودًا (وإلا يُحسب من قاعدة البيانات عند أول قراءة)
+_INCR_IF_EXISTS = "if redis.call('exists', KEYS[1]) == 1 then return redis.call('incrby', KEYS[1], ARGV[1]) end"
+
+
+def _unseen_key(user: str) -> str:
+    return frappe.cache().make_key(f"{UNSEEN_COUNT_KEY}:{user}")
+
 
-    # Notification Log
+def _count_unseen_for(user: str) -> int:
+    """العدّ الفعلي من قاعدة البيانات (Notification Log + CRM Notification) بدون حد أقصى."""
     seen_col = _seen_column_name()
-    fields = ["name"]
+    filters = {"for_user": user}
     if seen_col:
-        fields.append(seen_col)
-
-    rows = frappe.get_all(
-        "Notification Log",
-        filters={"for_user": user},
-        fields=fields,
-        order_by="creation desc",
-        limit_page_length=500,
-        ignore_permissions=True,
-        as_list=False,
-    )
-    for r in rows:
-        if not _bool_seen(r, seen_col):
-            total += 1
+        filters[seen_col] = 0
+    total = frappe.db.count("Notification Log", filters)
 
     # CRM Notification (legacy)
     if frappe.db.table_exists("CRM Notification"):
@@ -138,6 +136,98 @@ def _get_unseen_count_for(user: str) -> int:
     return total
 
 
+def _get_unseen_count_for(user: str) -> int:
+    """إجمالي غير المقروء للمستخدم من عدّاد Redis، ويُحسب من قاعدة البيانات فقط عند غيابه."""
+    cache = frappe.cache()
+    value = cache.get(_unseen_key(user))
+    if value is not None:
+        return max(int(value), 0)
+
+    total = _count_unseen_for(user)
+    cache.set(_unseen_key(user), total, ex=UNSEEN_COUNT_TTL, nx=True)
+    return total
+
+
+def _adjust_unseen_count(user: Optional[str], delta: int):
+    if user and delta:
+        frappe.db.after_commit.add(lambda: frappe.cache().eval(_INCR_IF_EXISTS, 1, _unseen_key(user), delta))
+
+
+def _clear_unseen_count(user: Optional[str]):
+    if user:
+        frappe.db.after_commit.add(lambda: frappe.cache().delete_value(f"{UNSEEN_COUNT_KEY}:{user}"))
+
+
+def _notification_state(doc):
+    """(المستخدم، هل غير مقروء) لـ Notification Log أو CRM Notification."""
+    if doc.doctype == "CRM Notification":
+        return doc.get("to_user"), not doc.get("read")
+    seen_col = _seen_column_name()
+    return doc.get("for_user"), not (seen_col and doc.get(seen_col))
+
+
+def update_unseen_count(doc, method=None):
+    """
+    doc_events لـ Notification Log / CRM Notification (after_insert / on_update / on_trash):
+    تحديث عدّاد غير المقروء بدل إعادة العدّ.
+    """
+    user, unseen = _notification_state(doc)
+
+    if method == "after_insert":
+        _adjust_unseen_count(user, 1 if unseen else 0)
+    elif method == "on_trash":
+        _adjust_unseen_count(user, -1 if unseen else 0)
+    else:
+        before = doc.get_doc_before_save()
+        if not before:
+            return
+        previous_user, was_unseen = _notification_state(before)
+        if previous_user != user:
+            _clear_unseen_count(previous_user)
+            _clear_unseen_count(user)
+            return
+        _adjust_unseen_count(user, int(unseen) - int(was_unseen))
+
+
+def reconcile_unseen_counts():
+    """
+    مهمة مجدولة: إعادة حساب كل العدّادات الموجودة في Redis باستعلام مجمّع واحد لكل جدول
+    (تصحيح أي انحراف من تحديثات SQL مباشرة أو معاملات تم التراجع عنها).
+    """
+    prefix = frappe.cache().make_key(f"{UNSEEN_COUNT_KEY}:")
+    users = [frappe.safe_decode(key)[len(prefix):] for key in frappe.cache().get_keys(f"{UNSEEN_COUNT_KEY}:")]
+    if not users:
+        return
+
+    totals = dict.fromkeys(users, 0)
+    for i in range(0, len(users), 500):
+        chunk = tuple(users[i : i + 500])
+        seen_col = _seen_column_name()
+        seen_condition = f"and `{seen_col}` = 0" if seen_col else ""
+        rows = frappe.db.sql(
+            f"""
+            select `for_user`, count(*) from `tabNotification Log`
+            where `for_user` in %(users)s {seen_condition}
+            group by `for_user`
+            """,
+            {"users": chunk},
+        )
+        if frappe.db.table_exists("CRM Notification"):
+            rows += frappe.db.sql(
+                """
+                select `to_user`, count(*) from `tabCRM Notification`
+                where `to_user` in %(users)s and `read` = 0
+                group by `to_user`
+                """,
+                {"users": chunk},
+            )
+        for user, count in rows:
+            totals[user] += count
+
+    for user, total in totals.items():
+        frappe.cache().set(_unseen_key(user), total, ex=UNSEEN_COUNT_TTL)
+
+
 @frappe.whitelist()
 def get_unseen_count() -> int:
     return _get_unseen_count_for(frappe.session.user)
@@ -152,15 +242,36 @@ def get_unread_count() -> int:
 # ----------------------- Realtime helpers -----------------------
 
 def _broadcast_count(user: str):
-    """يذيع العدد الحالي للمستخدم."""
-    frappe.publish_realtime(
-        event="crm_portal_notification",
-        message={"type": "count", "unseen": _get_unseen_count_for(user)},
-        user=user,
-        after_commit=True,
+    """يذيع العدد الحالي للمستخدم بعد الـ commit (بعد تطبيق تعديلات العدّاد)."""
+    frappe.db.after_commit.add(
+        lambda: frappe.publish_realtime(
+            event="crm_portal_notification",
+            message={"type": "count", "unseen": _get_unseen_count_for(user)},
+            user=user,
+        )
     )
 
 
+# ----------------------- Desk bell -----------------------
+# جرس الـ desk في فربّي يعلّم الإشعارات كمقروءة بـ set_value (بدون hooks) → نغلّف الدوال
+# (override_whitelisted_methods) ونحذف العدّاد ليُعاد حسابه من قاعدة البيانات
+
+@frappe.whitelist()
+def desk_mark_as_read(docname: str):
+    from frappe.desk.doctype.notification_log.notification_log import mark_as_read
+
+    mark_as_read(docname)
+    _clear_unseen_count(frappe.db.get_value("Notification Log", docname, "for_user"))
+
+
+@frappe.whitelist()
+def desk_mark_all_as_read():
+    from frappe.desk.doctype.notification_log.notification_log import mark_all_as_read
+
+    mark_all_as_read()
+    _clear_unseen_count(frappe.session.user)
+
+
 # ----------------------- New Portal Endpoints -----------------------
 
 @frappe.whitelist()
@@ -232,13 +343,7 @@ def mark_portal_seen(name: str, source: str = "Notification Log"):
     user = frappe.session.user
 
     if source == "Notification Log":
-        seen_col = _seen_column_name()
-        if seen_col:
-            frappe.db.set_value("Notification Log", name, seen_col, 1)
-        else:
-            doc = frappe.get_doc("Notification Log", name)
-            setattr(doc, "seen", 1)
-            doc.save(ignore_permissions=True)
+        _mark_log_seen(name)
         _broadcast_count(user)
         return {"ok": True}
 
@@ -276,6 +381,7 @@ def mark_all_portal_seen(source: str = "Notification Log"):
         for name in names:
             frappe.db.set_value("Notification Log", name, seen_col, 1)
         updated += len(names)
+        _adjust_unseen_count(user, -len(names))
 
     elif source == "CRM Notification" and frappe.db.table_exists("CRM Notification"):
         names = frappe.get_all(
@@ -287,6 +393,7 @@ def mark_all_portal_seen(source: str = "Notification Log"):
         for name in names:
             frappe.db.set_value("CRM Notification", name, "read", 1)
         updated += len(names)
+        _adjust_unseen_count(user, -len(names))
 
     _broadcast_count(user)
     return {"ok": True, "updated": updated}
@@ -345,16 +452,26 @@ def mark_seen(name: str):
     if not name:
         frappe.throw("Notification name is required")
 
+    _mark_log_seen(name)
+    _broadcast_count(frappe.session.user)
+    return {"ok": True}
+
+
+def _mark_log_seen(name: str):
+    """تعليم Notification Log كمقروء وتحديث عدّاد صاحب الإشعار (for_user) وليس المستخدم الحالي."""
     seen_col = _seen_column_name()
-    if seen_col:
-        frappe.db.set_value("Notification Log", name, seen_col, 1)
-    else:
+    if not seen_col:
         doc = frappe.get_doc("Notification Log", name)
         setattr(doc, "seen", 1)
         doc.save(ignore_permissions=True)
+        return
 
-    _broadcast_count(frappe.session.user)
-    return {"ok": True}
+    row = frappe.db.get_value("Notification Log", name, ["for_user", seen_col], as_dict=True)
+    if row and not row.get(seen_col):
+        frappe.db.set_value("Notification Log", name, seen_col, 1)
+        _adjust_unseen_count(row.for_user, -1)
+        if row.for_user and row.for_user != frappe.session.user:
+            _broadcast_count(row.for_user)
 
 
 
@@ -6,6 +6,12 @@ import frappe
 from frappe import _
 from frappe.utils import get_datetime, now_datetime, now
 
+from crm.fcrm.doctype.crm_dashboard_rollup.crm_dashboard_rollup import (
+    update_rollup_for_bulk_flag_change,
+    update_rollup_for_value_change,
+)
+from crm.utils import bump_data_version
+
 # ----------------------------
 # Utilities & Permission checks
 # ----------------------------
@@ -50,6 +56,9 @@ def _coerce_datetime(value: str):
 
 REMINDER_DT = "Reminder"
 DELAYED_BATCH_LIMIT = 200
+# آخر وقت عالجه flag_overdue_comments_for_leads (يُخزّن في tabDefaultValue مع نفس المعاملة)
+DELAYED_HWM_KEY = "crm_delayed_flag_hwm"
+DELAYED_UPDATE_CHUNK = 1000
 
 def _reminder_schema():
     """ارجع السكيمة الحالية لجدول Reminder ديناميكيًا"""
@@ -308,7 +317,11 @@ def _set_doc_delayed_flag(doctype: str, name: str, value: int) -> None:
         return
     if not _has_column("CRM Lead", "delayed"):
         return
+    # set_value bypasses document hooks, so move the lead between dashboard rollup buckets here
+    update_rollup_for_value_change(doctype, name, "delayed", int(bool(value)))
     frappe.db.set_value(doctype, name, "delayed", int(bool(value)), update_modified=False)
+    # `modified` is kept, so ETags of lead lists (e.g. filtered on delayed) must be invalidated
+    bump_data_version(doctype)
 
 
 @frappe.whitelist()
@@ -539,45 +552,125 @@ def recalc_from_reminder(doc, method=None):
         frappe.log_error(frappe.get_traceback(), "recalc_from_reminder failed")
 
 
-def flag_overdue_comments_for_leads(limit: int = 200) -> dict:
+def flag_overdue_comments_for_leads() -> dict:
     """
-    تُستدعى دوريًا (من الـ scheduler) لتحديث حقول delayed على تعليقات الـ Lead
-    بناءً على كل التذكيرات المتأخرة المفتوحة.
+    تُستدعى كل دقيقة (من reminder_runner): أعِد حساب Delayed للـ Leads التي عبرت تذكيراتها
+    remind_at منذ آخر تشغيل فقط (high-water mark)، بجمل UPDATE مجمّعة بدل recalc لكل Lead.
+    تعديل التعليقات/التذكيرات نفسها يُعالج من doc_events؛ هنا فقط مرور الوقت.
+    لو مفيش high-water mark (أول تشغيل) → يعالج كل التذكيرات المتأخرة مرة واحدة.
+    """
+    until = now_datetime()
+    since = frappe.db.get_global(DELAYED_HWM_KEY)
+    since = get_datetime(since) if since else None
+
+    state = _crossed_reminder_state(since, until)
+    for i in range(0, len(state), DELAYED_UPDATE_CHUNK):
+        _apply_delayed_state(state[i : i + DELAYED_UPDATE_CHUNK])
+
+    # نفس المعاملة مع التحديثات: لو فشلت، التشغيل القادم يعيد نفس النافذة
+    frappe.db.set_global(DELAYED_HWM_KEY, str(until))
+    return {"processed": len(state), "since": since, "until": until}
+
+
+def _crossed_reminder_state(since, until) -> list[dict]:
+    """
+    Leads لها Reminder مفتوح remind_at في [since, until) مع آخر موعد متأخر (r_at) ووقت آخر تعليق.
+    أي Reminder متأخر أحدث من since يقع داخل النافذة، فـ max(remind_at) هنا هو آخر تذكير متأخر للـ Lead.
     """
     schema = _reminder_schema()
-    filters = {
-        schema["ref_dt"]: "CRM Lead",
-        "remind_at": ("<", now_datetime()),
-    }
+    conditions = [
+        f"r.`{schema['ref_dt']}` = 'CRM Lead'",
+        f"ifnull(r.`{schema['ref_nm']}`, '') != ''",
+        "r.`remind_at` < %(until)s",
+    ]
+    if since:
+        conditions.append("r.`remind_at` >= %(since)s")
     if schema["has_status"]:
-        filters["status"] = ["in", ["Open", "Scheduled"]]
+        conditions.append("(r.`status` in ('Open', 'Scheduled') or r.`status` is null)")
+
+    return frappe.db.sql(
+        f"""
+        select due.`lead`, due.`r_at`, max(c.`creation`) as `last_comment_at`
+        from (
+            select r.`{schema['ref_nm']}` as `lead`, max(r.`remind_at`) as `r_at`
+            from `tabReminder` r
+            where {" and ".join(conditions)}
+            group by r.`{schema['ref_nm']}`
+        ) due
+        left join `tabComment` c
+            on c.`reference_doctype` = 'CRM Lead'
+            and c.`reference_name` = due.`lead`
+            and c.`comment_type` = 'Comment'
+        group by due.`lead`, due.`r_at`
+        """,
+        {"since": since, "until": until},
+        as_dict=True,
+    )
 
-    rows = frappe.get_all(
-        REMINDER_DT,
-        filters=filters,
-        fields=[schema["ref_nm"]],
-        order_by="remind_at asc",
-        limit=limit,
+
+def _apply_delayed_state(rows: list[dict]) -> None:
+    """
+    نفس قاعدة recalc_delayed_for_doc لمجموعة Leads دفعة واحدة:
+    امسح delayed من تعليقاتهم، علّم آخر تعليق لو أقدم من r_at، وحدّث CRM Lead.delayed.
+    """
+    leads = tuple(row.lead for row in rows)
+    delayed = tuple(
+        row.lead for row in rows if row.last_comment_at and row.last_comment_at < row.r_at
     )
+    delayed_set = set(delayed)
+    on_time = tuple(lead for lead in leads if lead not in delayed_set)
 
-    leads = []
-    for row in rows:
-        lead_name = row.get(schema["ref_nm"])
-        if not lead_name or lead_name in leads:
-            continue
-        leads.append(lead_name)
+    col = _comment_delay_field()
+    if col:
+        frappe.db.sql(
+            f"""
+            update `tabComment`
+            set `{col}` = 0
+            where `reference_doctype` = 'CRM Lead'
+              and `comment_type` = 'Comment'
+              and `reference_name` in %(leads)s
+              and `{col}` = 1
+            """,
+            {"leads": leads},
+        )
+        if delayed:
+            frappe.db.sql(
+                f"""
+                update `tabComment` c
+                join (
+                    select `reference_name`, max(`creation`) as `last_at`
+                    from `tabComment`
+                    where `reference_doctype` = 'CRM Lead'
+                      and `comment_type` = 'Comment'
+                      and `reference_name` in %(leads)s
+                    group by `reference_name`
+                ) lc on lc.`reference_name` = c.`reference_name` and lc.`last_at` = c.`creation`
+                set c.`{col}` = 1
+                where c.`reference_doctype` = 'CRM Lead'
+                  and c.`comment_type` = 'Comment'
+                """,
+                {"leads": delayed},
+            )
 
-    processed = 0
-    for lead_name in leads:
-        try:
-            recalc_delayed_for_doc("CRM Lead", lead_name)
-            processed += 1
-        except frappe.PermissionError:
-            continue
-        except Exception:
-            frappe.log_error(frappe.get_traceback(), f"flag_overdue_comments_for_leads: {lead_name}")
+    if not _has_column("CRM Lead", "delayed"):
+        return
 
-    return {"processed": processed, "leads": leads}
+    for names, value in ((delayed, 1), (on_time, 0)):
+        if not names:
+            continue
+        # UPDATE مباشر يتخطى hooks الـ Lead → انقل الـ Leads بين buckets الـ rollup هنا
+        update_rollup_for_bulk_flag_change("CRM Lead", names, "delayed", value)
+        frappe.db.sql(
+            """
+            update `tabCRM Lead`
+            set `delayed` = %(value)s
+            where `name` in %(names)s
+              and ifnull(`delayed`, 0) != %(value)s
+            """,
+            {"names": names, "value": value},
+        )
+    # UPDATE بدون تغيير modified → غيّر نسخة بيانات CRM Lead لإبطال الـ ETags
+    bump_data_version("CRM Lead")
 
 
 @frappe.whitelist()
@@ -1,7 +1,10 @@
 import frappe
 
+from crm.utils import conditional_get
+
 
 @frappe.whitelist()
+@conditional_get(doctypes=["User", "Has Role", "CRM Telephony Agent"])
 def get_users():
 	users = frappe.qb.get_query(
 		"User",
@@ -4,6 +4,11 @@
 import frappe
 from frappe.utils import get_datetime, now_datetime
 
+from crm.utils import bump_data_version
+
+# حالات لا تتحول إلى late أبداً (منتهية أو ملغاة أو متأخرة بالفعل)
+LATE_EXEMPT_STATUSES = ("Done", "Canceled", "late")
+
 
 def check_and_update_task_status(doc, method=None):
 	"""
@@ -16,9 +21,9 @@ def check_and_update_task_status(doc, method=None):
 	due_datetime = get_datetime(doc.due_date)
 	current_datetime = now_datetime()
 	
-	# إذا تجاوز due_date والحالة ليست Done أو late، غيّرها إلى late
+	# إذا تجاوز due_date والحالة ليست Done أو Canceled أو late، غيّرها إلى late
 	if due_datetime < current_datetime:
-		if doc.status not in ["Done", "late"]:
+		if doc.status not in LATE_EXEMPT_STATUSES:
 			try:
 				# تحديث الحالة مباشرة في قاعدة البيانات
 				frappe.db.set_value("CRM Task", doc.name, "status", "late", update_modified=False)
@@ -29,6 +34,43 @@ def check_and_update_task_status(doc, method=None):
 				pass
 
 
+def is_task_late(status, due_date, current_datetime=None):
+	"""
+	هل المهمة متأخرة؟ (due_date فات والحالة ليست Done أو Canceled أو late)
+	"""
+	if not due_date or status in LATE_EXEMPT_STATUSES:
+		return False
+	return get_datetime(due_date) < (current_datetime or now_datetime())
+
+
+def get_late_status_fields(doctype, fields):
+	"""
+	الحقول المطلوبة لحساب late وقت القراءة: نضيف due_date إذا كانت الحالة مطلوبة بدونه
+	"""
+	if doctype != "CRM Task" or "status" not in fields or "due_date" in fields:
+		return fields
+	return [*fields, "due_date"]
+
+
+def apply_late_status(doctype, rows, fields=None):
+	"""
+	حساب الحالة late على الصفوف المُرجعة فقط (قراءة بدون كتابة في قاعدة البيانات)
+	الحفظ الفعلي في قاعدة البيانات يتم عن طريق المهمة المجدولة update_overdue_tasks
+	"""
+	if doctype != "CRM Task" or not rows:
+		return rows
+
+	current_datetime = now_datetime()
+	strip_due_date = fields is not None and "due_date" not in fields
+	for row in rows:
+		if "status" in row and is_task_late(row.get("status"), row.get("due_date"), current_datetime):
+			row["status"] = "late"
+		if strip_due_date:
+			row.pop("due_date", None)
+
+	return rows
+
+
 def update_overdue_tasks():
 	"""
 	مهمة مجدولة: تحديث جميع المهام المتأخرة تلقائياً
@@ -40,13 +82,15 @@ def update_overdue_tasks():
 			UPDATE `tabCRM Task`
 			SET status = 'late'
 			WHERE due_date < %s
-			AND status NOT IN ('Done', 'late')
+			AND status NOT IN %s
 			AND due_date IS NOT NULL
-		""", (current_dt,))
+		""", (current_dt, LATE_EXEMPT_STATUSES))
 		
 		updated = frappe.db.affected_rows()
 		
 		if updated > 0:
+			# modified لم يتغير → أبطل الـ ETags المبنية على CRM Task (مرة أخرى بعد الـ commit)
+			bump_data_version("CRM Task")
 			frappe.db.commit()
 			frappe.logger().info(f"Updated {updated} CRM Tasks to late status via scheduled job")
 		
@@ -68,7 +112,7 @@ def update_single_task_status(task_name):
 		due_datetime = get_datetime(task.due_date)
 		current_datetime = now_datetime()
 		
-		if due_datetime < current_datetime and task.status not in ["Done", "late"]:
+		if due_datetime < current_datetime and task.status not in LATE_EXEMPT_STATUSES:
 			task.status = "late"
 			task.save(ignore_permissions=True)
 			return True
@@ -99,10 +143,10 @@ def update_all_overdue_tasks_now():
 			SELECT name, title, status, due_date
 			FROM `tabCRM Task`
 			WHERE due_date < %s
-			AND status NOT IN ('Done', 'late')
+			AND status NOT IN %s
 			AND due_date IS NOT NULL
 			ORDER BY due_date ASC
-		""", (now_datetime(),), as_dict=True)
+		""", (now_datetime(), LATE_EXEMPT_STATUSES), as_dict=True)
 		
 		updated = 0
 		skipped = 0
@@ -0,0 +1,96 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, now_datetime
+
+from crm.api.activities import get_activities
+
+
+class TestIncrementalActivities(FrappeTestCase):
+	"""since / before paging of the activity timeline"""
+
+	def setUp(self):
+		frappe.set_user("Administrator")
+		self.lead = frappe.get_doc(
+			{
+				"doctype": "CRM Lead",
+				"first_name": "Timeline Paging Lead",
+				"mobile_no": "+201234567899",
+				"status": self._get_status(),
+			}
+		).insert(ignore_permissions=True)
+		self.addCleanup(frappe.delete_doc, "CRM Lead", self.lead.name, force=1)
+
+		# 7 comments after the lead, 3 of them sharing one timestamp
+		base = add_to_date(now_datetime(), hours=1)
+		offsets = [1, 2, 3, 3, 3, 4, 5]
+		self.comments = [self._add_comment(f"comment {i}", add_to_date(base, minutes=o)) for i, o in enumerate(offsets)]
+		self.lead_creation = frappe.db.get_value("CRM Lead", self.lead.name, "creation")
+
+	def _get_status(self):
+		if not frappe.db.exists("CRM Lead Status", "Test Status"):
+			frappe.get_doc({"doctype": "CRM Lead Status", "lead_status": "Test Status"}).insert(
+				ignore_permissions=True
+			)
+		return "Test Status"
+
+	def _add_comment(self, text, creation):
+		comment = frappe.get_doc(
+			{
+				"doctype": "Comment",
+				"comment_type": "Comment",
+				"reference_doctype": "CRM Lead",
+				"reference_name": self.lead.name,
+				"content": text,
+			}
+		).insert(ignore_permissions=True)
+		self.addCleanup(frappe.delete_doc, "Comment", comment.name, force=1)
+		frappe.db.set_value("Comment", comment.name, "creation", creation, update_modified=False)
+		return comment.name
+
+	def _comment_names(self, activities):
+		return [a["name"] for a in activities if a["activity_type"] == "comment"]
+
+	def test_before_paging_returns_every_event_once(self):
+		page = get_activities(self.lead.name, before=add_to_date(now_datetime(), days=1), limit=2)
+		seen = self._comment_names(page["activities"])
+		while page["has_more"]:
+			page = get_activities(self.lead.name, before=page["before"], limit=2)
+			seen += self._comment_names(page["activities"])
+
+		self.assertEqual(sorted(seen), sorted(self.comments))
+		self.assertEqual(len(seen), len(set(seen)))
+		self.assertEqual(page["activities"][-1]["activity_type"], "creation")
+
+	def test_before_pages_are_newest_first(self):
+		page = get_activities(self.lead.name, before=add_to_date(now_datetime(), days=1), limit=20)
+		creations = [a["creation"] for a in page["activities"]]
+		self.assertEqual(creations, sorted(creations, reverse=True))
+		self.assertEqual(page["activities"][-1]["activity_type"], "creation")
+		self.assertFalse(page["has_more"])
+
+	def test_since_paging_has_no_gap(self):
+		page = get_activities(self.lead.name, since=self.lead_creation, limit=3)
+		seen = self._comment_names(page["activities"])
+		while page["has_more"]:
+			self.assertEqual(len(page["activities"]), 3)
+			page = get_activities(self.lead.name, since=page["since"], limit=3)
+			seen += self._comment_names(page["activities"])
+
+		self.assertEqual(sorted(seen), sorted(self.comments))
+		self.assertEqual(len(seen), len(set(seen)))
+
+		# nothing new after the last cursor
+		page = get_activities(self.lead.name, since=page["since"])
+		self.assertEqual(page["activities"], [])
+		self.assertFalse(page["has_more"])
+
+	def test_since_returns_only_new_events(self):
+		page = get_activities(self.lead.name, since=self.lead_creation, limit=50)
+		cursor = page["since"]
+
+		new_comment = self._add_comment("new comment", add_to_date(now_datetime(), hours=2))
+		page = get_activities(self.lead.name, since=cursor)
+		self.assertEqual(self._comment_names(page["activities"]), [new_comment])
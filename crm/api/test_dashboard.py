@@ -0,0 +1,49 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from crm.api import dashboard
+
+
+class TestDashboardAPI(FrappeTestCase):
+	"""Smoke tests of the manager dashboard endpoints"""
+
+	def setUp(self):
+		frappe.set_user("Administrator")
+		dashboard.clear_dashboard_cache()
+
+	def tearDown(self):
+		frappe.set_user("Administrator")
+
+	def test_dashboard_cards_resolved(self):
+		self.assertIn("get_total_leads", dashboard.DASHBOARD_CARDS)
+		self.assertIn("get_sales_trend", dashboard.DASHBOARD_CARDS)
+		self.assertTrue(dashboard.DASHBOARD_CARDS["get_total_leads"].accepts_team_users)
+
+	def test_get_dashboard(self):
+		layout = dashboard.get_dashboard(
+			from_date=frappe.utils.get_first_day(frappe.utils.nowdate()),
+			to_date=frappe.utils.get_last_day(frappe.utils.nowdate()),
+		)
+
+		self.assertTrue(layout)
+		method_cards = [item for item in layout if f"get_{item['name']}" in dashboard.DASHBOARD_CARDS]
+		self.assertTrue(method_cards)
+		for item in method_cards:
+			self.assertIn("data", item)
+
+	def test_get_dashboard_all_time(self):
+		layout = dashboard.get_dashboard(from_date="", to_date="")
+		self.assertTrue(all("data" in item for item in layout))
+
+	def test_get_chart(self):
+		data = dashboard.get_chart("total_leads", "number_chart")
+		self.assertIn("value", data)
+
+		data = dashboard.get_chart("sales_trend", "axis")
+		self.assertNotIn("error", data)
+
+	def test_get_chart_invalid_name(self):
+		self.assertIn("error", dashboard.get_chart("no_such_card", "number_chart"))
@@ -0,0 +1,115 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from crm.api.doc import add_counts, get_counts, get_counts_map
+
+
+class TestActivityCounts(FrappeTestCase):
+	"""Batched badge counts of list / kanban rows"""
+
+	def setUp(self):
+		frappe.set_user("Administrator")
+		self._ensure_doc("CRM Lead Status", "Test Status", {"lead_status": "Test Status"})
+		self._ensure_doc("CRM Task Type", "Test Task Type", {"task_type": "Test Task Type"})
+
+		self.leads = [
+			self._insert("CRM Lead", first_name=f"Counts Lead {i}", mobile_no=f"+20123456786{i}", status="Test Status")
+			for i in range(2)
+		]
+		first, second = self.leads
+
+		for lead, comments, tasks, notes in ((first, 3, 2, 1), (second, 1, 0, 2)):
+			for i in range(comments):
+				self._insert("Comment", comment_type="Comment", reference_doctype="CRM Lead", reference_name=lead, content=f"comment {i}")
+			for i in range(tasks):
+				self._insert("CRM Task", title=f"task {i}", task_type="Test Task Type", reference_doctype="CRM Lead", reference_docname=lead)
+			for i in range(notes):
+				self._insert("FCRM Note", title=f"note {i}", reference_doctype="CRM Lead", reference_docname=lead)
+
+		# Only comments of type Comment are counted
+		self._insert("Comment", comment_type="Info", reference_doctype="CRM Lead", reference_name=first, content="info")
+		for communication_type in ("Communication", "Automated Message"):
+			self._insert(
+				"Communication",
+				communication_type=communication_type,
+				communication_medium="Email",
+				sent_or_received="Received",
+				subject=communication_type,
+				reference_doctype="CRM Lead",
+				reference_name=first,
+			)
+
+	def tearDown(self):
+		frappe.set_user("Administrator")
+		frappe.db.rollback()
+
+	def _ensure_doc(self, doctype, name, values):
+		if not frappe.db.exists(doctype, name):
+			frappe.get_doc({"doctype": doctype, **values}).insert(ignore_permissions=True)
+
+	def _insert(self, doctype, **values):
+		return frappe.get_doc({"doctype": doctype, **values}).insert(ignore_permissions=True).name
+
+	def _per_row_counts(self, name):
+		"""The counts as they were computed before batching: a few counts per row."""
+		return {
+			"_email_count": frappe.db.count(
+				"Communication",
+				filters={"reference_doctype": "CRM Lead", "reference_name": name, "communication_type": "Communication"},
+			)
+			+ frappe.db.count(
+				"Communication",
+				filters={"reference_doctype": "CRM Lead", "reference_name": name, "communication_type": "Automated Message"},
+			),
+			"_comment_count": frappe.db.count(
+				"Comment",
+				filters={"reference_doctype": "CRM Lead", "reference_name": name, "comment_type": "Comment"},
+			),
+			"_task_count": frappe.db.count(
+				"CRM Task", filters={"reference_doctype": "CRM Lead", "reference_docname": name}
+			),
+			"_note_count": frappe.db.count(
+				"FCRM Note", filters={"reference_doctype": "CRM Lead", "reference_docname": name}
+			),
+		}
+
+	def test_counts_match_per_row_counts(self):
+		counts = get_counts_map("CRM Lead", self.leads)
+
+		self.assertEqual(counts, {name: self._per_row_counts(name) for name in self.leads})
+		self.assertEqual(
+			counts[self.leads[0]], {"_email_count": 2, "_comment_count": 3, "_task_count": 2, "_note_count": 1}
+		)
+		self.assertEqual(
+			counts[self.leads[1]], {"_email_count": 0, "_comment_count": 1, "_task_count": 0, "_note_count": 2}
+		)
+
+	def test_add_counts_sets_row_counts(self):
+		rows = add_counts("CRM Lead", [frappe._dict(name=name) for name in self.leads])
+
+		for row in rows:
+			self.assertEqual({key: row[key] for key in self._per_row_counts(row.name)}, self._per_row_counts(row.name))
+
+	def test_get_counts_drops_unreadable_names(self):
+		self.assertEqual(set(get_counts("CRM Lead", [*self.leads, "missing-lead"])), set(self.leads))
+
+		# A sales user only reads the leads they own or are assigned to
+		user = "counts.agent@example.com"
+		if not frappe.db.exists("User", user):
+			frappe.get_doc({"doctype": "User", "email": user, "first_name": "Counts"}).insert(ignore_permissions=True)
+		frappe.get_doc("User", user).add_roles("Sales User")
+		self._insert(
+			"ToDo",
+			allocated_to=user,
+			reference_type="CRM Lead",
+			reference_name=self.leads[1],
+			description="Follow up",
+		)
+
+		frappe.set_user(user)
+		counts = get_counts("CRM Lead", frappe.as_json(self.leads))
+		self.assertEqual(list(counts), [self.leads[1]])
+		self.assertEqual(counts[self.leads[1]]["_comment_count"], 1)
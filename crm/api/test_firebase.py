@@ -0,0 +1,111 @@
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from crm.api import firebase
+from crm.api.firebase import FakeFCMError, FakeFCMTransport
+
+
+class TestFirebasePushPipeline(FrappeTestCase):
+    def setUp(self):
+        self.user = "Administrator"
+        self.tokens = ["fcm-test-ok", "fcm-test-flaky", "fcm-test-dead"]
+        for token in self.tokens:
+            frappe.get_doc(
+                {"doctype": "User Device Token", "user": self.user, "fcm_token": token}
+            ).insert(ignore_permissions=True)
+
+        self.transport = FakeFCMTransport(
+            failures={
+                "fcm-test-flaky": [FakeFCMError("UNAVAILABLE")],
+                "fcm-test-dead": [FakeFCMError("NOT_FOUND", "Requested entity was not found.")] * 3,
+            }
+        )
+        frappe.flags.crm_fcm_transport = self.transport
+        frappe.cache().delete_value(firebase.PUSH_QUEUE_KEY)
+        frappe.cache().delete_value(firebase.PUSH_DEAD_LETTER_KEY)
+
+        backoff = patch.object(firebase, "PUSH_RETRY_BACKOFF", 0)
+        backoff.start()
+        self.addCleanup(backoff.stop)
+
+    def tearDown(self):
+        frappe.flags.crm_fcm_transport = None
+        frappe.cache().delete_value(firebase.PUSH_QUEUE_KEY)
+        frappe.cache().delete_value(firebase.PUSH_DEAD_LETTER_KEY)
+        frappe.db.delete("User Device Token", {"fcm_token": ["in", self.tokens]})
+
+    def test_send_retries_transient_errors_and_drops_dead_tokens(self):
+        result = firebase._send_push_to_tokens(self.tokens, "Title", "Body")
+
+        self.assertEqual(result["sent"], 2)
+        self.assertEqual(result["failed"], 1)
+        # one batch for all tokens, one retry batch for the flaky token
+        self.assertEqual(self.transport.batches, [3, 1])
+        self.assertEqual(
+            sorted(m["token"] for m in self.transport.sent), ["fcm-test-flaky", "fcm-test-ok"]
+        )
+        self.assertFalse(frappe.db.exists("User Device Token", {"fcm_token": "fcm-test-dead"}))
+
+    def test_queued_notifications_share_one_batch(self):
+        for i in range(3):
+            frappe.cache().rpush(
+                firebase.PUSH_QUEUE_KEY,
+                json.dumps({"user": self.user, "title": "Title", "body": f"Body {i}", "data": {}}),
+            )
+        firebase.flush_push_queue()
+
+        self.assertFalse(frappe.cache().llen(firebase.PUSH_QUEUE_KEY))
+        # 3 notifications x 3 tokens in one batch, then the flaky token's retry
+        self.assertEqual(self.transport.batches, [9, 1])
+        self.assertEqual(len(self.transport.sent), 6)
+
+    def _queue(self, body="Body"):
+        frappe.cache().rpush(
+            firebase.PUSH_QUEUE_KEY,
+            json.dumps({"user": self.user, "title": "Title", "body": body, "data": {}}),
+        )
+
+    def _list(self, key):
+        return [json.loads(raw) for raw in frappe.cache().lrange(key, 0, -1)]
+
+    def test_failed_pushes_are_requeued_then_dead_lettered(self):
+        self.transport.failures = {
+            "fcm-test-flaky": [FakeFCMError("INVALID_ARGUMENT")] * firebase.PUSH_MAX_DELIVERIES
+        }
+        self._queue()
+        firebase.flush_push_queue()
+
+        # only the failed token is retried, on the next flush
+        queued = self._list(firebase.PUSH_QUEUE_KEY)
+        self.assertEqual([(item["tokens"], item["attempts"]) for item in queued], [(["fcm-test-flaky"], 1)])
+        self.assertEqual(
+            sorted(m["token"] for m in self.transport.sent), ["fcm-test-dead", "fcm-test-ok"]
+        )
+
+        for _attempt in range(firebase.PUSH_MAX_DELIVERIES - 1):
+            firebase.flush_push_queue()
+
+        self.assertEqual(self._list(firebase.PUSH_QUEUE_KEY), [])
+        dead = self._list(firebase.PUSH_DEAD_LETTER_KEY)
+        self.assertEqual(
+            [(item["body"], item["tokens"], item["attempts"]) for item in dead],
+            [("Body", ["fcm-test-flaky"], firebase.PUSH_MAX_DELIVERIES)],
+        )
+        self.assertNotIn("fcm-test-flaky", [m["token"] for m in self.transport.sent])
+
+    def test_pushes_of_a_failed_batch_are_requeued(self):
+        self._queue("Body 1")
+        self._queue("Body 2")
+        with patch.object(firebase, "_get_tokens_by_user", side_effect=Exception("db down")):
+            firebase.flush_push_queue()
+
+        queued = self._list(firebase.PUSH_QUEUE_KEY)
+        self.assertEqual([(item["body"], item["attempts"]) for item in queued], [("Body 1", 1), ("Body 2", 1)])
+        self.assertEqual(self.transport.sent, [])
+
+        firebase.flush_push_queue()
+        self.assertEqual(self._list(firebase.PUSH_QUEUE_KEY), [])
+        self.assertEqual(len(self.transport.sent), 4)
@@ -329,6 +329,201 @@ class TestMobileAPI(FrappeTestCase):
 		self.assertIsInstance(data["late"], list)
 		self.assertIsInstance(data["upcoming"], list)
 	
+	def test_home_matches_standalone_endpoints(self):
+		"""Test every section of the composite home payload matches its own endpoint"""
+		from crm.api.mobile_api import (
+			create_lead, create_task, get_current_user_role, get_my_team_members,
+			get_unseen_count, home, home_leads, home_tasks, main_page_buckets
+		)
+		
+		for i, days in enumerate((0, 0, -2, 2)):
+			create_result = create_task(
+				task_type="Test Task Type",
+				title=f"Home Task {i+1}",
+				start_date=add_days(today(), days)
+			)
+			self.created_tasks.append(create_result["message"]["name"])
+		create_result = create_lead(first_name="Home", last_name="Lead", mobile_no="+201234567870")
+		self.created_leads.append(create_result["message"]["name"])
+		
+		# home payloads are cached as JSON; compare the serialized form
+		def as_json(data):
+			return json.loads(frappe.as_json(data))
+		
+		for limit, min_each in ((5, 5), (1, 3), (3, 1)):
+			frappe.cache().delete_keys("crm_mobile_home:")
+			data = home(limit=limit, min_each=min_each)
+			
+			self.assertEqual(data["home_tasks"], as_json(home_tasks(limit=limit)))
+			self.assertEqual(data["main_page_buckets"], as_json(main_page_buckets(min_each=min_each)))
+			self.assertEqual(data["home_leads"], as_json(home_leads(limit=limit)))
+			self.assertEqual(data["unseen_count"], as_json(get_unseen_count()))
+			self.assertEqual(data["current_user_role"], as_json(get_current_user_role()))
+			self.assertEqual(data["my_team_members"], as_json(get_my_team_members()))
+	
+	def test_home_tasks_include_meeting_attendees(self):
+		"""Test home_tasks and main_page_buckets return the meeting attendees like get_doc does"""
+		from crm.api.mobile_api import create_task, home_tasks, main_page_buckets
+		
+		create_result = create_task(
+			task_type="Test Task Type",
+			title="Home Meeting Task",
+			start_date=today(),
+			meeting_attendees=["Administrator"]
+		)
+		task_name = create_result["message"]["name"]
+		self.created_tasks.append(task_name)
+		
+		def attendees(tasks):
+			task = next(t for t in tasks if t["name"] == task_name)
+			return [row["crm_task_user"] for row in task["meeting_attendees"]]
+		
+		self.assertEqual(attendees(home_tasks(limit=100)["today"]), ["Administrator"])
+		self.assertEqual(attendees(main_page_buckets(min_each=100)["today"]), ["Administrator"])
+	
+	def test_home_cache_follows_writes(self):
+		"""Test a task created after the home screen was cached shows up on the next call"""
+		from crm.api.mobile_api import create_task, home
+		
+		frappe.cache().delete_keys("crm_mobile_home:")
+		before = [task["name"] for task in home(limit=100, min_each=100)["home_tasks"]["today"]]
+		
+		create_result = create_task(task_type="Test Task Type", title="Fresh Home Task", start_date=today())
+		task_name = create_result["message"]["name"]
+		self.created_tasks.append(task_name)
+		
+		after = [task["name"] for task in home(limit=100, min_each=100)["home_tasks"]["today"]]
+		self.assertNotIn(task_name, before)
+		self.assertIn(task_name, after)
+	
+	def test_compact_task_keeps_empty_description(self):
+		"""Test dict rows and documents both always carry description"""
+		from crm.api.mobile_api import get_compact_task
+		
+		task = get_compact_task(frappe._dict(name="TASK-TEST", title="No description", description=None), return_all_fields=True)
+		self.assertIn("description", task)
+		self.assertIsNone(task["description"])
+		self.assertNotIn("start_date", task)
+	
+	def test_get_compact_tasks_hydrates_links_and_assignees(self):
+		"""Test batched task serialization resolves titles and assignees with a fixed number of queries"""
+		from unittest.mock import patch
+		
+		from crm.api.mobile_api import _get_task_fields, get_compact_tasks
+		
+		project = frappe.get_doc({"doctype": "Real Estate Project", "project_name": f"Batch Project {frappe.generate_hash(length=6)}"}).insert()
+		self.created_projects.append(project.name)
+		
+		def insert_tasks(count):
+			names = []
+			for i in range(count):
+				lead = frappe.get_doc({"doctype": "CRM Lead", "first_name": f"Batch{i}", "last_name": "Lead"}).insert()
+				self.created_leads.append(lead.name)
+				task = frappe.get_doc({
+					"doctype": "CRM Task",
+					"task_type": "Test Task Type",
+					"title": f"Batch Task {i}",
+					"status": "In Progress",
+					"lead": lead.name,
+					"reference_doctype": "CRM Lead",
+					"reference_docname": lead.name,
+					"project": project.name,
+				}).insert()
+				self.created_tasks.append(task.name)
+				frappe.get_doc({
+					"doctype": "ToDo",
+					"allocated_to": "Administrator",
+					"reference_type": "CRM Task",
+					"reference_name": task.name,
+					"description": task.title,
+				}).insert()
+				names.append(task.name)
+			return names
+		
+		def serialize(names):
+			rows = frappe.get_all("CRM Task", filters={"name": ["in", names]}, fields=_get_task_fields(), order_by="name asc")
+			with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+				tasks = get_compact_tasks(rows, return_all_fields=True)
+			return tasks, sql.call_count
+		
+		few = insert_tasks(2)
+		serialize(few)  # warm up the meta caches
+		tasks, few_queries = serialize(few)
+		
+		admin = frappe.db.get_value("User", "Administrator", ["email", "full_name"], as_dict=True)
+		for i, task in enumerate(tasks):
+			self.assertEqual(task["title"], f"Batch Task {i}")
+			self.assertEqual(task["status"], "In Progress")
+			self.assertEqual(task["lead"], f"Batch{i} Lead")
+			self.assertEqual(task["lead_id"], self.created_leads[i])
+			self.assertEqual(task["reference_docname"], f"Batch{i} Lead")
+			self.assertEqual(task["reference_docname_id"], self.created_leads[i])
+			self.assertEqual(task["project"], project.project_name)
+			self.assertEqual(task["project_id"], project.name)
+			self.assertEqual(
+				[(user["email"], user["name"]) for user in task["assigned_to"]],
+				[(admin.email or "Administrator", admin.full_name or "Administrator")],
+			)
+		
+		_tasks, many_queries = serialize(few + insert_tasks(6))
+		self.assertEqual(many_queries, few_queries)
+	
+	def test_cursor_round_trip(self):
+		"""Test encoding and decoding of list cursors"""
+		from crm.api.mobile_api import _decode_cursor, _encode_cursor
+		
+		row = frappe._dict(modified="2025-01-02 03:04:05.123456", name="TASK-0001")
+		cursor = _encode_cursor(row, "modified")
+		
+		self.assertEqual(_decode_cursor(cursor), ["2025-01-02 03:04:05.123456", "TASK-0001"])
+		self.assertRaises(frappe.ValidationError, _decode_cursor, "not a cursor")
+	
+	def test_get_all_tasks_cursor_paging(self):
+		"""Test cursor paging returns every task once, also when modified ties"""
+		from crm.api.mobile_api import create_task, get_all_tasks
+		
+		for i in range(5):
+			create_result = create_task(
+				task_type="Test Task Type",
+				title=f"Cursor Paging Task {i+1}"
+			)
+			self.created_tasks.append(create_result["message"]["name"])
+		
+		# Same modified for every task, so only the name breaks ties
+		modified = now_datetime()
+		for task_name in self.created_tasks:
+			frappe.db.set_value("CRM Task", task_name, "modified", modified, update_modified=False)
+		
+		expected = sorted(self.created_tasks, reverse=True)
+		
+		for order_by in ("modified desc", "modified asc"):
+			seen = []
+			cursor = ""
+			while True:
+				result = get_all_tasks(limit=2, title="Cursor Paging Task", order_by=order_by, cursor=cursor)
+				data = result["message"]
+				self.assertIsNone(data["total"])
+				self.assertLessEqual(len(data["data"]), 2)
+				seen.extend(task["name"] for task in data["data"])
+				if not data["has_next"]:
+					break
+				cursor = data["next_cursor"]
+			
+			self.assertEqual(seen, expected if order_by == "modified desc" else expected[::-1])
+		
+		# Page-number mode keeps an exact (uncached) total
+		result = get_all_tasks(page=1, limit=2, title="Cursor Paging Task")
+		self.assertEqual(result["message"]["total"], 5)
+		frappe.delete_doc("CRM Task", self.created_tasks.pop(), force=1)
+		result = get_all_tasks(page=1, limit=2, title="Cursor Paging Task")
+		self.assertEqual(result["message"]["total"], 4)
+	
+	def test_get_all_tasks_cursor_invalid_order(self):
+		"""Test cursor paging rejects orders without a keyset"""
+		from crm.api.mobile_api import get_all_tasks
+		
+		self.assertRaises(frappe.ValidationError, get_all_tasks, order_by="title asc", cursor="")
+	
 	# ============================================================================
 	# LEAD API TESTS
 	# ============================================================================
@@ -469,11 +664,30 @@ class TestMobileAPI(FrappeTestCase):
 		self.assertIn("total", data)
 		self.assertIsInstance(data["data"], list)
 		
-		# Check that each lead has comments fields
+		# The default (list) profile only carries the last comment
 		if data["data"]:
 			lead = data["data"][0]
+			self.assertIn("last_comment", lead)
+			self.assertNotIn("comments", lead)
+		
+		# The full profile has all comments and child tables
+		result = get_all_leads(page=1, limit=10, profile="full")
+		if result["message"]["data"]:
+			lead = result["message"]["data"][0]
 			self.assertIn("comments", lead)
 			self.assertIn("last_comment", lead)
+			self.assertIn("duplicate_leads", lead)
+	
+	def test_get_all_leads_projection(self):
+		"""Test fields / include projection of get_all_leads"""
+		from crm.api.mobile_api import create_lead, get_all_leads
+		
+		create_result = create_lead(first_name="Projected", last_name="Lead", mobile_no="+201234567880")
+		self.created_leads.append(create_result["message"]["name"])
+		
+		result = get_all_leads(page=1, limit=5, fields="lead_name,mobile_no", include="")
+		lead = result["message"]["data"][0]
+		self.assertEqual(set(lead), {"name", "lead_name", "mobile_no"})
 	
 	def test_get_lead_by_id(self):
 		"""Test getting a single lead by ID"""
@@ -501,6 +715,31 @@ class TestMobileAPI(FrappeTestCase):
 		self.assertIn("duplicate_leads", lead)
 		self.assertIn("status_change_log", lead)
 	
+	def test_enrich_leads_child_tables(self):
+		"""Test duplicate_leads / status_change_log are read from the real child table columns"""
+		from crm.api.mobile_api import create_lead, enrich_leads
+		
+		original = create_lead(first_name="Original", last_name="Lead", mobile_no="+201234567871")["message"]["name"]
+		duplicate = create_lead(first_name="Duplicate", last_name="Lead", mobile_no="+201234567872")["message"]["name"]
+		self.created_leads += [original, duplicate]
+		
+		lead = frappe.get_doc("CRM Lead", original)
+		lead.set("status_change_log", [])
+		lead.append("duplicate_leads", {"lead": duplicate, "note": "Same mobile", "source": "Test"})
+		lead.append("status_change_log", {"from": "New", "to": "Test Status", "log_owner": "Administrator"})
+		lead.save(ignore_permissions=True)
+		
+		error_logs = frappe.db.count("Error Log", {"method": "lead_enrichment_error"})
+		data = enrich_leads([{"name": original}], {"duplicate_leads", "status_change_log"}, concurrent=0)
+		
+		self.assertEqual(frappe.db.count("Error Log", {"method": "lead_enrichment_error"}), error_logs)
+		self.assertEqual(len(data[0]["duplicate_leads"]), 1)
+		self.assertEqual(data[0]["duplicate_leads"][0]["lead"], duplicate)
+		self.assertEqual(data[0]["duplicate_leads"][0]["note"], "Same mobile")
+		self.assertEqual(data[0]["duplicate_leads"][0]["source"], "Test")
+		statuses = [(row["from"], row["to"]) for row in data[0]["status_change_log"]]
+		self.assertIn(("New", "Test Status"), statuses)
+	
 	def test_home_leads(self):
 		"""Test getting recent leads for home page"""
 		from crm.api.mobile_api import create_lead, home_leads
@@ -800,3 +1039,111 @@ class TestMobileAPI(FrappeTestCase):
 		lead = edit_result["message"]
 		self.assertEqual(lead.get("lead_name"), "Updated with Comment")
 
+
+
+class TestGetAllLeadsScope(FrappeTestCase):
+	"""Filtering of get_all_leads that must happen in SQL, before pagination"""
+	
+	def setUp(self):
+		super().setUp()
+		frappe.set_user("Administrator")
+		# a first_name only the leads of this test carry
+		self.token = f"Scope{frappe.generate_hash(length=8)}"
+		self.agent = self._ensure_user("scope.agent@example.com")
+	
+	def tearDown(self):
+		from crm.fcrm.doctype.team.team import TEAM_GRAPH_CACHE_KEY
+		
+		frappe.set_user("Administrator")
+		frappe.db.rollback()
+		# the team graph may have been cached from the rolled back teams
+		frappe.cache().delete_value(TEAM_GRAPH_CACHE_KEY)
+		super().tearDown()
+	
+	def _ensure_user(self, email):
+		if not frappe.db.exists("User", email):
+			frappe.get_doc({"doctype": "User", "email": email, "first_name": email.split("@")[0]}).insert(
+				ignore_permissions=True
+			)
+		return email
+	
+	def _insert_lead(self, owner="Administrator"):
+		return frappe.get_doc({"doctype": "CRM Lead", "first_name": self.token, "owner": owner}).insert(
+			ignore_permissions=True
+		).name
+	
+	def _assign(self, lead, user):
+		frappe.get_doc({
+			"doctype": "ToDo",
+			"allocated_to": user,
+			"reference_type": "CRM Lead",
+			"reference_name": lead,
+			"description": "Scope test",
+		}).insert(ignore_permissions=True)
+	
+	def _get_all_leads(self, **kwargs):
+		from crm.api.mobile_api import get_all_leads
+		
+		return get_all_leads(first_name=self.token, order_by="name asc", fields="first_name", include="", **kwargs)["message"]
+	
+	def test_assigned_to_filters_before_pagination(self):
+		"""Test every page of an assigned_to list is full and the total is the filtered count"""
+		assigned = []
+		for i in range(7):
+			lead = self._insert_lead()
+			# unassigned leads in between the assigned ones
+			if i % 3 != 1:
+				self._assign(lead, self.agent)
+				assigned.append(lead)
+		
+		self.assertEqual(self._get_all_leads(limit=2)["total"], 7)
+		
+		pages = [self._get_all_leads(assigned_to=self.agent, page=page, limit=2) for page in (1, 2, 3)]
+		self.assertEqual([len(page["data"]) for page in pages], [2, 2, 1])
+		self.assertEqual({page["total"] for page in pages}, {len(assigned)})
+		self.assertEqual([page["total_pages"] for page in pages], [3, 3, 3])
+		self.assertEqual([lead["name"] for page in pages for lead in page["data"]], sorted(assigned))
+		self.assertEqual([page["has_next"] for page in pages], [True, True, False])
+	
+	def test_permission_scope_of_rows_and_total(self):
+		"""Test each user gets exactly the leads they may see, in the rows and in the total"""
+		owner = self._ensure_user("scope.owner@example.com")
+		leader = self._ensure_user("scope.leader@example.com")
+		outsider = self._ensure_user("scope.outsider@example.com")
+		frappe.get_doc(
+			{"doctype": "Team", "team_leader": leader, "team_member": [{"member": self.agent}]}
+		).insert(ignore_permissions=True)
+		
+		owned = self._insert_lead(owner=owner)
+		assigned = self._insert_lead()
+		self._assign(assigned, self.agent)
+		hidden = self._insert_lead()
+		# the team leader sees the lead assigned to their member through the visibility table
+		self.assertTrue(frappe.db.exists("CRM Lead Visibility", {"user": leader, "lead": assigned}))
+		
+		expected = {
+			"Administrator": sorted([owned, assigned, hidden]),
+			owner: [owned],
+			self.agent: [assigned],
+			leader: [assigned],
+			outsider: [],
+		}
+		for user, leads in expected.items():
+			frappe.set_user(user)
+			result = self._get_all_leads(limit=20)
+			self.assertEqual([lead["name"] for lead in result["data"]], leads, user)
+			self.assertEqual(result["total"], len(leads), user)
+			self.assertEqual(self._get_all_leads(limit=20, cursor="", with_count=1)["total"], len(leads), user)
+	
+	def test_outsider_cannot_count_hidden_leads(self):
+		"""Test filters on a lead the user may not see do not reveal it through the total"""
+		outsider = self._ensure_user("scope.outsider@example.com")
+		lead = self._insert_lead()
+		self._assign(lead, self.agent)
+		
+		frappe.set_user(outsider)
+		for filters in ({}, {"assigned_to": self.agent}):
+			result = self._get_all_leads(limit=20, **filters)
+			self.assertEqual(result["data"], [])
+			self.assertEqual(result["total"], 0)
+			self.assertEqual(result["total_pages"], 0)
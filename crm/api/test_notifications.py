@@ -0,0 +1,121 @@
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import now
+
+from crm.api import notifications
+from crm.api.notifications import (
+    _count_unseen_for,
+    _get_unseen_count_for,
+    _seen_column_name,
+    _unseen_key,
+    desk_mark_as_read,
+    mark_portal_seen,
+    reconcile_unseen_counts,
+)
+
+
+class TestUnseenCount(FrappeTestCase):
+    def setUp(self):
+        frappe.set_user("Administrator")
+        self.user = "unseen.counter@example.com"
+        if not frappe.db.exists("User", self.user):
+            frappe.get_doc({"doctype": "User", "email": self.user, "first_name": "Unseen"}).insert(
+                ignore_permissions=True
+            )
+        self.seen_col = _seen_column_name()
+        self._delete_logs()
+        frappe.cache().delete_value(f"{notifications.UNSEEN_COUNT_KEY}:{self.user}")
+
+    def tearDown(self):
+        frappe.set_user("Administrator")
+        self._delete_logs()
+
+    def _delete_logs(self):
+        frappe.db.delete("Notification Log", {"for_user": self.user})
+        frappe.db.commit()
+
+    def _insert_log(self, subject="Unseen counter test"):
+        return frappe.get_doc(
+            {"doctype": "Notification Log", "for_user": self.user, "subject": subject, "type": "Alert"}
+        ).insert(ignore_permissions=True)
+
+    def _cached_count(self):
+        value = frappe.cache().get(_unseen_key(self.user))
+        return None if value is None else int(value)
+
+    def test_insert_and_seen_adjust_counter_after_commit(self):
+        self.assertEqual(_get_unseen_count_for(self.user), 0)
+
+        log = self._insert_log()
+        # not applied before the insert is committed
+        self.assertEqual(self._cached_count(), 0)
+        frappe.db.commit()
+        self.assertEqual(self._cached_count(), 1)
+
+        # marked by another user (e.g. an admin): the owner's counter goes down
+        mark_portal_seen(log.name)
+        frappe.db.commit()
+        self.assertEqual(self._cached_count(), 0)
+        self.assertEqual(_count_unseen_for(self.user), 0)
+
+    def test_rolled_back_insert_keeps_counter(self):
+        self.assertEqual(_get_unseen_count_for(self.user), 0)
+
+        self._insert_log()
+        frappe.db.rollback()
+
+        self.assertEqual(self._cached_count(), 0)
+        self.assertEqual(_get_unseen_count_for(self.user), _count_unseen_for(self.user))
+
+    def test_trash_decrements_counter(self):
+        logs = [self._insert_log(), self._insert_log()]
+        frappe.db.commit()
+        self.assertEqual(_get_unseen_count_for(self.user), 2)
+
+        logs[0].delete(ignore_permissions=True)
+        frappe.db.commit()
+        self.assertEqual(self._cached_count(), 1)
+
+    def test_reconcile_fixes_drifted_counter(self):
+        self._insert_log()
+        frappe.db.commit()
+        frappe.cache().set(_unseen_key(self.user), 42)
+
+        reconcile_unseen_counts()
+
+        self.assertEqual(self._cached_count(), 1)
+
+    def test_desk_mark_as_read_drops_counter(self):
+        log = self._insert_log()
+        frappe.db.commit()
+        self.assertEqual(_get_unseen_count_for(self.user), 1)
+
+        frappe.set_user(self.user)
+        desk_mark_as_read(log.name)
+        frappe.db.commit()
+
+        self.assertIsNone(self._cached_count())
+        self.assertEqual(_get_unseen_count_for(self.user), 0)
+
+    def test_counts_above_500(self):
+        timestamp = now()
+        fields = ["name", "creation", "modified", "owner", "modified_by", "for_user", "subject", "type"]
+        values = [
+            (frappe.generate_hash(length=12), timestamp, timestamp, "Administrator", "Administrator", self.user, f"Bulk {i}", "Alert")
+            for i in range(620)
+        ]
+        if self.seen_col:
+            fields.append(self.seen_col)
+            values = [(*row, 0) for row in values]
+        frappe.db.bulk_insert("Notification Log", fields=fields, values=values)
+        frappe.db.commit()
+
+        self.assertEqual(_get_unseen_count_for(self.user), 620)
+
+        self._insert_log()
+        frappe.db.commit()
+        self.assertEqual(_get_unseen_count_for(self.user), 621)
+
+        frappe.cache().set(_unseen_key(self.user), 0)
+        reconcile_unseen_counts()
+        self.assertEqual(_get_unseen_count_for(self.user), 621)
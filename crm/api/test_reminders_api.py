@@ -4,7 +4,14 @@ import frappe
 from frappe.utils import now_datetime, add_to_date
 from frappe.tests.utils import FrappeTestCase
 
-from crm.crm.api.reminders import get_delayed_map, recalc_delayed_for_doc
+from crm.api.reminders import (
+    DELAYED_HWM_KEY,
+    _comment_delay_field,
+    flag_overdue_comments_for_leads,
+    get_delayed_map,
+    recalc_delayed_for_doc,
+)
+from crm.utils import DATA_VERSION_KEY
 
 
 class TestDelayedFlag(FrappeTestCase):
@@ -153,3 +160,120 @@ class TestDelayedFlag(FrappeTestCase):
             0,
             "User B stays unaffected even after User A resolves their reminder.",
         )
+
+
+class TestFlagOverdueComments(FrappeTestCase):
+    """flag_overdue_comments_for_leads (set-based, high-water mark) against recalc_delayed_for_doc"""
+
+    def setUp(self):
+        frappe.set_user("Administrator")
+        self.col = _comment_delay_field()
+        now = now_datetime()
+        self.since = add_to_date(now, hours=-3)
+
+        # lead -> (comment offsets in hours, reminder offset in hours)
+        cases = {
+            "no_comments": ([], -2),
+            "comment_older": ([-5, -4], -2),
+            "comment_newer": ([-4, -1], -2),
+            "outside_window": ([-6], -5),
+        }
+        self.leads = {}
+        self.comments = {}
+        for case, (comment_offsets, reminder_offset) in cases.items():
+            lead = frappe.get_doc(
+                {"doctype": "CRM Lead", "lead_name": f"Overdue Flag {case}", "first_name": f"Overdue Flag {case}"}
+            ).insert(ignore_permissions=True)
+            self.leads[case] = lead.name
+            self.comments[case] = [
+                self._add_comment(lead.name, add_to_date(now, hours=offset)) for offset in comment_offsets
+            ]
+            self._add_overdue_reminder(lead.name, add_to_date(now, hours=reminder_offset))
+
+        frappe.db.set_global(DELAYED_HWM_KEY, str(self.since))
+
+    def tearDown(self):
+        frappe.set_user("Administrator")
+        frappe.db.rollback()
+
+    def _add_comment(self, lead, creation):
+        comment = frappe.get_doc(
+            {
+                "doctype": "Comment",
+                "comment_type": "Comment",
+                "reference_doctype": "CRM Lead",
+                "reference_name": lead,
+                "content": "Overdue flag test",
+            }
+        ).insert(ignore_permissions=True)
+        frappe.db.set_value("Comment", comment.name, "creation", creation, update_modified=False)
+        return comment.name
+
+    def _add_overdue_reminder(self, lead, remind_at):
+        # created in the future, then moved to the past without hooks: only the time crossed
+        data = {
+            "doctype": "Reminder",
+            "reference_doctype": "CRM Lead",
+            "reference_name": lead,
+            "remind_at": add_to_date(now_datetime(), days=1),
+            "description": "Overdue flag test",
+        }
+        if frappe.db.has_column("Reminder", "user"):
+            data["user"] = frappe.session.user
+        if frappe.db.has_column("Reminder", "status"):
+            data["status"] = "Open"
+        reminder = frappe.get_doc(data).insert(ignore_permissions=True)
+        frappe.db.set_value("Reminder", reminder.name, "remind_at", remind_at, update_modified=False)
+
+    def _scramble(self):
+        """Set every flag to the wrong value, so that the recalculation has to write all of them."""
+        for case, lead in self.leads.items():
+            frappe.db.set_value("CRM Lead", lead, "delayed", 0 if case == "comment_older" else 1, update_modified=False)
+            if self.col:
+                for comment in self.comments[case]:
+                    frappe.db.set_value("Comment", comment, self.col, 0 if case == "comment_older" else 1, update_modified=False)
+
+    def _state(self, case):
+        lead = self.leads[case]
+        comments = (
+            tuple(frappe.db.get_value("Comment", comment, self.col) for comment in self.comments[case])
+            if self.col
+            else ()
+        )
+        return frappe.db.get_value("CRM Lead", lead, "delayed"), comments
+
+    def test_flags_match_recalc_delayed_for_doc(self):
+        self._scramble()
+        scrambled_outside = self._state("outside_window")
+        result = flag_overdue_comments_for_leads()
+        flagged = {case: self._state(case) for case in self.leads}
+
+        self.assertGreaterEqual(result["processed"], 3)
+        # the reminder crossed before the high-water mark: handled by an earlier run
+        self.assertEqual(flagged["outside_window"], scrambled_outside)
+
+        self._scramble()
+        for case in ("no_comments", "comment_older", "comment_newer"):
+            recalc_delayed_for_doc("CRM Lead", self.leads[case])
+            self.assertEqual(flagged[case], self._state(case), case)
+
+        self.assertEqual(flagged["comment_older"][0], 1)
+        self.assertEqual(flagged["comment_newer"][0], 0)
+        self.assertEqual(flagged["no_comments"][0], 0)
+        if self.col:
+            # only the latest comment is flagged
+            self.assertEqual(flagged["comment_older"][1], (0, 1))
+
+    def test_second_run_without_crossings_touches_nothing(self):
+        flag_overdue_comments_for_leads()
+        state = {case: self._state(case) for case in self.leads}
+        version = frappe.cache().hget(DATA_VERSION_KEY, "CRM Lead")
+        self._scramble()
+        scrambled = {case: self._state(case) for case in self.leads}
+
+        result = flag_overdue_comments_for_leads()
+
+        self.assertEqual(result["processed"], 0)
+        self.assertEqual({case: self._state(case) for case in self.leads}, scrambled)
+        self.assertEqual(frappe.cache().hget(DATA_VERSION_KEY, "CRM Lead"), version)
+        self.assertNotEqual(state, scrambled)
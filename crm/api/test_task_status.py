@@ -0,0 +1,101 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, now_datetime
+
+from crm.api.doc import get_data
+from crm.api.task_status import apply_late_status, get_late_status_fields
+
+
+class TestLateStatus(FrappeTestCase):
+	"""Late status of CRM Tasks computed at read time"""
+
+	def setUp(self):
+		frappe.set_user("Administrator")
+		if not frappe.db.exists("CRM Task Type", "Test Task Type"):
+			frappe.get_doc({"doctype": "CRM Task Type", "task_type": "Test Task Type"}).insert(
+				ignore_permissions=True
+			)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def _insert_task(self, status, due_date):
+		task = frappe.get_doc(
+			{
+				"doctype": "CRM Task",
+				"title": f"Late status {status}",
+				"task_type": "Test Task Type",
+				"status": status,
+			}
+		).insert(ignore_permissions=True)
+		# set afterwards: validate would already turn a past-due task late
+		frappe.db.set_value("CRM Task", task.name, "due_date", due_date, update_modified=False)
+		return task.name
+
+	def test_late_status_fields(self):
+		self.assertEqual(
+			get_late_status_fields("CRM Task", ["name", "status"]), ["name", "status", "due_date"]
+		)
+		self.assertEqual(
+			get_late_status_fields("CRM Task", ["name", "status", "due_date"]), ["name", "status", "due_date"]
+		)
+		self.assertEqual(get_late_status_fields("CRM Task", ["name"]), ["name"])
+		self.assertEqual(get_late_status_fields("CRM Lead", ["name", "status"]), ["name", "status"])
+
+	def test_apply_late_status(self):
+		past, future = add_days(now_datetime(), -1), add_days(now_datetime(), 1)
+		rows = [
+			{"name": "open past due", "status": "Todo", "due_date": past},
+			{"name": "in progress past due", "status": "In Progress", "due_date": past},
+			{"name": "open not due", "status": "Todo", "due_date": future},
+			{"name": "done", "status": "Done", "due_date": past},
+			{"name": "canceled", "status": "Canceled", "due_date": past},
+			{"name": "no due date", "status": "Todo", "due_date": None},
+		]
+
+		apply_late_status("CRM Task", rows, ["name", "status"])
+
+		self.assertEqual(
+			[row["status"] for row in rows],
+			["late", "late", "Todo", "Done", "Canceled", "Todo"],
+		)
+		# due_date was only fetched to compute the status
+		self.assertTrue(all("due_date" not in row for row in rows))
+
+	def test_apply_late_status_keeps_requested_due_date(self):
+		rows = [{"name": "open past due", "status": "Backlog", "due_date": add_days(now_datetime(), -1)}]
+		apply_late_status("CRM Task", rows, ["name", "status", "due_date"])
+		self.assertEqual(rows[0]["status"], "late")
+		self.assertIn("due_date", rows[0])
+
+	def test_get_data_computes_late_status_without_writing(self):
+		past = add_days(now_datetime(), -2)
+		tasks = {
+			self._insert_task("Todo", past): "late",
+			self._insert_task("Done", past): "Done",
+			self._insert_task("Canceled", past): "Canceled",
+			self._insert_task("Todo", None): "Todo",
+		}
+
+		result = get_data(
+			doctype="CRM Task",
+			filters={"name": ["in", list(tasks)]},
+			columns=[{"label": "Status", "type": "Select", "key": "status", "width": "8rem"}],
+			rows=["name", "status"],
+			view={"view_type": "list"},
+		)
+
+		self.assertEqual({row["name"]: row["status"] for row in result["data"]}, tasks)
+		self.assertTrue(all("due_date" not in row for row in result["data"]))
+		# the read path does not write: the stored status is still the original one
+		self.assertEqual(
+			dict(
+				frappe.get_all(
+					"CRM Task", filters={"name": ["in", list(tasks)]}, fields=["name", "status"], as_list=True
+				)
+			),
+			{name: "Todo" if status == "late" else status for name, status in tasks.items()},
+		)
@@ -1,8 +1,11 @@
 import frappe
 from pypika import Criterion
 
+from crm.utils import conditional_get
+
 
 @frappe.whitelist()
+@conditional_get(doctypes=["CRM View Settings"])
 def get_views(doctype):
 	View = frappe.qb.DocType("CRM View Settings")
 	query = (
@@ -1,10 +1,17 @@
 # your_app/dup_leads.py
 import frappe
-from frappe.utils import now
+from frappe.utils import cint, now
+
+from crm.fcrm.doctype.crm_dashboard_rollup.crm_dashboard_rollup import (
+    update_rollup_for_bulk_flag_change,
+    update_rollup_for_value_change,
+)
+from crm.utils import bump_data_version
 
 # ---- config (عدّل لو اسم الحقل/التابل مختلف) ----
 CHILD_TABLE_FIELDNAME = "duplicate_leads"   # child table field in CRM Lead
 CHILD_LINK_FIELDNAME  = "lead"              # Link field inside child table -> CRM Lead
+PHONE_INDEX_DOCTYPE   = "CRM Lead Phone"    # normalized phone -> lead lookup table
 
 # ---------- 1) Utilities ----------
 def normalize_egyptian_phone(number: str) -> str:
@@ -46,25 +53,54 @@ def _collect_normalized_numbers(doc) -> list[str]:
         doc.mobile_no = m
     return [n for n in {p, m} if n]
 
+def _lead_numbers(phone: str | None, mobile_no: str | None) -> list[str]:
+    """Unique normalized numbers of a lead, without touching the doc."""
+    return sorted({n for n in (normalize_egyptian_phone(phone or ""), normalize_egyptian_phone(mobile_no or "")) if n})
+
+def _canonical_rank(row):
+    # original_lead=1 first, then non-duplicate, then oldest creation
+    return (-cint(row.original_lead), cint(row.is_duplicate), row.creation)
+
 def _find_canonical_original(numbers: list[str], exclude_name: str | None = None) -> str | None:
     """Pick a stable canonical:
        1) original_lead=1 first, then 2) non-duplicate (is_duplicate=0), then 3) oldest creation.
+       Uses the normalized phone index (CRM Lead Phone) instead of OR-ing phone / mobile_no.
     """
     if not numbers:
         return None
-    or_filters = (
-        [["CRM Lead", "phone",     "=", n] for n in numbers] +
-        [["CRM Lead", "mobile_no", "=", n] for n in numbers]
-    )
-    rows = frappe.get_all(
-        "CRM Lead",
-        filters={"name": ["!=", exclude_name]} if exclude_name else {},
-        or_filters=or_filters,
-        fields=["name", "creation", "original_lead", "is_duplicate"],
-        order_by="original_lead desc, is_duplicate asc, creation asc",
-        limit=1,
+    rows = frappe.db.sql(
+        f"""
+        select l.name
+        from `tab{PHONE_INDEX_DOCTYPE}` p
+        inner join `tabCRM Lead` l on l.name = p.lead
+        where p.phone in %(numbers)s {"and l.name != %(exclude_name)s" if exclude_name else ""}
+        order by l.original_lead desc, l.is_duplicate asc, l.creation asc
+        limit 1
+        """,
+        {"numbers": tuple(numbers), "exclude_name": exclude_name},
     )
-    return rows[0]["name"] if rows else None
+    return rows[0][0] if rows else None
+
+def resolve_canonical_originals(numbers) -> dict:
+    """Batch lookup: {normalized number: canonical lead row (name, original_lead, is_duplicate, creation)}."""
+    numbers = sorted({n for n in numbers if n})
+    res = {}
+    for i in range(0, len(numbers), 1000):
+        rows = frappe.db.sql(
+            f"""
+            select p.phone, l.name, l.original_lead, l.is_duplicate, l.creation
+            from `tab{PHONE_INDEX_DOCTYPE}` p
+            inner join `tabCRM Lead` l on l.name = p.lead
+            where p.phone in %(numbers)s
+            """,
+            {"numbers": tuple(numbers[i : i + 1000])},
+            as_dict=True,
+        )
+        for row in rows:
+            current = res.get(row.phone)
+            if not current or _canonical_rank(row) < _canonical_rank(current):
+                res[row.phone] = row
+    return res
 
 def _ensure_child_row_once(original, duplicate_name: str, timestamp: str):
     """Idempotent add; prevents self-link & duplicates in child table."""
@@ -99,6 +135,10 @@ def check_duplicates(doc, method):
     if getattr(doc.flags, "ignore_duplicate_check", False):
         return
 
+    # bulk import resolves duplicates for the whole file (see crm.scripts.bulk_import_leads)
+    if frappe.flags.bulk_lead_import:
+        return
+
     numbers = _collect_normalized_numbers(doc)
     if not numbers:
         doc.is_duplicate = 0
@@ -118,6 +158,8 @@ def check_duplicates(doc, method):
 
 def append_to_original_lead(doc, method):
 	"""after_insert / on_submit: append duplicate lead into original's child table."""
+	if frappe.flags.bulk_lead_import:
+		return
 	frappe.db.after_commit(lambda: _append_to_original(doc))
 
 def _append_to_original(doc):
@@ -136,6 +178,8 @@ def _append_to_original(doc):
 
     # تأكيد أعلام التكرار على نفس المستند
     if doc.duplicated_from != true_original or not getattr(doc, "is_duplicate", 0):
+        # set_value يتخطى hooks الـ Lead → انقل الـ Lead بين buckets الـ rollup هنا
+        update_rollup_for_value_change("CRM Lead", doc.name, "is_duplicate", 1)
         frappe.db.set_value(
             "CRM Lead",
             doc.name,
@@ -157,3 +201,192 @@ def _append_to_original(doc):
 
     except Exception:
         frappe.log_error(title="Lead Duplicate Append Error", message=frappe.get_traceback())
+
+# ---------- 3) Normalized phone index ----------
+def update_phone_index(doc, method=None):
+    """on_update: keep the CRM Lead Phone rows of the lead in sync with phone / mobile_no."""
+    if not (doc.has_value_changed("phone") or doc.has_value_changed("mobile_no")):
+        return
+    frappe.db.delete(PHONE_INDEX_DOCTYPE, {"lead": doc.name})
+    _insert_phone_index([(doc.name, n) for n in _lead_numbers(doc.phone, doc.mobile_no)])
+
+def remove_phone_index(doc, method=None):
+    """on_trash: drop the lead from the phone index."""
+    frappe.db.delete(PHONE_INDEX_DOCTYPE, {"lead": doc.name})
+
+def _insert_phone_index(pairs: list[tuple[str, str]]):
+    if not pairs:
+        return
+    timestamp = now()
+    user = frappe.session.user
+    frappe.db.bulk_insert(
+        PHONE_INDEX_DOCTYPE,
+        fields=["name", "creation", "modified", "owner", "modified_by", "lead", "phone"],
+        values=[(frappe.generate_hash(length=12), timestamp, timestamp, user, user, lead, phone) for lead, phone in pairs],
+    )
+
+def rebuild_phone_index(batch_size: int = 5000):
+    """
+    Backfill / reconcile the phone index from CRM Lead (also daily, for phone / mobile_no
+    written with set_value or SQL, which skip the doc hooks).
+    Each batch of leads is replaced in one transaction, so duplicate checks running meanwhile
+    never see a half-empty index.
+
+    Usage: bench --site <site> execute crm.duplicate_lead.rebuild_phone_index
+    """
+    last_name = ""
+    while True:
+        leads = frappe.db.sql(
+            "select name, phone, mobile_no from `tabCRM Lead` where name > %s order by name limit %s",
+            (last_name, batch_size),
+            as_dict=True,
+        )
+        if not leads:
+            break
+        frappe.db.delete(PHONE_INDEX_DOCTYPE, {"lead": ("in", [l.name for l in leads])})
+        _insert_phone_index([(l.name, n) for l in leads for n in _lead_numbers(l.phone, l.mobile_no)])
+        frappe.db.commit()
+        last_name = leads[-1].name
+
+    # rows of leads deleted without hooks
+    frappe.db.sql(
+        f"""
+        delete p from `tab{PHONE_INDEX_DOCTYPE}` p
+        left join `tabCRM Lead` l on l.name = p.lead
+        where l.name is null
+        """
+    )
+    frappe.db.commit()
+
+@frappe.whitelist()
+def enqueue_phone_index_rebuild():
+    frappe.only_for("System Manager")
+    frappe.enqueue("crm.duplicate_lead.rebuild_phone_index", queue="long", job_id="crm_rebuild_phone_index", deduplicate=True)
+
+# ---------- 4) Batch API for imports ----------
+@frappe.whitelist()
+def find_import_duplicates(rows):
+    """
+    Dedupe a whole import file in one pass.
+
+    :param rows: list (or JSON) of {"phone": ..., "mobile_no": ...}, in file order
+    :return: per row: normalized `numbers`, the existing lead it duplicates (`duplicate_of`)
+             or, if none, the earlier row of the file it duplicates (`duplicate_of_row`)
+    """
+    frappe.has_permission("CRM Lead", "create", throw=True)
+    rows = frappe.parse_json(rows) or []
+
+    normalized = [_lead_numbers(r.get("phone"), r.get("mobile_no")) for r in rows]
+    result = []
+    for i, (numbers, canonical) in enumerate(zip(normalized, resolve_import_duplicates(normalized))):
+        result.append(
+            {
+                "row": i,
+                "numbers": numbers,
+                "duplicate_of": canonical[1] if canonical and canonical[0] == "lead" else None,
+                "duplicate_of_row": canonical[1] if canonical and canonical[0] == "row" else None,
+            }
+        )
+    return result
+
+def resolve_import_duplicates(normalized: list[list[str]]) -> list[tuple | None]:
+    """
+    Canonical original of each import row, given its normalized numbers (in file order):
+    ("lead", name) for an existing lead, ("row", index) for an earlier row, None if original.
+    """
+    existing = resolve_canonical_originals(n for numbers in normalized for n in numbers)
+
+    # number -> canonical of the first row in the file that had it
+    seen = {}
+    res = []
+    for i, numbers in enumerate(normalized):
+        matches = [existing[n] for n in numbers if n in existing]
+        if matches:
+            canonical = ("lead", min(matches, key=_canonical_rank).name)
+        else:
+            earlier = [seen[n] for n in numbers if n in seen]
+            canonical = min(earlier, key=lambda c: (c[0] != "lead", c[1])) if earlier else None
+
+        for n in numbers:
+            seen.setdefault(n, canonical or ("row", i))
+        res.append(canonical)
+    return res
+
+def link_duplicates_bulk(links: list[tuple[str, str]]):
+    """
+    Set-based version of `_append_to_original` for many (duplicate, original) pairs:
+    flags both sides and appends the missing Duplicate Lead Entry rows without loading
+    or saving the original leads.
+    """
+    links = [(dup, orig) for dup, orig in links if dup and orig and dup != orig]
+    if not links:
+        return
+
+    originals = sorted({orig for _dup, orig in links})
+    timestamp = now()
+    user = frappe.session.user
+
+    # raw UPDATEs skip the lead hooks → move the new duplicates between dashboard rollup buckets here
+    update_rollup_for_bulk_flag_change("CRM Lead", [dup for dup, _orig in links], "is_duplicate", 1)
+    for i in range(0, len(links), 1000):
+        chunk = links[i : i + 1000]
+        cases = " ".join(["when %s then %s"] * len(chunk))
+        placeholders = ", ".join(["%s"] * len(chunk))
+        frappe.db.sql(
+            f"""
+            update `tabCRM Lead`
+            set is_duplicate = 1, duplicated_from = case name {cases} end
+            where name in ({placeholders})
+            """,
+            [v for pair in chunk for v in pair] + [dup for dup, _orig in chunk],
+        )
+
+    for i in range(0, len(originals), 1000):
+        frappe.db.sql(
+            "update `tabCRM Lead` set original_lead = 1 where name in %(names)s",
+            {"names": tuple(originals[i : i + 1000])},
+        )
+    # `modified` is kept, so ETags of lead lists must be invalidated
+    bump_data_version("CRM Lead")
+
+    # existing child rows: skip pairs already linked, continue idx after the last row
+    existing = set()
+    last_idx = {}
+    for i in range(0, len(originals), 1000):
+        for row in frappe.db.sql(
+            f"""
+            select parent, {CHILD_LINK_FIELDNAME} as lead, idx
+            from `tabDuplicate Lead Entry`
+            where parenttype = 'CRM Lead' and parentfield = %(parentfield)s and parent in %(parents)s
+            """,
+            {"parentfield": CHILD_TABLE_FIELDNAME, "parents": tuple(originals[i : i + 1000])},
+            as_dict=True,
+        ):
+            existing.add((row.lead, row.parent))
+            last_idx[row.parent] = max(last_idx.get(row.parent, 0), cint(row.idx))
+
+    values = []
+    for dup, orig in links:
+        if (dup, orig) in existing:
+            continue
+        existing.add((dup, orig))
+        last_idx[orig] = last_idx.get(orig, 0) + 1
+        values.append(
+            (
+                frappe.generate_hash(length=10), timestamp, timestamp, user, user,
+                orig, "CRM Lead", CHILD_TABLE_FIELDNAME, last_idx[orig],
+                dup, timestamp, "Write Note",
+            )
+        )
+
+    if not values:
+        return
+    frappe.db.bulk_insert(
+        "Duplicate Lead Entry",
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by",
+            "parent", "parenttype", "parentfield", "idx",
+            CHILD_LINK_FIELDNAME, "created_on", "note",
+        ],
+        values=values,
+    )
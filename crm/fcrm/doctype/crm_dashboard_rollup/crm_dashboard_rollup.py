@@ -0,0 +1,228 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint, flt, getdate
+
+# Rollup dimension -> source field, per rolled up doctype
+ROLLUP_DIMENSIONS = {
+	"CRM Lead": {
+		"record_owner": "lead_owner",
+		"project": "project",
+		"status": "status",
+		"source": "source",
+		"territory": "territory",
+		"is_duplicate": "is_duplicate",
+		"delayed": "delayed",
+	},
+	"CRM Deal": {
+		"record_owner": "deal_owner",
+		"status": "status",
+		"source": "source",
+		"territory": "territory",
+	},
+}
+
+# Order of the dimensions in the row key (must match the MD5 key built in `_insert_rollup_rows`)
+KEY_COLUMNS = ["record_owner", "project", "status", "source", "territory", "is_duplicate", "delayed"]
+CHECK_COLUMNS = ("is_duplicate", "delayed")
+
+
+class CRMDashboardRollup(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("CRM Dashboard Rollup", ["reference_doctype", "date"])
+
+
+def get_rollup_row(doc):
+	"""
+	Return the rollup bucket (date + dimensions) and the values a document contributes to it.
+	"""
+	dimensions = ROLLUP_DIMENSIONS.get(doc.doctype)
+	if not dimensions or not doc.get("creation"):
+		return None
+
+	row = {"reference_doctype": doc.doctype, "date": getdate(doc.get("creation"))}
+	for column in KEY_COLUMNS:
+		fieldname = dimensions.get(column)
+		value = doc.get(fieldname) if fieldname else None
+		row[column] = cint(value) if column in CHECK_COLUMNS else (value or "")
+
+	row["deal_value"] = 0
+	if doc.doctype == "CRM Deal":
+		exchange_rate = doc.get("exchange_rate")
+		row["deal_value"] = flt(doc.get("deal_value")) * (1 if exchange_rate is None else flt(exchange_rate))
+
+	return row
+
+
+def get_rollup_key(row):
+	"""
+	Deterministic row name for a rollup bucket, so increments can upsert on the primary key.
+	"""
+	parts = [row["reference_doctype"], str(row["date"])] + [str(row[column]) for column in KEY_COLUMNS]
+	return hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def apply_rollup_delta(row, sign=1):
+	"""
+	Add (sign=1) or remove (sign=-1) one document's contribution to its rollup bucket.
+	"""
+	if not row:
+		return
+
+	params = dict(row)
+	params.update(
+		{
+			"name": get_rollup_key(row),
+			"user": frappe.session.user,
+			"now": frappe.utils.now(),
+			"count_delta": sign,
+			"value_delta": sign * flt(row.get("deal_value")),
+		}
+	)
+	frappe.db.sql(
+		"""
+		INSERT INTO `tabCRM Dashboard Rollup`
+			(name, creation, modified, owner, modified_by, reference_doctype, date,
+			record_owner, project, status, source, territory, is_duplicate, `delayed`,
+			record_count, deal_value)
+		VALUES
+			(%(name)s, %(now)s, %(now)s, %(user)s, %(user)s, %(reference_doctype)s, %(date)s,
+			%(record_owner)s, %(project)s, %(status)s, %(source)s, %(territory)s, %(is_duplicate)s, %(delayed)s,
+			%(count_delta)s, %(value_delta)s)
+		ON DUPLICATE KEY UPDATE
+			record_count = record_count + VALUES(record_count),
+			deal_value = deal_value + VALUES(deal_value),
+			modified = VALUES(modified)
+		""",
+		params,
+	)
+
+
+def move_rollup_row(old_row, new_row):
+	"""
+	Move one document's contribution from its old bucket to its new one (no-op if unchanged).
+	"""
+	if old_row == new_row:
+		return
+	apply_rollup_delta(old_row, -1)
+	apply_rollup_delta(new_row, 1)
+
+
+def on_update(doc, method=None):
+	"""
+	Keep the rollup in sync on insert and save of CRM Lead / CRM Deal.
+	"""
+	before = doc.get_doc_before_save()
+	move_rollup_row(get_rollup_row(before) if before else None, get_rollup_row(doc))
+
+
+def on_trash(doc, method=None):
+	apply_rollup_delta(get_rollup_row(doc), -1)
+
+
+def update_rollup_for_value_change(doctype, name, fieldname, value):
+	"""
+	Move a document between buckets when a dimension is changed with `frappe.db.set_value`,
+	which bypasses document hooks. Call this before writing the new value.
+	"""
+	dimensions = ROLLUP_DIMENSIONS.get(doctype, {})
+	if fieldname not in dimensions.values():
+		return
+
+	fields = ["creation", *dimensions.values()]
+	if doctype == "CRM Deal":
+		fields += ["deal_value", "exchange_rate"]
+	current = frappe.db.get_value(doctype, name, fields, as_dict=True)
+	if not current:
+		return
+
+	current.doctype = doctype
+	old_row = get_rollup_row(current)
+	current[fieldname] = value
+	move_rollup_row(old_row, get_rollup_row(current))
+
+
+def _rollup_columns(doctype, overrides=None):
+	"""
+	SQL expressions of the key columns of `doctype`, in KEY_COLUMNS order; `overrides` replaces
+	some of them (column -> SQL expression).
+	"""
+	dimensions = ROLLUP_DIMENSIONS[doctype]
+	overrides = overrides or {}
+	columns = []
+	for column in KEY_COLUMNS:
+		fieldname = dimensions.get(column)
+		if column in overrides:
+			columns.append(overrides[column])
+		elif column in CHECK_COLUMNS:
+			columns.append(f"COALESCE(`{fieldname}`, 0)" if fieldname else "0")
+		else:
+			columns.append(f"COALESCE(`{fieldname}`, '')" if fieldname else "''")
+	return columns
+
+
+def _insert_rollup_rows(doctype, columns, condition="", params=None, sign=1):
+	"""
+	Add (sign=1) or remove (sign=-1) the grouped contribution of the `doctype` rows matching
+	`condition` to the buckets given by `columns`.
+	"""
+	key_expr = "MD5(CONCAT_WS('|', %(doctype)s, DATE(creation), {}))".format(
+		", ".join(f"CAST({col} AS CHAR)" for col in columns)
+	)
+	value_expr = "SUM(COALESCE(deal_value, 0) * IFNULL(exchange_rate, 1))" if doctype == "CRM Deal" else "0"
+	frappe.db.sql(
+		f"""
+		INSERT INTO `tabCRM Dashboard Rollup`
+			(name, creation, modified, owner, modified_by, reference_doctype, date,
+			record_owner, project, status, source, territory, is_duplicate, `delayed`,
+			record_count, deal_value)
+		SELECT
+			{key_expr}, %(now)s, %(now)s, %(user)s, %(user)s, %(doctype)s, DATE(creation),
+			{", ".join(columns)},
+			{sign} * COUNT(*), {sign} * {value_expr}
+		FROM `tab{doctype}`
+		{condition}
+		GROUP BY DATE(creation), {", ".join(columns)}
+		ON DUPLICATE KEY UPDATE
+			record_count = record_count + VALUES(record_count),
+			deal_value = deal_value + VALUES(deal_value),
+			modified = VALUES(modified)
+		""",
+		{**(params or {}), "doctype": doctype, "now": frappe.utils.now(), "user": frappe.session.user},
+	)
+
+
+def update_rollup_for_bulk_flag_change(doctype, names, fieldname, value):
+	"""
+	Set-based `update_rollup_for_value_change` for a check field: move every document in `names`
+	whose `fieldname` differs from `value` to the bucket with the new value.
+	Call this before writing the new values.
+	"""
+	column = next((c for c, f in ROLLUP_DIMENSIONS.get(doctype, {}).items() if f == fieldname), None)
+	if column not in CHECK_COLUMNS or not names:
+		return
+
+	condition = f"WHERE name IN %(names)s AND COALESCE(`{fieldname}`, 0) != %(value)s"
+	params = {"names": tuple(names), "value": cint(value)}
+	_insert_rollup_rows(doctype, _rollup_columns(doctype), condition, params, sign=-1)
+	_insert_rollup_rows(doctype, _rollup_columns(doctype, {column: str(cint(value))}), condition, params)
+
+
+def rebuild_dashboard_rollup(doctype=None):
+	"""
+	Rebuild the rollup from the source tables (backfill / reconciliation).
+
+	Usage: bench --site <site> execute crm.fcrm.doctype.crm_dashboard_rollup.crm_dashboard_rollup.rebuild_dashboard_rollup
+	"""
+	doctypes = [doctype] if doctype else list(ROLLUP_DIMENSIONS)
+	for dt in doctypes:
+		frappe.db.delete("CRM Dashboard Rollup", {"reference_doctype": dt})
+		_insert_rollup_rows(dt, _rollup_columns(dt))
+	frappe.db.commit()
@@ -0,0 +1,175 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import random
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import IntegrationTestCase, UnitTestCase
+from frappe.utils import cint, today
+
+from crm.api.dashboard import get_lead_status_counts, get_total_leads
+from crm.duplicate_lead import _append_to_original
+from crm.fcrm.doctype.crm_dashboard_rollup.crm_dashboard_rollup import (
+	KEY_COLUMNS,
+	get_rollup_key,
+	get_rollup_row,
+	rebuild_dashboard_rollup,
+)
+from crm.fcrm.doctype.crm_lead.crm_lead import CRMLead, convert_to_deal
+
+
+class TestCRMDashboardRollup(UnitTestCase):
+	def test_rollup_row_normalizes_dimensions(self):
+		lead = frappe._dict(
+			doctype="CRM Lead",
+			creation="2026-01-05 10:30:00",
+			lead_owner="sales@example.com",
+			status="New",
+			is_duplicate=None,
+		)
+		row = get_rollup_row(lead)
+
+		self.assertEqual(str(row["date"]), "2026-01-05")
+		self.assertEqual(row["record_owner"], "sales@example.com")
+		self.assertEqual(row["project"], "")
+		self.assertEqual(row["is_duplicate"], 0)
+
+	def test_rollup_key_is_stable_per_bucket(self):
+		lead = frappe._dict(doctype="CRM Lead", creation="2026-01-05 10:30:00", status="New")
+		same_day = frappe._dict(doctype="CRM Lead", creation="2026-01-05 18:00:00", status="New")
+		other_status = frappe._dict(doctype="CRM Lead", creation="2026-01-05 18:00:00", status="Won")
+
+		self.assertEqual(get_rollup_key(get_rollup_row(lead)), get_rollup_key(get_rollup_row(same_day)))
+		self.assertNotEqual(get_rollup_key(get_rollup_row(lead)), get_rollup_key(get_rollup_row(other_status)))
+
+
+class IntegrationTestCRMDashboardRollup(IntegrationTestCase):
+	"""The rollup kept by the lead hooks against the CRM Lead table (leads of one test owner)"""
+
+	def setUp(self):
+		self.owner = "rollup.owner@example.com"
+		if not frappe.db.exists("User", self.owner):
+			frappe.get_doc({"doctype": "User", "email": self.owner, "first_name": "Rollup"}).insert(
+				ignore_permissions=True
+			)
+		self.statuses = ["Rollup Status A", "Rollup Status B"]
+		for status in self.statuses:
+			if not frappe.db.exists("CRM Lead Status", status):
+				frappe.get_doc({"doctype": "CRM Lead Status", "lead_status": status}).insert(ignore_permissions=True)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def _insert_lead(self, status, mobile_no=None):
+		return frappe.get_doc(
+			{
+				"doctype": "CRM Lead",
+				"first_name": "Rollup Lead",
+				"mobile_no": mobile_no or f"+2011{random.randint(10**7, 10**8 - 1)}",
+				"status": status,
+				"lead_owner": self.owner,
+			}
+		).insert(ignore_permissions=True)
+
+	def _rollup_rows(self):
+		"""Non-empty rollup buckets of the test owner: {(key columns...): record_count}."""
+		rows = frappe.get_all(
+			"CRM Dashboard Rollup",
+			filters={"reference_doctype": "CRM Lead", "record_owner": self.owner},
+			fields=["date", *KEY_COLUMNS, "record_count"],
+		)
+		return {
+			(str(row.date), *(row[column] for column in KEY_COLUMNS)): cint(row.record_count)
+			for row in rows
+			if cint(row.record_count)
+		}
+
+	def _rollup_by(self, column):
+		counts = {}
+		for key, count in self._rollup_rows().items():
+			value = key[1 + KEY_COLUMNS.index(column)]
+			counts[value] = counts.get(value, 0) + count
+		return {value: count for value, count in counts.items() if count}
+
+	def _raw_by(self, fieldname):
+		rows = frappe.get_all(
+			"CRM Lead",
+			filters={"lead_owner": self.owner},
+			fields=[fieldname, "count(*) as total"],
+			group_by=fieldname,
+		)
+		return {row[fieldname] if fieldname != "is_duplicate" else cint(row[fieldname]): row.total for row in rows}
+
+	def test_status_change_moves_lead_between_buckets(self):
+		lead = self._insert_lead(self.statuses[0])
+		self.assertEqual(self._rollup_by("status"), {self.statuses[0]: 1})
+
+		lead.status = self.statuses[1]
+		lead.save(ignore_permissions=True)
+		self.assertEqual(self._rollup_by("status"), {self.statuses[1]: 1})
+		self.assertEqual(self._rollup_by("status"), self._raw_by("status"))
+
+	def test_trash_subtracts_lead(self):
+		self._insert_lead(self.statuses[0])
+		lead = self._insert_lead(self.statuses[0])
+		self.assertEqual(self._rollup_by("status"), {self.statuses[0]: 2})
+
+		frappe.delete_doc("CRM Lead", lead.name, force=1, ignore_permissions=True)
+		self.assertEqual(self._rollup_by("status"), {self.statuses[0]: 1})
+
+	def test_duplicate_flag_set_after_insert_moves_lead(self):
+		original = self._insert_lead(self.statuses[0])
+		duplicate = self._insert_lead(self.statuses[0])
+
+		# what after_insert sees for a lead that duplicates an existing number
+		doc = frappe.get_doc("CRM Lead", duplicate.name)
+		doc.is_duplicate = 1
+		doc.mobile_no = original.mobile_no
+		_append_to_original(doc)
+
+		self.assertEqual(frappe.db.get_value("CRM Lead", duplicate.name, "is_duplicate"), 1)
+		self.assertEqual(self._rollup_by("is_duplicate"), {0: 1, 1: 1})
+		self.assertEqual(self._rollup_by("is_duplicate"), self._raw_by("is_duplicate"))
+
+	def test_convert_to_deal_moves_lead_to_qualified(self):
+		if not frappe.db.exists("CRM Lead Status", "Qualified"):
+			frappe.get_doc({"doctype": "CRM Lead Status", "lead_status": "Qualified"}).insert(ignore_permissions=True)
+		lead = self._insert_lead(self.statuses[0])
+		self.assertEqual(self._rollup_by("status"), {self.statuses[0]: 1})
+
+		# only the status change matters here, not the contact / organization / deal it creates
+		with patch.multiple(
+			CRMLead, create_contact=lambda *args: None, create_organization=lambda *args: None, create_deal=lambda *args: None
+		):
+			convert_to_deal(lead.name)
+
+		self.assertEqual(self._rollup_by("status"), {"Qualified": 1})
+		self.assertEqual(self._rollup_by("status"), self._raw_by("status"))
+
+	def test_rebuild_reproduces_incremental_rows(self):
+		leads = [self._insert_lead(status) for status in self.statuses + self.statuses[:1]]
+		leads[0].status = self.statuses[1]
+		leads[0].save(ignore_permissions=True)
+		frappe.delete_doc("CRM Lead", leads[1].name, force=1, ignore_permissions=True)
+
+		incremental = self._rollup_rows()
+		# keep the test transaction open so it can be rolled back
+		with patch.object(frappe.db, "commit"):
+			rebuild_dashboard_rollup("CRM Lead")
+
+		self.assertEqual(self._rollup_rows(), incremental)
+
+	def test_dashboard_cards_match_lead_table(self):
+		for status in (self.statuses[0], self.statuses[0], self.statuses[1]):
+			self._insert_lead(status)
+
+		for from_date, to_date in (("", ""), (today(), today())):
+			total = get_total_leads(from_date, to_date, user=self.owner)
+			self.assertEqual(total["value"], frappe.db.count("CRM Lead", {"lead_owner": self.owner}))
+
+			status_counts = get_lead_status_counts(from_date, to_date, user=self.owner)
+			self.assertEqual(
+				{status: cint(counts["current_count"]) for status, counts in status_counts.items() if cint(counts["current_count"])},
+				self._raw_by("status"),
+			)
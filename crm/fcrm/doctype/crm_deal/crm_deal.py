@@ -135,7 +135,7 @@ class CRMDeal(Document):
 		"""
 		if not self.sla:
 			return
-		sla = frappe.get_last_doc("CRM Service Level Agreement", {"name": self.sla})
+		sla = frappe.get_cached_doc("CRM Service Level Agreement", self.sla)
 		if sla:
 			sla.apply(self)
 
@@ -8,12 +8,18 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import random_string
 
+from crm.utils import conditional_get
+
 
 class CRMFieldsLayout(Document):
 	pass
 
 
 @frappe.whitelist()
+@conditional_get(
+	doctypes=["CRM Fields Layout"],
+	meta=lambda kwargs: [kwargs.get("doctype"), kwargs.get("parent_doctype")],
+)
 def get_fields_layout(doctype: str, type: str, parent_doctype: str | None = None):
 	tabs = []
 	layout = None
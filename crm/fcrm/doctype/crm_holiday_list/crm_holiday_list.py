@@ -4,6 +4,15 @@
 # import frappe
 from frappe.model.document import Document
 
+from crm.fcrm.doctype.crm_service_level_agreement.crm_service_level_agreement import (
+	clear_sla_calendar_cache,
+)
+
 
 class CRMHolidayList(Document):
-	pass
+	def on_update(self):
+		# SLA calendars compile the holidays in
+		clear_sla_calendar_cache()
+
+	def on_trash(self):
+		clear_sla_calendar_cache()
@@ -7,6 +7,7 @@ from frappe.desk.form.assign_to import add as assign
 from frappe.model.document import Document
 from frappe.utils import has_gravatar, validate_email_address
 
+from crm.fcrm.doctype.crm_dashboard_rollup.crm_dashboard_rollup import update_rollup_for_value_change
 from crm.fcrm.doctype.crm_service_level_agreement.utils import get_sla
 from crm.fcrm.doctype.crm_status_change_log.crm_status_change_log import (
 	add_status_change_log,
@@ -339,7 +340,7 @@ class CRMLead(Document):
 		"""
 		if not self.sla:
 			return
-		sla = frappe.get_last_doc("CRM Service Level Agreement", {"name": self.sla})
+		sla = frappe.get_cached_doc("CRM Service Level Agreement", self.sla)
 		if sla:
 			sla.apply(self)
 
@@ -434,6 +435,8 @@ def convert_to_deal(lead, doc=None, deal=None, existing_contact=None, existing_o
 
 	lead = frappe.get_cached_doc("CRM Lead", lead)
 	if frappe.db.exists("CRM Lead Status", "Qualified"):
+		# db_set bypasses document hooks, so move the lead between dashboard rollup buckets here
+		update_rollup_for_value_change("CRM Lead", lead.name, "status", "Qualified")
 		lead.db_set("status", "Qualified")
 	lead.db_set("converted", 1)
 	if lead.sla and frappe.db.exists("CRM Communication Status", "Replied"):
@@ -0,0 +1,48 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests import IntegrationTestCase
+
+from crm.duplicate_lead import find_import_duplicates
+
+
+class IntegrationTestCRMLeadPhone(IntegrationTestCase):
+	def test_index_follows_lead_numbers(self):
+		lead = frappe.get_doc(
+			{"doctype": "CRM Lead", "first_name": "Phone Index", "mobile_no": "0100 123 4567"}
+		).insert(ignore_permissions=True)
+		self.assertEqual(
+			frappe.get_all("CRM Lead Phone", filters={"lead": lead.name}, pluck="phone"), ["+201001234567"]
+		)
+
+		lead.phone = "+20 111 222 3333"
+		lead.save(ignore_permissions=True)
+		self.assertEqual(
+			sorted(frappe.get_all("CRM Lead Phone", filters={"lead": lead.name}, pluck="phone")),
+			["+201001234567", "+201112223333"],
+		)
+
+		lead.delete(ignore_permissions=True)
+		self.assertFalse(frappe.db.exists("CRM Lead Phone", {"lead": lead.name}))
+
+	def test_find_import_duplicates(self):
+		lead = frappe.get_doc(
+			{"doctype": "CRM Lead", "first_name": "Import Original", "mobile_no": "01009998877"}
+		).insert(ignore_permissions=True)
+
+		result = find_import_duplicates(
+			[
+				{"mobile_no": "+201009998877"},
+				{"mobile_no": "01205550000"},
+				{"phone": "١٢٠٥٥٥٠٠٠٠", "mobile_no": "01206660000"},
+				{"mobile_no": "01206660000"},
+			]
+		)
+
+		self.assertEqual(result[0]["duplicate_of"], lead.name)
+		self.assertIsNone(result[1]["duplicate_of"])
+		self.assertIsNone(result[1]["duplicate_of_row"])
+		self.assertEqual(result[2]["duplicate_of_row"], 1)
+		# row 3 shares a number with row 2, which is itself a duplicate of row 1
+		self.assertEqual(result[3]["duplicate_of_row"], 1)
@@ -0,0 +1,104 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+from crm.utils import bump_data_version
+
+# Who can see a lead besides its owner: users with an open ToDo on it, and the team
+# leaders of those users. Each row is (user, lead); `name` is md5(user|lead) so refreshes
+# can INSERT IGNORE.
+VISIBILITY_QUERY = """
+	select td.`allocated_to` as user, td.`reference_name` as lead
+	from `tabToDo` td
+	where td.`reference_type` = 'CRM Lead'
+		and td.`status` = 'Open'
+		and ifnull(td.`allocated_to`, '') != ''
+		{lead_condition}
+	union
+	select t.`team_leader` as user, td.`reference_name` as lead
+	from `tabToDo` td
+	join `tabMember` m on m.`member` = td.`allocated_to` and m.`parenttype` = 'Team'
+	join `tabTeam` t on t.`name` = m.`parent`
+	where td.`reference_type` = 'CRM Lead'
+		and td.`status` = 'Open'
+		and ifnull(t.`team_leader`, '') != ''
+		{lead_condition}
+"""
+
+
+class CRMLeadVisibility(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("CRM Lead Visibility", ["user", "lead"])
+
+
+def _insert_visibility(lead_condition="", params=None):
+	query = VISIBILITY_QUERY.format(lead_condition=lead_condition)
+	frappe.db.sql(
+		f"""
+		insert ignore into `tabCRM Lead Visibility`
+			(name, creation, modified, owner, modified_by, user, lead)
+		select md5(concat(v.user, '|', v.lead)), %(now)s, %(now)s, %(by)s, %(by)s, v.user, v.lead
+		from ({query}) v
+		""",
+		{**(params or {}), "now": frappe.utils.now(), "by": frappe.session.user},
+	)
+
+
+def refresh_lead_visibility(leads):
+	"""
+	Recompute the visibility rows of the given leads.
+	"""
+	leads = sorted({lead for lead in leads if lead})
+	for i in range(0, len(leads), 1000):
+		chunk = tuple(leads[i : i + 1000])
+		frappe.db.delete("CRM Lead Visibility", {"lead": ["in", chunk]})
+		_insert_visibility("and td.`reference_name` in %(leads)s", {"leads": chunk})
+	if leads:
+		# raw deletes leave no trace in `modified`: invalidate the ETags of lead lists
+		bump_data_version("CRM Lead Visibility")
+
+
+def refresh_visibility_for_users(users):
+	"""
+	Recompute the leads assigned to `users`, e.g. after they joined or left a team.
+	"""
+	users = tuple({user for user in users if user})
+	if not users:
+		return
+	leads = frappe.get_all(
+		"ToDo",
+		filters={"reference_type": "CRM Lead", "status": "Open", "allocated_to": ["in", users]},
+		pluck="reference_name",
+		distinct=True,
+	)
+	refresh_lead_visibility(leads)
+
+
+def on_todo_change(doc, method=None):
+	"""
+	ToDo on_update / after_delete: assignments of a lead changed.
+	"""
+	if doc.reference_type == "CRM Lead" and doc.reference_name:
+		refresh_lead_visibility([doc.reference_name])
+
+
+def on_lead_trash(doc, method=None):
+	frappe.db.delete("CRM Lead Visibility", {"lead": doc.name})
+	bump_data_version("CRM Lead Visibility")
+
+
+def rebuild_lead_visibility():
+	"""
+	Rebuild the whole table (backfill / reconciliation of direct SQL writes to ToDo).
+
+	Usage: bench --site <site> execute crm.fcrm.doctype.crm_lead_visibility.crm_lead_visibility.rebuild_lead_visibility
+	"""
+	frappe.db.delete("CRM Lead Visibility")
+	_insert_visibility()
+	bump_data_version("CRM Lead Visibility")
+	frappe.db.commit()
@@ -0,0 +1,61 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests import IntegrationTestCase
+
+
+class IntegrationTestCRMLeadVisibility(IntegrationTestCase):
+	def setUp(self):
+		self.agent = self._ensure_user("visibility.agent@example.com")
+		self.leader = self._ensure_user("visibility.leader@example.com")
+		self.team = frappe.get_doc(
+			{"doctype": "Team", "team_leader": self.leader, "team_member": [{"member": self.agent}]}
+		).insert(ignore_permissions=True)
+		self.lead = frappe.get_doc({"doctype": "CRM Lead", "first_name": "Visibility Test"}).insert(
+			ignore_permissions=True
+		)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def _ensure_user(self, email):
+		if not frappe.db.exists("User", email):
+			frappe.get_doc({"doctype": "User", "email": email, "first_name": email.split("@")[0]}).insert(
+				ignore_permissions=True
+			)
+		return email
+
+	def _visible_to(self):
+		return sorted(frappe.get_all("CRM Lead Visibility", filters={"lead": self.lead.name}, pluck="user"))
+
+	def test_assignment_grants_visibility_to_user_and_team_leader(self):
+		todo = frappe.get_doc(
+			{
+				"doctype": "ToDo",
+				"allocated_to": self.agent,
+				"reference_type": "CRM Lead",
+				"reference_name": self.lead.name,
+				"description": "Follow up",
+			}
+		).insert(ignore_permissions=True)
+		self.assertEqual(self._visible_to(), sorted([self.agent, self.leader]))
+
+		todo.status = "Cancelled"
+		todo.save(ignore_permissions=True)
+		self.assertEqual(self._visible_to(), [])
+
+	def test_team_change_updates_leader_visibility(self):
+		frappe.get_doc(
+			{
+				"doctype": "ToDo",
+				"allocated_to": self.agent,
+				"reference_type": "CRM Lead",
+				"reference_name": self.lead.name,
+				"description": "Follow up",
+			}
+		).insert(ignore_permissions=True)
+
+		self.team.team_member = []
+		self.team.save(ignore_permissions=True)
+		self.assertEqual(self._visible_to(), [self.agent])
@@ -3,17 +3,20 @@
 
 import frappe
 from frappe import _
-from datetime import timedelta
 from frappe.model.document import Document
 from frappe.utils import (
-	add_to_date,
 	get_datetime,
 	get_weekdays,
 	getdate,
 	now_datetime,
-	time_diff_in_seconds,
+	to_timedelta,
 )
+
 from crm.fcrm.doctype.crm_service_level_agreement.utils import get_context
+from crm.fcrm.doctype.crm_service_level_agreement.working_time import SLACalendar
+
+# Redis hash of compiled `SLACalendar`s, keyed by SLA name
+SLA_CALENDAR_CACHE_KEY = "crm_sla_calendar"
 
 
 class CRMServiceLevelAgreement(Document):
@@ -21,6 +24,13 @@ class CRMServiceLevelAgreement(Document):
 		self.validate_default()
 		self.validate_condition()
 
+	def on_update(self):
+		# Working hours (CRM Service Day) are a child table, so they are saved through here too
+		clear_sla_calendar_cache(self.name)
+
+	def on_trash(self):
+		clear_sla_calendar_cache(self.name)
+
 	def validate_default(self):
 		if self.default:
 			other_slas = frappe.get_all(
@@ -112,62 +122,20 @@ class CRMServiceLevelAgreement(Document):
 		start_at: str,
 		duration_seconds: int,
 	):
-		res = get_datetime(start_at)
-		time_needed = duration_seconds
-		holidays = self.get_holidays()
-		weekdays = get_weekdays()
-		workdays = self.get_workdays()
-		while time_needed:
-			today = res
-			today_day = getdate(today)
-			today_weekday = weekdays[today.weekday()]
-			is_workday = today_weekday in workdays
-			is_holiday = today_day in holidays
-			if is_holiday or not is_workday:
-				res = add_to_date(res, days=1, as_datetime=True)
-				continue
-			today_workday = workdays[today_weekday]
-			now_in_seconds = time_diff_in_seconds(today, today_day)
-			start_time = max(today_workday.start_time.total_seconds(), now_in_seconds)
-			till_start_time = max(start_time - now_in_seconds, 0)
-			end_time = max(today_workday.end_time.total_seconds(), now_in_seconds)
-			time_left = max(end_time - start_time, 0)
-			if not time_left:
-				res = getdate(add_to_date(res, days=1, as_datetime=True))
-				continue
-			time_taken = min(time_needed, time_left)
-			time_needed -= time_taken
-			time_required = till_start_time + time_taken
-			res = add_to_date(res, seconds=time_required, as_datetime=True)
-		return res
+		"""
+		Get the datetime at which `duration_seconds` of working time have passed since `start_at`
+		"""
+		return self.get_calendar().add_working_seconds(get_datetime(start_at), duration_seconds)
 
 	def calc_elapsed_time(self, start_time, end_time) -> float:
 		"""
-		Get took from start to end, excluding non-working hours
+		Get took from start to end, excluding non-working hours and holidays
 
 		:param start_at: Date at which calculation starts
 		:param end_at: Date at which calculation ends
 		:return: Number of seconds
 		"""
-		start_time = get_datetime(start_time)
-		end_time = get_datetime(end_time)
-		holiday_list = []
-		working_day_list = self.get_working_days()
-		working_hours = self.get_working_hours()
-
-		total_seconds = 0
-		current_time = start_time
-
-		while current_time < end_time:
-			in_holiday_list = current_time.date() in holiday_list
-			not_in_working_day_list = get_weekdays()[current_time.weekday()] not in working_day_list
-			if in_holiday_list or not_in_working_day_list or not self.is_working_time(current_time, working_hours):
-				current_time += timedelta(seconds=1)
-				continue
-			total_seconds += 1
-			current_time += timedelta(seconds=1)
-
-		return total_seconds
+		return self.get_calendar().get_working_seconds(get_datetime(start_time), get_datetime(end_time))
 
 	def get_priorities(self):
 		"""
@@ -188,32 +156,23 @@ class CRMServiceLevelAgreement(Document):
 
 		return self.priorities[0].priority
 
-	def get_workdays(self) -> dict[str, dict]:
+	def get_calendar(self) -> SLACalendar:
 		"""
-		Return workdays related info as a dict. With `workday` as key
+		Return the compiled working-time calendar, cached across requests until the SLA
+		or its holiday list changes
 		"""
-		res = {}
-		for row in self.working_hours:
-			res[row.workday] = row
-		return res
-
-	def get_working_days(self) -> dict[str, dict]:
-		workdays = []
-		for row in self.working_hours:
-			workdays.append(row.workday)
-		return workdays
+		if self.is_new():
+			return self.compile_calendar()
+		return frappe.cache().hget(SLA_CALENDAR_CACHE_KEY, self.name, generator=self.compile_calendar)
 
-	def get_working_hours(self) -> dict[str, dict]:
-		res = {}
+	def compile_calendar(self) -> SLACalendar:
+		weekdays = get_weekdays()
+		windows = {}
 		for row in self.working_hours:
-			res[row.workday] = (row.start_time, row.end_time)
-		return res
-
-	def is_working_time(self, date_time, working_hours):
-		day_of_week = get_weekdays()[date_time.weekday()]
-		start_time, end_time = working_hours.get(day_of_week, (0, 0))
-		date_time = timedelta(hours=date_time.hour, minutes=date_time.minute, seconds=date_time.second)
-		return start_time <= date_time < end_time
+			windows.setdefault(weekdays.index(row.workday), []).append(
+				(to_timedelta(row.start_time), to_timedelta(row.end_time))
+			)
+		return SLACalendar(windows, self.get_holidays())
 
 	def get_holidays(self):
 		res = []
@@ -221,5 +180,15 @@ class CRMServiceLevelAgreement(Document):
 			return res
 		holiday_list = frappe.get_doc("CRM Holiday List", self.holiday_list)
 		for row in holiday_list.holidays:
-			res.append(row.date)
-		return res
+			res.append(getdate(row.date))
+		return set(res)
+
+
+def clear_sla_calendar_cache(sla=None):
+	"""
+	Drop the compiled calendar of `sla`, or of all SLAs
+	"""
+	if sla:
+		frappe.cache().hdel(SLA_CALENDAR_CACHE_KEY, sla)
+	else:
+		frappe.cache().delete_value(SLA_CALENDAR_CACHE_KEY)
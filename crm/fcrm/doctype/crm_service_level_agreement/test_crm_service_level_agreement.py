@@ -1,9 +1,103 @@
 # Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
 # See license.txt
 
-# import frappe
+import pickle
+import random
+import time
+from datetime import datetime, timedelta
+
 from frappe.tests import UnitTestCase
 
+from crm.fcrm.doctype.crm_service_level_agreement.working_time import (
+	SLACalendar,
+	add_working_seconds,
+	get_working_seconds,
+)
+
+# Monday to Friday, 09:00 - 17:30
+WORKING_HOURS = {weekday: (timedelta(hours=9), timedelta(hours=17, minutes=30)) for weekday in range(5)}
+
+
+def per_second_elapsed_time(start, end, working_hours):
+	# Reference: the per-second loop `calc_elapsed_time` used before the interval engine
+	total = 0
+	current = start
+	while current < end:
+		window = working_hours.get(current.weekday())
+		time_of_day = timedelta(hours=current.hour, minutes=current.minute, seconds=current.second)
+		if window and window[0] <= time_of_day < window[1]:
+			total += 1
+		current += timedelta(seconds=1)
+	return total
+
 
 class TestCRMServiceLevelAgreement(UnitTestCase):
-	pass
+	def test_elapsed_time_matches_per_second_loop(self):
+		rng = random.Random(42)
+		for _i in range(25):
+			start = datetime(2026, 1, 1) + timedelta(
+				seconds=rng.randint(0, 14 * 86400), microseconds=rng.choice([0, rng.randint(0, 999999)])
+			)
+			end = start + timedelta(seconds=rng.randint(0, 36 * 3600), microseconds=rng.randint(0, 999999))
+			self.assertEqual(
+				get_working_seconds(start, end, WORKING_HOURS),
+				per_second_elapsed_time(start, end, WORKING_HOURS),
+				f"{start} -> {end}",
+			)
+
+	def test_elapsed_time_skips_holidays(self):
+		# Monday 2026-01-05 is a holiday, so only Tuesday counts
+		start, end = datetime(2026, 1, 5), datetime(2026, 1, 7)
+		self.assertEqual(get_working_seconds(start, end, WORKING_HOURS), 2 * 8.5 * 3600)
+		self.assertEqual(get_working_seconds(start, end, WORKING_HOURS, {start.date()}), 8.5 * 3600)
+
+	def test_add_working_seconds(self):
+		friday_afternoon = datetime(2026, 1, 9, 16, 30)
+		# 1h left on Friday, the rest on Monday morning
+		self.assertEqual(
+			add_working_seconds(friday_afternoon, 2 * 3600, WORKING_HOURS), datetime(2026, 1, 12, 10, 0)
+		)
+		# Starting outside working hours waits for the next window
+		self.assertEqual(
+			add_working_seconds(datetime(2026, 1, 10, 11, 0), 60, WORKING_HOURS), datetime(2026, 1, 12, 9, 1)
+		)
+		self.assertEqual(add_working_seconds(friday_afternoon, 0, WORKING_HOURS), friday_afternoon)
+		self.assertIsNone(add_working_seconds(friday_afternoon, 60, {}))
+
+	def test_add_working_seconds_is_inverse_of_elapsed_time(self):
+		start = datetime(2026, 1, 7, 12, 15)
+		for seconds in (1, 3600, 8.5 * 3600, 5 * 8.5 * 3600 + 17):
+			end = add_working_seconds(start, seconds, WORKING_HOURS)
+			self.assertEqual(get_working_seconds(start, end, WORKING_HOURS), seconds)
+
+	def test_month_long_span_is_sub_millisecond(self):
+		start, end = datetime(2026, 1, 1, 10), datetime(2026, 1, 31, 10)
+		runs = 200
+		began = time.perf_counter()
+		for _i in range(runs):
+			get_working_seconds(start, end, WORKING_HOURS)
+		self.assertLess((time.perf_counter() - began) / runs, 0.001)
+
+	def test_calendar_with_split_shifts(self):
+		# Monday: 09:00 - 12:00 and 13:00 - 17:00 (given out of order)
+		calendar = SLACalendar(
+			{0: [(timedelta(hours=13), timedelta(hours=17)), (timedelta(hours=9), timedelta(hours=12))]}
+		)
+		monday = datetime(2026, 1, 5)
+		self.assertEqual(calendar.get_working_seconds(monday, monday + timedelta(days=1)), 7 * 3600)
+		self.assertEqual(calendar.add_working_seconds(monday + timedelta(hours=11), 2 * 3600), monday + timedelta(hours=14))
+		# Three Mondays of working time from Monday evening ends on the third next Monday at 17:00
+		self.assertEqual(
+			calendar.add_working_seconds(monday + timedelta(hours=18), 3 * 7 * 3600), monday + timedelta(days=21, hours=17)
+		)
+
+	def test_calendar_is_immutable_and_picklable(self):
+		holiday = datetime(2026, 1, 6).date()
+		calendar = SLACalendar({weekday: [window] for weekday, window in WORKING_HOURS.items()}, [holiday])
+		with self.assertRaises(AttributeError):
+			calendar.week_seconds = 0
+
+		restored = pickle.loads(pickle.dumps(calendar))
+		self.assertTrue(restored.is_holiday(holiday))
+		self.assertEqual(restored.week_seconds, calendar.week_seconds)
+		self.assertEqual(restored.holiday_bitmap, calendar.holiday_bitmap)
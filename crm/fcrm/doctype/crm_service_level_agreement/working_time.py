@@ -0,0 +1,210 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+
+
+class SLACalendar:
+	"""
+	Immutable working-time calendar of a Service Level Agreement
+
+	Holds the sorted working intervals of each weekday (in seconds since midnight) and the
+	holidays as a bitmap over date ordinals, plus prefix sums over both, so that elapsed
+	working time and due dates are computed with a few bisects instead of walking the days.
+	"""
+
+	__slots__ = (
+		"day_seconds",
+		"holiday_base",
+		"holiday_bitmap",
+		"holiday_ordinals",
+		"holiday_prefix",
+		"week_prefix",
+		"week_seconds",
+		"windows",
+	)
+
+	def __init__(self, windows: dict, holidays=()):
+		"""
+		:param windows: `{weekday (0 = Monday): [(start timedelta, end timedelta), ...]}`
+		:param holidays: Dates without working time
+		"""
+		day_windows = []
+		for weekday in range(7):
+			intervals = sorted(
+				(start.total_seconds(), end.total_seconds())
+				for start, end in windows.get(weekday, ())
+				if end > start
+			)
+			merged = []
+			for start, end in intervals:
+				if merged and start <= merged[-1][1]:
+					merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+				else:
+					merged.append((start, end))
+			day_windows.append(tuple(merged))
+
+		day_seconds = tuple(sum(end - start for start, end in intervals) for intervals in day_windows)
+		# Two weeks of prefix sums, so any run of up to 7 days starting on any weekday is one subtraction
+		week_prefix = [0]
+		for index in range(14):
+			week_prefix.append(week_prefix[-1] + day_seconds[index % 7])
+
+		holiday_ordinals = tuple(sorted({day.toordinal() for day in holidays}))
+		holiday_prefix = [0]
+		for ordinal in holiday_ordinals:
+			holiday_prefix.append(holiday_prefix[-1] + day_seconds[_weekday(ordinal)])
+
+		holiday_base = holiday_ordinals[0] if holiday_ordinals else 0
+		holiday_bitmap = 0
+		for ordinal in holiday_ordinals:
+			holiday_bitmap |= 1 << (ordinal - holiday_base)
+
+		set_ = object.__setattr__
+		set_(self, "windows", tuple(day_windows))
+		set_(self, "day_seconds", day_seconds)
+		set_(self, "week_prefix", tuple(week_prefix))
+		set_(self, "week_seconds", week_prefix[7])
+		set_(self, "holiday_ordinals", holiday_ordinals)
+		set_(self, "holiday_prefix", tuple(holiday_prefix))
+		set_(self, "holiday_base", holiday_base)
+		set_(self, "holiday_bitmap", holiday_bitmap)
+
+	def __setattr__(self, name, value):
+		raise AttributeError(f"{type(self).__name__} is immutable")
+
+	def __reduce__(self):
+		# Picklable for Redis: rebuild from the (weekday, interval) windows and holiday ordinals
+		windows = {
+			weekday: [(timedelta(seconds=start), timedelta(seconds=end)) for start, end in intervals]
+			for weekday, intervals in enumerate(self.windows)
+		}
+		holidays = [date.fromordinal(ordinal) for ordinal in self.holiday_ordinals]
+		return (SLACalendar, (windows, holidays))
+
+	def is_holiday(self, day: date) -> bool:
+		offset = day.toordinal() - self.holiday_base
+		return offset >= 0 and bool((self.holiday_bitmap >> offset) & 1)
+
+	def get_working_seconds(self, start: datetime, end: datetime) -> int:
+		"""
+		Count working seconds between `start` and `end`
+
+		:param start: Datetime at which counting starts
+		:param end: Datetime at which counting ends (exclusive)
+		:return: Number of whole seconds `start + n` (n >= 0) that fall in working time
+		"""
+		if not start or not end or end <= start:
+			return 0
+
+		start_day, end_day = start.date(), end.date()
+		total = self._count_in_day(start_day, start, end)
+		if end_day != start_day:
+			# Whole days in between: windows start and end on whole seconds, so their length is the count
+			total += self._whole_days_seconds(start_day.toordinal() + 1, end_day.toordinal())
+			total += self._count_in_day(end_day, start, end)
+		return int(total)
+
+	def add_working_seconds(self, start: datetime, seconds: float) -> datetime | None:
+		"""
+		Move `start` forward by `seconds` of working time
+
+		:param start: Datetime to start from
+		:param seconds: Working time to add
+		:return: Datetime at which the working time is used up, `None` if there is no working time
+		"""
+		if not seconds:
+			return start
+		if not self.week_seconds:
+			return None
+
+		remaining = seconds
+		day = start.date()
+		midnight = datetime.combine(day, time())
+		if not self.is_holiday(day):
+			for window_start, window_end in self.windows[day.weekday()]:
+				lo = max(start, midnight + timedelta(seconds=window_start))
+				hi = midnight + timedelta(seconds=window_end)
+				if hi > lo:
+					available = (hi - lo).total_seconds()
+					if remaining <= available:
+						return lo + timedelta(seconds=remaining)
+					remaining -= available
+
+		# Smallest number of following whole days that covers the remaining time
+		first = day.toordinal() + 1
+		low, high = 1, 7
+		while self._whole_days_seconds(first, first + high) < remaining:
+			low, high = high + 1, high * 2
+		while low < high:
+			middle = (low + high) // 2
+			if self._whole_days_seconds(first, first + middle) < remaining:
+				low = middle + 1
+			else:
+				high = middle
+
+		ordinal = first + low - 1
+		remaining -= self._whole_days_seconds(first, ordinal)
+		midnight = datetime.combine(date.fromordinal(ordinal), time())
+		windows = self.windows[_weekday(ordinal)]
+		for window_start, window_end in windows:
+			if remaining <= window_end - window_start:
+				return midnight + timedelta(seconds=window_start + remaining)
+			remaining -= window_end - window_start
+		# Only reachable through float rounding of the remaining time
+		return midnight + timedelta(seconds=windows[-1][1])
+
+	def _count_in_day(self, day: date, start: datetime, end: datetime) -> int:
+		if self.is_holiday(day):
+			return 0
+		total = 0
+		midnight = datetime.combine(day, time())
+		for window_start, window_end in self.windows[day.weekday()]:
+			lo = max(start, midnight + timedelta(seconds=window_start))
+			hi = min(end, midnight + timedelta(seconds=window_end))
+			if hi > lo:
+				total += _ceil_seconds(hi - start) - _ceil_seconds(lo - start)
+		return total
+
+	def _whole_days_seconds(self, first: int, last: int) -> float:
+		# Working seconds of the whole days with ordinals in [first, last)
+		if last <= first:
+			return 0
+		weeks, days = divmod(last - first, 7)
+		weekday = _weekday(first)
+		total = weeks * self.week_seconds + self.week_prefix[weekday + days] - self.week_prefix[weekday]
+		lo = bisect_left(self.holiday_ordinals, first)
+		hi = bisect_left(self.holiday_ordinals, last)
+		return total - (self.holiday_prefix[hi] - self.holiday_prefix[lo])
+
+
+def get_working_seconds(start: datetime, end: datetime, working_hours: dict, holidays=()) -> int:
+	"""
+	Count working seconds between `start` and `end`, one working-hour window per weekday
+
+	:param working_hours: `{weekday (0 = Monday): (start timedelta, end timedelta)}`
+	"""
+	return _single_window_calendar(working_hours, holidays).get_working_seconds(start, end)
+
+
+def add_working_seconds(start: datetime, seconds: float, working_hours: dict, holidays=()) -> datetime | None:
+	"""
+	Move `start` forward by `seconds` of working time, one working-hour window per weekday
+
+	:param working_hours: `{weekday (0 = Monday): (start timedelta, end timedelta)}`
+	"""
+	return _single_window_calendar(working_hours, holidays).add_working_seconds(start, seconds)
+
+
+def _single_window_calendar(working_hours: dict, holidays) -> SLACalendar:
+	return SLACalendar({weekday: [window] for weekday, window in working_hours.items()}, holidays)
+
+
+def _weekday(ordinal: int) -> int:
+	# `date.fromordinal(1)` is a Monday
+	return (ordinal - 1) % 7
+
+
+def _ceil_seconds(delta: timedelta) -> int:
+	return -(-delta // timedelta(microseconds=1) // 1_000_000)
@@ -6,6 +6,7 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.desk.form.assign_to import add as assign, remove as unassign
 from frappe.utils import get_datetime, now_datetime
+from crm.api.task_status import LATE_EXEMPT_STATUSES
 from crm.fcrm.doctype.crm_notification.crm_notification import notify_user
 
 
@@ -18,8 +19,8 @@ class CRMTask(Document):
 		if self.due_date and self.name:
 			due_datetime = get_datetime(self.due_date)
 			current_datetime = now_datetime()
-			# إذا تجاوز due_date والحالة ليست Done أو late، غيّرها إلى late
-			if due_datetime < current_datetime and self.status not in ["Done", "late"]:
+			# إذا تجاوز due_date والحالة ليست Done أو Canceled أو late، غيّرها إلى late
+			if due_datetime < current_datetime and self.status not in LATE_EXEMPT_STATUSES:
 				try:
 					frappe.db.set_value("CRM Task", self.name, "status", "late", update_modified=False)
 					self.status = "late"
@@ -31,8 +32,8 @@ class CRMTask(Document):
 		if self.due_date:
 			due_datetime = get_datetime(self.due_date)
 			current_datetime = now_datetime()
-			# If due date is in the past and status is not Done, set to late
-			if due_datetime < current_datetime and self.status != "Done":
+			# If due date is in the past and the task is still open, set to late
+			if due_datetime < current_datetime and self.status not in LATE_EXEMPT_STATUSES:
 				self.status = "late"
 
 		if self.is_new() or not self.assigned_to:
@@ -137,9 +138,9 @@ class CRMTask(Document):
 					SET status = 'late'
 					WHERE name IN %s
 					AND due_date < %s
-					AND status NOT IN ('Done', 'late')
+					AND status NOT IN %s
 					AND due_date IS NOT NULL
-				""", (task_names, current_datetime))
+				""", (task_names, current_datetime, LATE_EXEMPT_STATUSES))
 				frappe.db.commit()
 				# مسح الـ cache بعد التحديث
 				frappe.clear_cache(doctype="CRM Task")
@@ -153,8 +154,8 @@ class CRMTask(Document):
 					due_datetime = get_datetime(task["due_date"])
 					if due_datetime < current_datetime:
 						current_status = task.get("status")
-						# إذا كانت الحالة ليست Done أو late، حدّثها مباشرة
-						if current_status and current_status not in ["Done", "late"]:
+						# إذا كانت الحالة ليست Done أو Canceled أو late، حدّثها مباشرة
+						if current_status and current_status not in LATE_EXEMPT_STATUSES:
 							task["status"] = "late"
 				except Exception:
 					pass
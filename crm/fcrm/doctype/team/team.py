@@ -1,9 +1,101 @@
 # Copyright (c) 2025, Frappe Technologies Pvt. Ltd. and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
+from crm.fcrm.doctype.crm_lead_visibility.crm_lead_visibility import refresh_visibility_for_users
+
+# Redis key of the team graph:
+# {"teams": {leader: team}, "members": {leader: [member, ...]}, "leaders": {member: [leader, ...]}}
+TEAM_GRAPH_CACHE_KEY = "crm_team_graph"
+# safety net: a graph cached from stale data does not outlive this
+TEAM_GRAPH_CACHE_TTL = 60 * 60
+
 
 class Team(Document):
-	pass
+	def on_update(self):
+		clear_team_graph()
+		# team leaders see the leads assigned to their members
+		before = self.get_doc_before_save()
+		refresh_visibility_for_users(self.get_member_users() + (before.get_member_users() if before else []))
+
+	def on_trash(self):
+		self.flags.deleted_members = self.get_member_users()
+
+	def after_delete(self):
+		clear_team_graph()
+		refresh_visibility_for_users(self.flags.deleted_members or [])
+
+	def get_member_users(self):
+		return [row.member for row in self.get("team_member") or [] if row.member]
+
+
+def get_team_graph() -> dict:
+	"""
+	Leader -> team, leader -> members and member -> leaders maps of all teams.
+
+	Built with one query, cached in Redis until a Team change is committed (at most
+	TEAM_GRAPH_CACHE_TTL seconds) and memoized for the request.
+	"""
+	graph = frappe.cache().get_value(TEAM_GRAPH_CACHE_KEY)
+	if graph is None:
+		graph = _build_team_graph()
+		frappe.cache().set_value(TEAM_GRAPH_CACHE_KEY, graph, expires_in_sec=TEAM_GRAPH_CACHE_TTL)
+	return graph
+
+
+def _build_team_graph() -> dict:
+	rows = frappe.db.sql(
+		"""
+		select t.name, t.team_leader, m.member
+		from `tabTeam` t
+		left join `tabMember` m on m.parent = t.name and m.parenttype = 'Team'
+		where ifnull(t.team_leader, '') != ''
+		""",
+		as_dict=True,
+	)
+	teams, members, leaders = {}, {}, {}
+	for row in rows:
+		teams.setdefault(row.team_leader, row.name)
+		members.setdefault(row.team_leader, [])
+		if row.member and row.member not in members[row.team_leader]:
+			members[row.team_leader].append(row.member)
+			leaders.setdefault(row.member, []).append(row.team_leader)
+	return {
+		"teams": teams,
+		"members": {leader: sorted(users) for leader, users in members.items()},
+		"leaders": {member: sorted(users) for member, users in leaders.items()},
+	}
+
+
+def clear_team_graph():
+	"""
+	Drop the cached graph now (for the rest of this transaction) and again after commit, so that
+	a graph rebuilt from the old data by a concurrent request does not stay cached.
+	"""
+	frappe.cache().delete_value(TEAM_GRAPH_CACHE_KEY)
+	frappe.db.after_commit.add(lambda: frappe.cache().delete_value(TEAM_GRAPH_CACHE_KEY))
+
+
+def get_team_name(leader: str) -> str | None:
+	"""Team led by `leader`."""
+	return get_team_graph()["teams"].get(leader)
+
+
+def get_team_members(leader: str) -> list[str]:
+	"""Members of the team(s) led by `leader` (excluding the leader)."""
+	return list(get_team_graph()["members"].get(leader) or [])
+
+
+def get_team_leaders(member: str) -> list[str]:
+	"""Leaders of the team(s) `member` belongs to."""
+	return list(get_team_graph()["leaders"].get(member) or [])
+
+
+def is_team_leader(user: str) -> bool:
+	return user in get_team_graph()["members"]
+
+
+def is_team_member(user: str) -> bool:
+	return user in get_team_graph()["leaders"]
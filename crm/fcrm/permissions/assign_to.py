@@ -5,21 +5,7 @@ from typing import List, Set
 import frappe
 from frappe import _
 
-
-# ---- reuse the same heuristics you used in lead.py ----
-def _member_user_col() -> tuple[str, str]:
-    """Return (child_doctype_name, user_link_fieldname). Defaults to ('Member','user')."""
-    try:
-        meta = frappe.get_meta("Member", cached=True)
-        for f in meta.get("fields", []):
-            if getattr(f, "fieldtype", None) == "Link" and getattr(f, "options", None) == "User":
-                return "Member", f.fieldname
-        for alt in ("user", "member", "user_id", "user_email", "allocated_to"):
-            if meta.get_field(alt):
-                return "Member", alt
-    except Exception:
-        pass
-    return "Member", "user"
+from crm.fcrm.doctype.team.team import get_team_members, is_team_leader, is_team_member
 
 
 # -----------------------------
@@ -59,7 +45,7 @@ def _is_sales_user(user: str | None = None) -> bool:
 def _is_team_leader(user: str | None = None) -> bool:
     """Check if user is a Team Leader (has a Team where they are team_leader)."""
     user = user or frappe.session.user
-    return bool(frappe.db.exists("Team", {"team_leader": user}))
+    return is_team_leader(user)
 
 
 def _is_team_member(user: str | None = None) -> bool:
@@ -67,18 +53,12 @@ def _is_team_member(user: str | None = None) -> bool:
     user = user or frappe.session.user
     if _is_team_leader(user):
         return False  # Team Leader is not considered a Team Member for this purpose
-    member_dt, member_col = _member_user_col()
-    return bool(frappe.db.exists(member_dt, {member_col: user, "parenttype": "Team"}))
+    return is_team_member(user)
 
 
 def _team_members_of(team_leader: str) -> Set[str]:
     """Return set of Users that belong to the Team led by team_leader."""
-    team = frappe.db.get_value("Team", {"team_leader": team_leader}, "name")
-    if not team:
-        return set()
-    member_dt, member_col = _member_user_col()
-    rows = frappe.get_all(member_dt, filters={"parent": team, "parenttype": "Team"}, pluck=member_col)
-    return set(filter(None, rows or []))
+    return set(get_team_members(team_leader))
 
 
 @frappe.whitelist()
@@ -135,7 +135,11 @@ doc_events = {
     },
     "ToDo": {
         "after_insert": ["crm.api.todo.after_insert"],
-        "on_update": ["crm.api.todo.on_update"],
+        "on_update": [
+            "crm.api.todo.on_update",
+            "crm.fcrm.doctype.crm_lead_visibility.crm_lead_visibility.on_todo_change",
+        ],
+        "after_delete": ["crm.fcrm.doctype.crm_lead_visibility.crm_lead_visibility.on_todo_change"],
         # "before_insert": ["crm.permissions.assign_to.validate_todo_assignment"],
     },
     # عند تحديث تعليق موجود (موجودة بالفعل)
@@ -150,7 +154,13 @@ doc_events = {
     },
     "CRM Deal": {
         "on_update": [
-            "crm.fcrm.doctype.erpnext_crm_settings.erpnext_crm_settings.create_customer_in_erpnext"
+            "crm.fcrm.doctype.erpnext_crm_settings.erpnext_crm_settings.create_customer_in_erpnext",
+            "crm.fcrm.doctype.crm_dashboard_rollup.crm_dashboard_rollup.on_update",
+            "crm.api.dashboard.clear_dashboard_cache",
+        ],
+        "on_trash": [
+            "crm.fcrm.doctype.crm_dashboard_rollup.crm_dashboard_rollup.on_trash",
+            "crm.api.dashboard.clear_dashboard_cache",
         ],
     },
     "User": {
@@ -160,27 +170,53 @@ doc_events = {
     "CRM Lead": {
         "before_insert": ["crm.duplicate_lead.check_duplicates"],
         "after_insert": ["crm.duplicate_lead.append_to_original_lead"],
+        # تحديث جدول التجميع اليومي للداشبورد
+        "on_update": [
+            "crm.fcrm.doctype.crm_dashboard_rollup.crm_dashboard_rollup.on_update",
+            "crm.api.dashboard.clear_dashboard_cache",
+            "crm.duplicate_lead.update_phone_index",
+        ],
+        "on_trash": [
+            "crm.fcrm.doctype.crm_dashboard_rollup.crm_dashboard_rollup.on_trash",
+            "crm.api.dashboard.clear_dashboard_cache",
+            "crm.duplicate_lead.remove_phone_index",
+            "crm.fcrm.doctype.crm_lead_visibility.crm_lead_visibility.on_lead_trash",
+        ],
     },
     # بثّ الريـال-تايم للجرس عند إنشاء Notification Log
     "Notification Log": {
 
           "after_insert": [
+            "crm.api.notifications.update_unseen_count",
             "crm.api.notifications.broadcast_log_realtime",
             "crm.api.firebase.send_push_for_notification_log",
-        ]
+        ],
+        # عدّاد غير المقروء في Redis
+        "on_update": ["crm.api.notifications.update_unseen_count"],
+        "on_trash": ["crm.api.notifications.update_unseen_count"],
 
 
+    },
+    "CRM Notification": {
+        "after_insert": ["crm.api.notifications.update_unseen_count"],
+        "on_update": ["crm.api.notifications.update_unseen_count"],
+        "on_trash": ["crm.api.notifications.update_unseen_count"],
     },
     # جديد: أي تغيير في الـ Reminder يعيد حساب Delayed لأحدث تعليق على نفس المستند
+    # + طابور المواعيد المستحقة في Redis (crm.reminder_runner.dispatch_due_items)
     "Reminder": {
         "after_insert": ["crm.api.reminders.recalc_from_reminder"],
-        "on_update": ["crm.api.reminders.recalc_from_reminder"],
-        "on_trash": ["crm.api.reminders.recalc_from_reminder"],
+        "on_update": ["crm.api.reminders.recalc_from_reminder", "crm.reminder_runner.schedule_due_item"],
+        "on_trash": ["crm.api.reminders.recalc_from_reminder", "crm.reminder_runner.schedule_due_item"],
     },
     # التحقق من due_date وتحديث الحالة إلى Backlog تلقائياً
     "CRM Task": {
         "on_load": ["crm.api.task_status.check_and_update_task_status"],
-        "on_update": ["crm.api.task_status.check_and_update_task_status"],
+        "on_update": [
+            "crm.api.task_status.check_and_update_task_status",
+            "crm.reminder_runner.schedule_due_item",
+        ],
+        "on_trash": ["crm.reminder_runner.schedule_due_item"],
     },
 
 }
@@ -189,14 +225,26 @@ doc_events = {
 
 # Scheduled Tasks
 # ---------------
-# تشغيل الريمايندر كل دقيقة (runner داخلي بدون تعديل Core)
+# الريمايندر والمهام المتأخرة: dispatcher كل دقيقة يقرأ طابور المواعيد في Redis فقط،
+# ويشغّل send_reminders / update_overdue_tasks لما يكون فيه موعد مستحق فعلاً
 scheduler_events = {
     "cron": {
         "*/1 * * * *": [
-            "crm.reminder_runner.run_reminders_locked",
-            "crm.api.task_status.update_overdue_tasks"  # تحديث المهام المتأخرة كل دقيقة
+            # يرسل أيضاً أي إشعارات push فاتها job الإرسال
+            "crm.reminder_runner.dispatch_due_items",
         ]
-    }
+    },
+    # تصحيح عدّادات الإشعارات غير المقروءة في Redis
+    "hourly": [
+        "crm.api.notifications.reconcile_unseen_counts",
+    ],
+    # إعادة بناء الجداول المحسوبة مسبقاً (تجميع الداشبورد + رؤية الـLeads + فهرس الأرقام) لتصحيح أي فروقات من تحديثات SQL مباشرة
+    "daily": [
+        "crm.reminder_runner.rebuild_due_queue",
+        "crm.fcrm.doctype.crm_dashboard_rollup.crm_dashboard_rollup.rebuild_dashboard_rollup",
+        "crm.fcrm.doctype.crm_lead_visibility.crm_lead_visibility.rebuild_lead_visibility",
+        "crm.duplicate_lead.rebuild_phone_index",
+    ],
 }
 
 # Testing
@@ -214,10 +262,11 @@ patches = [
 # Overriding Methods
 # ------------------------------
 #
-#override_whitelisted_methods = {
-   #"frappe.desk.doctype.event.event.get_events": "crm.event.get_events"
-
- #}
+override_whitelisted_methods = {
+    # the desk bell marks notifications as read without hooks; keep the unseen counter in sync
+    "frappe.desk.doctype.notification_log.notification_log.mark_as_read": "crm.api.notifications.desk_mark_as_read",
+    "frappe.desk.doctype.notification_log.notification_log.mark_all_as_read": "crm.api.notifications.desk_mark_all_as_read",
+}
 # Overriding Methods
 # ------------------------------
 
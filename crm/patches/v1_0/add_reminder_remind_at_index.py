@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+	# flag_overdue_comments_for_leads scans reminders by remind_at window every minute
+	frappe.db.add_index("Reminder", ["remind_at"])
@@ -0,0 +1,5 @@
+from crm.fcrm.doctype.crm_dashboard_rollup.crm_dashboard_rollup import rebuild_dashboard_rollup
+
+
+def execute():
+	rebuild_dashboard_rollup()
@@ -0,0 +1,5 @@
+from crm.duplicate_lead import rebuild_phone_index
+
+
+def execute():
+	rebuild_phone_index()
@@ -0,0 +1,5 @@
+from crm.fcrm.doctype.crm_lead_visibility.crm_lead_visibility import rebuild_lead_visibility
+
+
+def execute():
+	rebuild_lead_visibility()
@@ -1,13 +1,18 @@
 # apps/crm/crm/reminder_runner.py
 import frappe
+from frappe.utils import get_datetime, now_datetime
+
+from crm.api.task_status import LATE_EXEMPT_STATUSES
+
+
 def run_reminders_locked():
-    """يشغّل send_reminders() مع قفل Redis بسيط لتجنّب التوازي."""
+    """يشغّل send_reminders() مع قفل Redis بسيط لتجنّب التوازي. يرجّع False لو القفل مشغول."""
     # لو نِسخة فربّي قديمة مافيهاش redis_lock، استخدم النسخة البديلة
     lock = getattr(frappe.utils, "redis_lock", None)
     if lock:
         _lock = lock("reminder_send_lock", timeout=120)
         if not _lock.acquire(blocking=False):
-            return
+            return False
         try:
             _run_core_send()
         finally:
@@ -18,6 +23,7 @@ def run_reminders_locked():
     else:
         # fallback: شغّل مباشرة بدون قفل
         _run_core_send()
+    return True
 
 def _run_core_send():
     from frappe.automation.doctype.reminder.reminder import send_reminders
@@ -28,3 +34,137 @@ def _run_core_send():
         flag_overdue_comments_for_leads()
     except Exception:
         frappe.log_error(frappe.get_traceback(), "flag_overdue_comments_for_leads failed")
+
+
+# ----------------------- Due Queue -----------------------
+
+# طابور المواعيد المستحقة في Redis (sorted set لكل نوع: العضو = اسم المستند، الـ score = وقت الاستحقاق).
+# يُملأ من hooks الـ Reminder / CRM Task، والـ dispatcher كل دقيقة يقرأ أقرب موعد فقط
+# ولا يلمس قاعدة البيانات إلا لو فيه عنصر مستحق.
+DUE_QUEUE_KEY = "crm_due_queue"
+DUE_QUEUE_BUILT_KEY = "crm_due_queue_built"
+DUE_BATCH_SIZE = 1000
+
+# يحذف العضو فقط لو الـ score ما اتغيرش منذ القراءة (عنصر أُعيدت جدولته أثناء المعالجة يبقى)
+_REMOVE_IF_UNCHANGED = """
+local removed = 0
+for i = 1, #ARGV, 2 do
+    local score = redis.call('zscore', KEYS[1], ARGV[i])
+    if score and tonumber(score) == tonumber(ARGV[i + 1]) then
+        removed = removed + redis.call('zrem', KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
+
+
+def _queue_key(doctype):
+    return frappe.cache().make_key(f"{DUE_QUEUE_KEY}:{doctype}")
+
+
+def _due_state(doc):
+    """موعد الاستحقاق لو المستند ما زال ينتظر (وإلا None)."""
+    if doc.doctype == "Reminder":
+        if doc.get("notified") or not doc.get("remind_at"):
+            return None
+        return get_datetime(doc.remind_at)
+    if not doc.get("due_date") or doc.get("status") in LATE_EXEMPT_STATUSES:
+        return None
+    return get_datetime(doc.due_date)
+
+
+def schedule_due_item(doc, method=None):
+    """
+    doc_events لـ Reminder / CRM Task: أضف/حدّث/احذف موعد المستند في الطابور.
+    """
+    key = _queue_key(doc.doctype)
+    due_at = None if method == "on_trash" else _due_state(doc)
+    if due_at:
+        frappe.cache().zadd(key, {doc.name: due_at.timestamp()})
+    else:
+        frappe.cache().zrem(key, doc.name)
+
+
+def _process_due_reminders():
+    return run_reminders_locked()
+
+
+def _process_due_tasks():
+    from crm.api.task_status import update_overdue_tasks
+
+    return "error" not in update_overdue_tasks()
+
+
+DUE_PROCESSORS = {
+    "Reminder": _process_due_reminders,
+    "CRM Task": _process_due_tasks,
+}
+
+
+def dispatch_due_items():
+    """
+    cron كل دقيقة: قراءة Redis واحدة لكل نوع لو مفيش شيء مستحق.
+    لو فيه مستحق → معالجة مجمّعة (SQL واحد / send_reminders) لكل المستحق، ثم إزالة العناصر
+    التي قُرئت فقط (وبنفس الـ score)؛ ما أُضيف أو أُعيدت جدولته أثناء المعالجة يبقى للدورة التالية.
+    العناصر تبقى في الطابور لو فشلت المعالجة (أو القفل مشغول)، فتُعاد في التشغيل التالي.
+    وفي النهاية تُرسل إشعارات الـ push المعلّقة إن وُجدت.
+    """
+    if not frappe.cache().get_value(DUE_QUEUE_BUILT_KEY):
+        rebuild_due_queue()
+
+    now_ts = now_datetime().timestamp()
+    for doctype, process in DUE_PROCESSORS.items():
+        key = _queue_key(doctype)
+        while True:
+            due = frappe.cache().zrangebyscore(key, "-inf", now_ts, start=0, num=DUE_BATCH_SIZE, withscores=True)
+            if not due or not process():
+                break
+            _remove_processed(key, due)
+            if len(due) < DUE_BATCH_SIZE:
+                break
+
+    _flush_pending_pushes()
+
+
+def _flush_pending_pushes():
+    """
+    شبكة الأمان لإشعارات الـ push (بدل cron منفصل): نرسل ما فات job الإرسال أو أُعيد للطابور،
+    بقراءة Redis واحدة (llen) لو الطابور فاضي.
+    """
+    from crm.api.firebase import PUSH_QUEUE_KEY, flush_push_queue
+
+    if frappe.cache().llen(PUSH_QUEUE_KEY):
+        flush_push_queue()
+
+
+def _remove_processed(key, items):
+    args = []
+    for member, score in items:
+        args += [member, repr(score)]
+    frappe.cache().eval(_REMOVE_IF_UNCHANGED, 1, key, *args)
+
+
+def rebuild_due_queue():
+    """
+    أعد بناء الطابور من قاعدة البيانات (أول تشغيل / بعد مسح Redis / تصحيح يومي لكتابات SQL مباشرة).
+    """
+    reminder_filters = {"remind_at": ["is", "set"]}
+    if frappe.db.has_column("Reminder", "notified"):
+        reminder_filters["notified"] = 0
+    sources = {
+        "Reminder": frappe.get_all("Reminder", filters=reminder_filters, fields=["name", "remind_at as due_at"]),
+        "CRM Task": frappe.get_all(
+            "CRM Task",
+            filters={"due_date": ["is", "set"], "status": ["not in", LATE_EXEMPT_STATUSES]},
+            fields=["name", "due_date as due_at"],
+        ),
+    }
+
+    pipe = frappe.cache().pipeline()
+    for doctype, rows in sources.items():
+        key = _queue_key(doctype)
+        pipe.delete(key)
+        for i in range(0, len(rows), 1000):
+            pipe.zadd(key, {row.name: get_datetime(row.due_at).timestamp() for row in rows[i : i + 1000]})
+    pipe.execute()
+    frappe.cache().set_value(DUE_QUEUE_BUILT_KEY, 1)
@@ -22,6 +22,8 @@ import frappe
 import json
 from typing import Optional
 
+from crm.fcrm.doctype.team.team import get_team_leaders
+
 
 def get_team_leader_for_user(user: str) -> Optional[str]:
     """
@@ -36,28 +38,8 @@ def get_team_leader_for_user(user: str) -> Optional[str]:
     if not user:
         return None
     
-    # Check cache first
-    cache_key = f"team_leader_for_{user}"
-    cached = frappe.cache().get(cache_key)
-    if cached:
-        return cached
-    
-    # Find the team where this user is a member
-    team_leader = frappe.db.sql("""
-        SELECT t.team_leader
-        FROM `tabTeam` t
-        INNER JOIN `tabMember` m ON m.parent = t.name
-        WHERE m.member = %s AND m.parenttype = 'Team'
-        LIMIT 1
-    """, (user,), as_dict=True)
-    
-    if team_leader and len(team_leader) > 0:
-        result = team_leader[0].get('team_leader')
-        # Cache for 10 minutes
-        frappe.cache().setex(cache_key, result, 600)
-        return result
-    
-    return None
+    leaders = get_team_leaders(user)
+    return leaders[0] if leaders else None
 
 
 def update_team_leader_for_lead(doc, method=None):
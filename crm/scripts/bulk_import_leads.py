@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Bulk import of CRM Leads (14,000+) with set-based duplicate linking.
+
+The regular insert path checks every lead for duplicates in `before_insert` and then
+reloads and re-saves the original lead (with its whole Duplicate Leads table) after
+commit. For imports where many rows share one original that is O(n²) child-row writes.
+
+This script instead:
+- normalizes all phone numbers and resolves the duplicate groups of the whole file in memory
+  (one indexed lookup against existing leads, see `crm.duplicate_lead.resolve_import_duplicates`)
+- inserts the leads in batches with the per-lead duplicate hooks switched off
+- writes `original_lead` / `is_duplicate` and the Duplicate Lead Entry rows with set-based SQL
+
+Usage:
+    bench --site trust.com execute crm.scripts.bulk_import_leads.run_import --kwargs "{'file_path': '/path/to/leads.csv'}"
+"""
+
+import json
+import time
+
+import frappe
+from frappe.utils.csvutils import read_csv_content
+
+from crm.duplicate_lead import (
+    _lead_numbers,
+    link_duplicates_bulk,
+    normalize_egyptian_phone,
+    resolve_import_duplicates,
+)
+
+
+def read_rows(file_path: str) -> list[dict]:
+    """
+    Read import rows from a CSV (first row = CRM Lead fieldnames) or a JSON list of dicts.
+    """
+    with open(file_path, "rb") as f:
+        content = f.read()
+
+    if file_path.lower().endswith(".json"):
+        return json.loads(content)
+
+    rows = read_csv_content(content)
+    if not rows:
+        return []
+    header = [h.strip() for h in rows[0]]
+    return [dict(zip(header, row)) for row in rows[1:] if any(row)]
+
+
+def import_leads(rows: list[dict], batch_size: int = 500) -> dict:
+    """
+    Insert `rows` (dicts of CRM Lead fields, in file order) as leads and link their duplicates.
+
+    Returns:
+        Dictionary with `inserted`, `duplicates` and `errors` ({row, error}) plus the lead `names`
+        in row order (None for rows that failed)
+    """
+    normalized = [_lead_numbers(r.get("phone"), r.get("mobile_no")) for r in rows]
+    canonicals = resolve_import_duplicates(normalized)
+
+    stats = {"inserted": 0, "duplicates": 0, "errors": [], "names": [None] * len(rows)}
+    names = stats["names"]
+    # first row of the file with a number -> first successfully inserted lead of its duplicate group
+    group_originals = {}
+
+    frappe.flags.bulk_lead_import = True
+    try:
+        for start in range(0, len(rows), batch_size):
+            links = []
+            for i in range(start, min(start + batch_size, len(rows))):
+                canonical = canonicals[i]
+                group = canonical[1] if canonical and canonical[0] == "row" else i
+                original = canonical[1] if canonical and canonical[0] == "lead" else group_originals.get(group)
+
+                values = {k: v for k, v in rows[i].items() if v not in (None, "")}
+                values.update(
+                    {
+                        "doctype": "CRM Lead",
+                        "phone": normalize_egyptian_phone(values.get("phone") or ""),
+                        "mobile_no": normalize_egyptian_phone(values.get("mobile_no") or ""),
+                        "is_duplicate": 1 if original else 0,
+                        "duplicated_from": original,
+                    }
+                )
+                # a failing row must not leave anything it already wrote (lead, phone index,
+                # rollup) in the batch transaction
+                savepoint = f"bulk_lead_import_{i}"
+                frappe.db.savepoint(savepoint)
+                try:
+                    doc = frappe.get_doc(values).insert(ignore_permissions=True)
+                except Exception as e:
+                    frappe.db.rollback(save_point=savepoint)
+                    stats["errors"].append({"row": i, "error": str(e)})
+                    continue
+                frappe.db.release_savepoint(savepoint)
+
+                names[i] = doc.name
+                group_originals.setdefault(group, doc.name)
+                stats["inserted"] += 1
+                if original:
+                    links.append((doc.name, original))
+                    stats["duplicates"] += 1
+
+            link_duplicates_bulk(links)
+            frappe.db.commit()
+    finally:
+        frappe.flags.bulk_lead_import = False
+
+    return stats
+
+
+def run_import(file_path: str, batch_size: int = 500) -> dict:
+    """
+    Import leads from a CSV / JSON file through the bulk path.
+
+    Args:
+        file_path: Path of the import file
+        batch_size: Number of leads inserted per transaction (default: 500)
+    """
+    frappe.set_user("Administrator")
+
+    rows = read_rows(file_path)
+    print(f"\n📦 Importing {len(rows):,} leads from {file_path} (batch size {batch_size})")
+
+    start_time = time.time()
+    stats = import_leads(rows, batch_size=batch_size)
+    total_time = time.time() - start_time
+
+    print(f"✓ Inserted:    {stats['inserted']:,}")
+    print(f"⊘ Duplicates:  {stats['duplicates']:,}")
+    print(f"✗ Errors:      {len(stats['errors']):,}")
+    print(f"⏱️  Total Time: {int(total_time / 60)}m {int(total_time % 60)}s")
+
+    for failed in stats["errors"][:10]:
+        print(f"   - row {failed['row']}: {failed['error']}")
+
+    stats.pop("names")
+    stats["total_time"] = total_time
+    return stats
@@ -19,6 +19,8 @@ import time
 from datetime import datetime
 from typing import Optional, List, Dict
 
+from crm.fcrm.doctype.team.team import get_team_leaders
+
 
 def get_team_leader_for_user(user: str, cache: dict = None) -> Optional[str]:
     """
@@ -26,7 +28,7 @@ def get_team_leader_for_user(user: str, cache: dict = None) -> Optional[str]:
     
     Args:
         user: Email/username of the user
-        cache: Cache dictionary to store results
+        cache: Unused, lookups come from the cached team graph
     
     Returns:
         Team leader email/username or None
@@ -34,28 +36,8 @@ def get_team_leader_for_user(user: str, cache: dict = None) -> Optional[str]:
     if not user:
         return None
     
-    # Use cache if provided
-    if cache and user in cache:
-        return cache[user]
-    
-    # Query database
-    team_leader = frappe.db.sql("""
-        SELECT t.team_leader
-        FROM `tabTeam` t
-        INNER JOIN `tabMember` m ON m.parent = t.name
-        WHERE m.member = %s AND m.parenttype = 'Team'
-        LIMIT 1
-    """, (user,), as_dict=True)
-    
-    result = None
-    if team_leader and len(team_leader) > 0:
-        result = team_leader[0].get('team_leader')
-    
-    # Store in cache
-    if cache is not None:
-        cache[user] = result
-    
-    return result
+    leaders = get_team_leaders(user)
+    return leaders[0] if leaders else None
 
 
 def get_leads_without_team_leader(limit: int = None, offset: int = 0) -> List[Dict]:
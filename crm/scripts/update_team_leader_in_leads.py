@@ -16,6 +16,8 @@ import frappe
 import json
 from typing import Optional, Set, List
 
+from crm.fcrm.doctype.team.team import get_team_leaders
+
 
 def get_team_leader_for_user(user: str) -> Optional[str]:
     """
@@ -30,19 +32,8 @@ def get_team_leader_for_user(user: str) -> Optional[str]:
     if not user:
         return None
     
-    # Find the team where this user is a member
-    team_leader = frappe.db.sql("""
-        SELECT t.team_leader
-        FROM `tabTeam` t
-        INNER JOIN `tabMember` m ON m.parent = t.name
-        WHERE m.member = %s AND m.parenttype = 'Team'
-        LIMIT 1
-    """, (user,), as_dict=True)
-    
-    if team_leader and len(team_leader) > 0:
-        return team_leader[0].get('team_leader')
-    
-    return None
+    leaders = get_team_leaders(user)
+    return leaders[0] if leaders else None
 
 
 def get_assigned_users_for_lead(lead_name: str) -> List[str]:
@@ -0,0 +1,163 @@
+import random
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import cint
+
+from crm.duplicate_lead import (
+    PHONE_INDEX_DOCTYPE,
+    _insert_phone_index,
+    link_duplicates_bulk,
+    rebuild_phone_index,
+)
+from crm.scripts.bulk_import_leads import import_leads
+from crm.utils import DATA_VERSION_KEY
+
+
+class TestBulkDuplicateLinking(FrappeTestCase):
+    def setUp(self):
+        frappe.set_user("Administrator")
+        for doctype, values in (
+            ("CRM Lead Status", {"lead_status": "Test Status"}),
+            ("CRM Lead Source", {"source_name": "Test Source"}),
+        ):
+            if not frappe.db.exists(doctype, list(values.values())[0]):
+                frappe.get_doc({"doctype": doctype, **values}).insert(ignore_permissions=True)
+
+        # import_leads commits per batch, so the leads are deleted explicitly
+        self.leads = []
+        self.addCleanup(self._delete_leads)
+
+        self.numbers = [f"+2010{random.randint(10**7, 10**8 - 1)}" for _ in range(4)]
+        self.existing = self._insert_lead("Existing", self.numbers[0])
+
+    def _delete_leads(self):
+        for name in reversed(self.leads):
+            if name and frappe.db.exists("CRM Lead", name):
+                frappe.delete_doc("CRM Lead", name, force=1, ignore_permissions=True)
+        frappe.db.commit()
+
+    def _lead_values(self, first_name, mobile_no):
+        return {"first_name": first_name, "mobile_no": mobile_no, "status": "Test Status", "source": "Test Source"}
+
+    def _insert_lead(self, first_name, mobile_no):
+        lead = frappe.get_doc({"doctype": "CRM Lead", **self._lead_values(first_name, mobile_no)})
+        lead.insert(ignore_permissions=True)
+        self.leads.append(lead.name)
+        return lead.name
+
+    def _counts(self):
+        """Leads of the test source per is_duplicate: (from the rollup, from the lead table)."""
+        rollup = frappe.get_all(
+            "CRM Dashboard Rollup",
+            filters={"reference_doctype": "CRM Lead", "source": "Test Source"},
+            fields=["is_duplicate", "sum(record_count) as total"],
+            group_by="is_duplicate",
+        )
+        raw = frappe.get_all(
+            "CRM Lead",
+            filters={"source": "Test Source"},
+            fields=["is_duplicate", "count(*) as total"],
+            group_by="is_duplicate",
+        )
+        return tuple({cint(r.is_duplicate): cint(r.total) for r in rows} for rows in (rollup, raw))
+
+    def _delta(self, before, after):
+        return {k: after.get(k, 0) - before.get(k, 0) for k in (0, 1)}
+
+    def _child_leads(self, parent):
+        return frappe.get_all(
+            "Duplicate Lead Entry",
+            filters={"parenttype": "CRM Lead", "parent": parent},
+            pluck="lead",
+            order_by="idx",
+        )
+
+    def test_import_links_duplicates(self):
+        rollup_before, raw_before = self._counts()
+        rows = [
+            # local format of an existing lead's number
+            self._lead_values("Duplicate Of Existing", "0" + self.numbers[0][3:]),
+            self._lead_values("Import Original", self.numbers[1]),
+            {**self._lead_values("Duplicate Of Row", self.numbers[3]), "phone": self.numbers[1]},
+        ]
+        # batch_size=2: the last row links to a lead of the previous batch
+        stats = import_leads(rows, batch_size=2)
+        names = stats["names"]
+        self.leads += names
+
+        self.assertEqual(stats["errors"], [])
+        self.assertEqual((stats["inserted"], stats["duplicates"]), (3, 2))
+
+        flags = ["is_duplicate", "duplicated_from", "original_lead"]
+        self.assertEqual(frappe.db.get_value("CRM Lead", names[0], flags), (1, self.existing, 0))
+        self.assertEqual(frappe.db.get_value("CRM Lead", names[1], flags), (0, None, 1))
+        self.assertEqual(frappe.db.get_value("CRM Lead", names[2], flags), (1, names[1], 0))
+        self.assertEqual(frappe.db.get_value("CRM Lead", self.existing, "original_lead"), 1)
+
+        self.assertEqual(self._child_leads(self.existing), [names[0]])
+        self.assertEqual(self._child_leads(names[1]), [names[2]])
+
+        rollup_after, raw_after = self._counts()
+        self.assertEqual(self._delta(raw_before, raw_after), {0: 1, 1: 2})
+        self.assertEqual(self._delta(rollup_before, rollup_after), self._delta(raw_before, raw_after))
+
+    def test_import_skips_failed_original(self):
+        rows = [
+            # fails link validation: the group's original is the next row that gets inserted
+            {**self._lead_values("Failed Original", self.numbers[1]), "status": "Missing Test Status"},
+            self._lead_values("Next Original", self.numbers[1]),
+            self._lead_values("Duplicate Of Next", self.numbers[1]),
+        ]
+        stats = import_leads(rows, batch_size=10)
+        names = stats["names"]
+        self.leads += names
+
+        self.assertEqual([failed["row"] for failed in stats["errors"]], [0])
+        self.assertEqual(names[0], None)
+        self.assertEqual((stats["inserted"], stats["duplicates"]), (2, 1))
+
+        flags = ["is_duplicate", "duplicated_from", "original_lead"]
+        self.assertEqual(frappe.db.get_value("CRM Lead", names[1], flags), (0, None, 1))
+        self.assertEqual(frappe.db.get_value("CRM Lead", names[2], flags), (1, names[1], 0))
+        self.assertEqual(self._child_leads(names[1]), [names[2]])
+
+        # nothing of the failed row was committed
+        self.assertEqual(
+            frappe.get_all(PHONE_INDEX_DOCTYPE, filters={"phone": self.numbers[1]}, pluck="lead", order_by="lead"),
+            sorted(names[1:]),
+        )
+
+    def test_link_duplicates_bulk_moves_rollup_bucket(self):
+        duplicate = self._insert_lead("Late Duplicate", self.numbers[2])
+        rollup_before, raw_before = self._counts()
+        version = frappe.cache().hget(DATA_VERSION_KEY, "CRM Lead")
+
+        link_duplicates_bulk([(duplicate, self.existing)])
+
+        self.assertEqual(frappe.db.get_value("CRM Lead", duplicate, ["is_duplicate", "duplicated_from"]), (1, self.existing))
+        self.assertEqual(self._child_leads(self.existing), [duplicate])
+        self.assertNotEqual(frappe.cache().hget(DATA_VERSION_KEY, "CRM Lead"), version)
+
+        rollup_after, raw_after = self._counts()
+        self.assertEqual(self._delta(raw_before, raw_after), {0: -1, 1: 1})
+        self.assertEqual(self._delta(rollup_before, rollup_after), self._delta(raw_before, raw_after))
+
+        # linking again adds no child row and does not move the lead twice
+        link_duplicates_bulk([(duplicate, self.existing)])
+        self.assertEqual(self._child_leads(self.existing), [duplicate])
+        self.assertEqual(self._counts(), (rollup_after, raw_after))
+
+    def test_rebuild_phone_index_catches_writes_without_hooks(self):
+        def indexed(lead):
+            return frappe.get_all(PHONE_INDEX_DOCTYPE, filters={"lead": lead}, pluck="phone")
+
+        self.assertEqual(indexed(self.existing), [self.numbers[0]])
+        frappe.db.set_value("CRM Lead", self.existing, "mobile_no", self.numbers[3])
+        _insert_phone_index([("deleted-lead-without-hooks", self.numbers[2])])
+        self.assertEqual(indexed(self.existing), [self.numbers[0]])
+
+        rebuild_phone_index(batch_size=100)
+
+        self.assertEqual(indexed(self.existing), [self.numbers[3]])
+        self.assertEqual(indexed("deleted-lead-without-hooks"), [])
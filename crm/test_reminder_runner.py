@@ -0,0 +1,144 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, get_datetime, now_datetime
+
+from crm import reminder_runner
+
+TEST_QUEUE = "CRM Test Due Queue"
+
+
+class TestDueQueue(FrappeTestCase):
+    def setUp(self):
+        frappe.set_user("Administrator")
+        self.key = reminder_runner._queue_key(TEST_QUEUE)
+        frappe.cache().delete(self.key)
+        self.addCleanup(frappe.cache().delete, self.key)
+        frappe.cache().set_value(reminder_runner.DUE_QUEUE_BUILT_KEY, 1)
+
+        if not frappe.db.exists("CRM Task Type", "Test Task Type"):
+            frappe.get_doc({"doctype": "CRM Task Type", "task_type": "Test Task Type"}).insert(
+                ignore_permissions=True
+            )
+
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def _queue(self):
+        return {frappe.safe_decode(m): s for m, s in frappe.cache().zrange(self.key, 0, -1, withscores=True)}
+
+    def _add(self, items):
+        frappe.cache().zadd(self.key, items)
+
+    def _dispatch(self, process):
+        with patch.dict(reminder_runner.DUE_PROCESSORS, {TEST_QUEUE: process}, clear=True):
+            reminder_runner.dispatch_due_items()
+
+    def _insert_task(self, due_date, status="Todo"):
+        return frappe.get_doc(
+            {
+                "doctype": "CRM Task",
+                "title": "Due queue test",
+                "task_type": "Test Task Type",
+                "status": status,
+                "due_date": due_date,
+            }
+        ).insert(ignore_permissions=True)
+
+    def test_remove_processed_keeps_rescheduled_items(self):
+        self._add({"a": 100, "b": 200})
+        due = frappe.cache().zrangebyscore(self.key, "-inf", 300, withscores=True)
+
+        # b was rescheduled while the batch was processed
+        self._add({"b": 400})
+        reminder_runner._remove_processed(self.key, due)
+
+        self.assertEqual(self._queue(), {"b": 400})
+
+    def test_dispatch_removes_processed_due_items_only(self):
+        now_ts = now_datetime().timestamp()
+        self._add({"due-1": now_ts - 60, "due-2": now_ts - 30, "future": now_ts + 3600})
+
+        def process():
+            # rescheduled during processing: must stay for the next run
+            self._add({"due-2": now_ts + 60})
+            return True
+
+        self._dispatch(process)
+
+        self.assertEqual(set(self._queue()), {"due-2", "future"})
+        self.assertEqual(self._queue()["due-2"], now_ts + 60)
+
+    def test_dispatch_processes_in_batches(self):
+        now_ts = now_datetime().timestamp()
+        self._add({f"due-{i}": now_ts - 60 - i for i in range(5)})
+        calls = []
+
+        with patch.object(reminder_runner, "DUE_BATCH_SIZE", 2):
+            self._dispatch(lambda: calls.append(1) or True)
+
+        self.assertEqual(self._queue(), {})
+        self.assertEqual(len(calls), 3)
+
+    def test_items_stay_queued_when_lock_is_busy(self):
+        now_ts = now_datetime().timestamp()
+        self._add({"due": now_ts - 60})
+
+        with patch.object(reminder_runner, "run_reminders_locked", return_value=False):
+            self._dispatch(reminder_runner._process_due_reminders)
+        self.assertEqual(set(self._queue()), {"due"})
+
+        # failing processor: the items stay as well
+        self._dispatch(lambda: False)
+        self.assertEqual(set(self._queue()), {"due"})
+
+    def test_dispatch_flushes_pending_pushes_only(self):
+        from crm.api.firebase import PUSH_QUEUE_KEY
+
+        frappe.cache().delete_value(PUSH_QUEUE_KEY)
+        with patch("crm.api.firebase.flush_push_queue") as flush:
+            self._dispatch(lambda: True)
+            flush.assert_not_called()
+
+            frappe.cache().rpush(PUSH_QUEUE_KEY, "{}")
+            self.addCleanup(frappe.cache().delete_value, PUSH_QUEUE_KEY)
+            self._dispatch(lambda: True)
+            flush.assert_called_once_with()
+
+    def test_first_run_rebuilds_queue(self):
+        task = self._insert_task(add_to_date(now_datetime(), days=1))
+        task_key = reminder_runner._queue_key("CRM Task")
+        frappe.cache().zrem(task_key, task.name)
+        frappe.cache().delete_value(reminder_runner.DUE_QUEUE_BUILT_KEY)
+
+        self._dispatch(lambda: True)
+
+        self.assertTrue(frappe.cache().get_value(reminder_runner.DUE_QUEUE_BUILT_KEY))
+        self.assertEqual(frappe.cache().zscore(task_key, task.name), get_datetime(task.due_date).timestamp())
+        frappe.cache().zrem(task_key, task.name)
+
+    def test_schedule_due_item_follows_task_state(self):
+        task_key = reminder_runner._queue_key("CRM Task")
+        due_date = add_to_date(now_datetime(), days=1)
+        tasks = [self._insert_task(due_date) for _i in range(3)]
+        self.addCleanup(frappe.cache().zrem, task_key, *[task.name for task in tasks])
+
+        for task in tasks:
+            self.assertEqual(frappe.cache().zscore(task_key, task.name), get_datetime(due_date).timestamp())
+
+        # rescheduled
+        new_due_date = add_to_date(due_date, hours=2)
+        tasks[0].due_date = new_due_date
+        tasks[0].save(ignore_permissions=True)
+        self.assertEqual(frappe.cache().zscore(task_key, tasks[0].name), get_datetime(new_due_date).timestamp())
+
+        # done / late / trashed tasks leave the queue
+        tasks[0].status = "Done"
+        tasks[0].save(ignore_permissions=True)
+        tasks[1].status = "late"
+        tasks[1].save(ignore_permissions=True)
+        tasks[2].delete(ignore_permissions=True)
+
+        for task in tasks:
+            self.assertIsNone(frappe.cache().zscore(task_key, task.name))
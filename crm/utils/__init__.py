@@ -1,4 +1,9 @@
+import concurrent.futures
+import copy
 import functools
+import hashlib
+import queue
+import threading
 
 import frappe
 import phonenumbers
@@ -6,9 +11,10 @@ import requests
 from frappe import _
 from frappe.model.docstatus import DocStatus
 from frappe.model.dynamic_links import get_dynamic_link_map
-from frappe.utils import floor
+from frappe.utils import cint, floor
 from phonenumbers import NumberParseException
 from phonenumbers import PhoneNumberFormat as PNF
+from werkzeug.wrappers import Response
 
 
 def parse_phone_number(phone_number, default_country="IN"):
@@ -269,6 +275,287 @@ def sales_user_only(fn):
 	return wrapper
 
 
+# Process-wide pool of `run_concurrently`: at most `crm_concurrent_workers` (site config)
+# worker threads per site, capped at CONCURRENT_WORKERS_CAP. Each worker keeps its database
+# connection between calls and closes it after CONCURRENT_WORKER_IDLE_TIMEOUT idle seconds.
+CONCURRENT_WORKERS = 8
+CONCURRENT_WORKERS_CAP = 32
+CONCURRENT_WORKER_IDLE_TIMEOUT = 60
+
+_worker_pools = {}
+_worker_pools_lock = threading.Lock()
+
+
+class _WorkerPool:
+	"""
+	Bounded pool of worker threads running calls for one site, shared by all requests
+	of the process. Workers are started on demand and exit when idle.
+	"""
+
+	def __init__(self, site, sites_path, size):
+		self.site = site
+		self.sites_path = sites_path
+		self.size = size
+		self.tasks = queue.SimpleQueue()
+		self.lock = threading.Lock()
+		self.workers = 0
+		# per worker thread: request-local state right after connecting
+		self.local = threading.local()
+
+	def submit(self, fn, args, user, lang):
+		future = concurrent.futures.Future()
+		with self.lock:
+			self.tasks.put((future, fn, args, user, lang))
+			if self.workers < self.size:
+				self.workers += 1
+				threading.Thread(target=self._work, daemon=True).start()
+		return future
+
+	def _connect(self):
+		frappe.init(site=self.site, sites_path=self.sites_path)
+		frappe.connect()
+		self.local.initial_flags = copy.deepcopy(frappe.local.flags)
+
+	def _reset_local(self, user, lang):
+		"""
+		Start a call with the request-local state of a fresh connection, like a new request:
+		nothing a previous call left in flags or the local / document caches is seen.
+		"""
+		frappe.local.flags = copy.deepcopy(self.local.initial_flags)
+		frappe.local.cache = {}
+		frappe.local.document_cache = {}
+		frappe.local.role_permissions = {}
+		frappe.set_user(user)
+		frappe.local.lang = lang
+
+	def _work(self):
+		try:
+			self._connect()
+		except Exception as e:
+			self._exit(e)
+			return
+
+		while True:
+			try:
+				future, fn, args, user, lang = self.tasks.get(timeout=CONCURRENT_WORKER_IDLE_TIMEOUT)
+			except queue.Empty:
+				with self.lock:
+					# a call queued meanwhile still has this worker
+					if self.tasks.empty():
+						self.workers -= 1
+						break
+				continue
+
+			if future.set_running_or_notify_cancel():
+				try:
+					self._reset_local(user, lang)
+					future.set_result(fn(*args))
+				except BaseException as e:
+					future.set_exception(e)
+
+			try:
+				# end the read transaction, so the next call sees committed data
+				frappe.db.rollback()
+			except Exception as e:
+				frappe.destroy()
+				try:
+					self._connect()
+				except Exception:
+					self._exit(e)
+					return
+
+		frappe.destroy()
+
+	def _exit(self, error):
+		"""Stop a worker that has no connection; fail the queued calls if it was the last one."""
+		with self.lock:
+			self.workers -= 1
+			if not self.workers:
+				while not self.tasks.empty():
+					future = self.tasks.get()[0]
+					if future.set_running_or_notify_cancel():
+						future.set_exception(error)
+		frappe.destroy()
+
+
+def _get_worker_pool():
+	size = min(cint(frappe.conf.get("crm_concurrent_workers") or CONCURRENT_WORKERS), CONCURRENT_WORKERS_CAP)
+	key = (frappe.local.site, frappe.local.sites_path)
+	with _worker_pools_lock:
+		pool = _worker_pools.get(key)
+		if not pool:
+			pool = _worker_pools[key] = _WorkerPool(*key, size)
+		pool.size = size
+		return pool
+
+
+def run_concurrently(calls):
+	"""
+	Run independent read-only calls and return their results in the same order.
+
+	The calls run on the process-wide worker pool of the site (see `_WorkerPool`), so the
+	number of extra database connections stays bounded however many requests use it, and
+	connections are reused between requests. A batch takes about the time of its slowest
+	call as long as it has no more calls than there are workers (`crm_concurrent_workers`,
+	default CONCURRENT_WORKERS, at most CONCURRENT_WORKERS_CAP); larger batches queue.
+	Runs serially for a single call, a pool of one worker and in tests, where the workers
+	could not see the uncommitted test transaction. The first exception raised by a call
+	is re-raised.
+
+	:param calls: List of `(fn, args)` tuples
+	:return: List of the return values of the calls
+	"""
+	if len(calls) <= 1 or frappe.flags.in_test:
+		return [fn(*args) for fn, args in calls]
+
+	pool = _get_worker_pool()
+	if pool.size <= 1:
+		return [fn(*args) for fn, args in calls]
+
+	futures = [pool.submit(fn, args, frappe.session.user, frappe.local.lang) for fn, args in calls]
+	concurrent.futures.wait(futures)
+	for future in futures:
+		if future.exception():
+			raise future.exception()
+	return [future.result() for future in futures]
+
+
+def etag_response(data, etag=None):
+	"""
+	Return `data` from a whitelisted method with an ETag, answering 304 Not Modified
+	(without a body) when the request's If-None-Match already has it.
+
+	Outside of an HTTP request (tests, server-side callers) `data` is returned as is.
+
+	:param data: JSON serializable return value, sent as `{"message": data}`
+	:param etag: Precomputed ETag, defaults to the md5 of the serialized body
+	:return: werkzeug Response, or `data` when there is no request
+	"""
+	if not getattr(frappe.local, "request", None):
+		return data
+
+	body = frappe.as_json({"message": data}, indent=None, separators=(",", ":"))
+	etag = etag or hashlib.md5(body.encode()).hexdigest()
+	if _has_etag(etag):
+		return _not_modified(etag)
+	return Response(body, mimetype="application/json", headers=_etag_headers(etag))
+
+
+def conditional_get(doctypes=(), meta=(), vary=None):
+	"""
+	Decorator for heavy whitelisted read methods: a client that sends back the ETag of
+	the current version gets a 304 before the payload is even built.
+
+	The ETag combines a cheap version token of what the payload is built from (see
+	`get_version_token`) with the method, its arguments, the user and the language.
+	It only applies when the method is the command of the current request, so Python
+	callers keep getting plain return values.
+
+	:param doctypes: Doctypes whose data (and meta) the payload depends on, or a function
+		of the call's kwargs returning them
+	:param meta: Doctypes whose meta only the payload depends on, or such a function
+	:param vary: Optional function of the call's kwargs returning extra ETag input (e.g. the time)
+	"""
+
+	def resolve(value, kwargs):
+		return value(kwargs) if callable(value) else value
+
+	def decorator(fn):
+		method = f"{fn.__module__}.{fn.__name__}"
+
+		@functools.wraps(fn)
+		def wrapper(*args, **kwargs):
+			if args or not getattr(frappe.local, "request", None) or frappe.form_dict.get("cmd") != method:
+				return fn(*args, **kwargs)
+
+			key = [
+				method,
+				kwargs,
+				frappe.session.user,
+				frappe.local.lang,
+				get_version_token(resolve(doctypes, kwargs), resolve(meta, kwargs)),
+				vary(kwargs) if vary else None,
+			]
+			etag = hashlib.md5(frappe.as_json(key, indent=None).encode()).hexdigest()
+			if _has_etag(etag):
+				return _not_modified(etag)
+			return etag_response(fn(**kwargs), etag)
+
+		return wrapper
+
+	return decorator
+
+
+# Redis hash: doctype -> token changed by writes that leave `modified` as is (see `bump_data_version`)
+DATA_VERSION_KEY = "crm_data_version"
+
+
+def bump_data_version(doctype):
+	"""
+	Change the version token of `doctype` after a write that does not touch `modified`
+	(raw SQL UPDATE / DELETE, `update_modified=False`), so ETags built from it are not reused.
+
+	The version changes now and again after commit: a request running before the commit
+	would otherwise cache the old data under the new version.
+	"""
+	_set_data_version(doctype)
+	frappe.db.after_commit.add(lambda: _set_data_version(doctype))
+
+
+def _set_data_version(doctype):
+	frappe.cache().hset(DATA_VERSION_KEY, doctype, frappe.generate_hash(length=10))
+
+
+def get_version_token(doctypes=(), meta=()):
+	"""
+	Cheap fingerprint of the data of `doctypes` and the meta of `doctypes` + `meta`, from
+	one query: the latest `modified` of each table (indexed) and of their deleted
+	documents, and of their DocType, Custom Fields and Property Setters; plus the
+	data versions bumped by writes that skip `modified` (see `bump_data_version`).
+
+	:param doctypes: Doctypes whose rows and meta are fingerprinted
+	:param meta: Doctypes whose meta only is fingerprinted
+	:return: Token string that changes whenever any of them is written
+	"""
+	doctypes = sorted({dt for dt in doctypes or () if dt})
+	meta_doctypes = sorted(set(doctypes) | {dt for dt in meta or () if dt})
+	if not meta_doctypes:
+		return ""
+
+	queries = []
+	for doctype in meta_doctypes:
+		doctype_meta = frappe.get_meta(doctype)  # also validates the name
+		if doctype in doctypes and not (doctype_meta.issingle or doctype_meta.is_virtual):
+			queries.append(f"select max(`modified`) from `tab{doctype}`")
+	if doctypes:
+		queries.append(
+			"select max(`modified`) from `tabDeleted Document` where `deleted_doctype` in %(doctypes)s"
+		)
+	queries += [
+		"select max(`modified`) from `tabDocType` where `name` in %(meta)s",
+		"select max(`modified`) from `tabCustom Field` where `dt` in %(meta)s",
+		"select max(`modified`) from `tabProperty Setter` where `doc_type` in %(meta)s",
+	]
+	rows = frappe.db.sql(
+		" union all ".join(queries), {"doctypes": tuple(doctypes) or ("",), "meta": tuple(meta_doctypes)}
+	)
+	data_versions = [frappe.cache().hget(DATA_VERSION_KEY, doctype) or "" for doctype in doctypes]
+	return "|".join([str(row[0]) for row in rows] + data_versions)
+
+
+def _has_etag(etag):
+	if_none_match = frappe.get_request_header("If-None-Match") or ""
+	return f'"{etag}"' in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+
+def _etag_headers(etag):
+	return {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+
+
+def _not_modified(etag):
+	return Response(status=304, headers=_etag_headers(etag))
+
+
 def get_exchange_rate(from_currency, to_currency, date=None):
 	if not date:
 		date = "latest"
@@ -295,4 +582,3 @@ def get_exchange_rate(from_currency, to_currency, date=None):
 		if not date:
 			date = "latest"
 		...
-
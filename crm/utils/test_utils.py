@@ -0,0 +1,143 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from crm.utils import bump_data_version, conditional_get, get_version_token, run_concurrently
+
+
+@conditional_get(doctypes=["ToDo"])
+def get_todo_names():
+	return frappe.get_all("ToDo", pluck="name", order_by="name")
+
+
+METHOD = f"{get_todo_names.__module__}.get_todo_names"
+
+
+class TestConditionalGet(FrappeTestCase):
+	"""ETag / 304 handling of `conditional_get` and `get_version_token`"""
+
+	def setUp(self):
+		frappe.set_user("Administrator")
+		self.original_request = getattr(frappe.local, "request", None)
+		self.original_cmd = frappe.form_dict.get("cmd")
+		frappe.local.request = frappe._dict(headers={})
+		frappe.form_dict.cmd = METHOD
+
+	def tearDown(self):
+		frappe.local.request = self.original_request
+		frappe.form_dict.cmd = self.original_cmd
+
+	def _request(self, etag=None):
+		frappe.local.request.headers = {"If-None-Match": f'"{etag}"'} if etag else {}
+		return get_todo_names()
+
+	def _new_todo(self):
+		todo = frappe.get_doc({"doctype": "ToDo", "description": "conditional_get test"}).insert()
+		self.addCleanup(frappe.delete_doc, "ToDo", todo.name, force=1)
+		return todo
+
+	def test_returns_304_when_etag_matches(self):
+		response = self._request()
+		self.assertEqual(response.status_code, 200)
+		etag = response.headers["ETag"].strip('"')
+
+		response = self._request(etag)
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(response.headers["ETag"].strip('"'), etag)
+
+	def test_new_etag_after_write(self):
+		etag = self._request().headers["ETag"].strip('"')
+
+		todo = self._new_todo()
+		response = self._request(etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertNotEqual(response.headers["ETag"].strip('"'), etag)
+		self.assertIn(todo.name, frappe.parse_json(response.get_data(as_text=True))["message"])
+
+	def test_new_etag_after_data_version_bump(self):
+		etag = self._request().headers["ETag"].strip('"')
+
+		bump_data_version("ToDo")
+		self.assertEqual(self._request(etag).status_code, 200)
+
+	def test_plain_return_from_python(self):
+		todo = self._new_todo()
+
+		# not the command of the request
+		frappe.form_dict.cmd = "frappe.client.get_list"
+		self.assertIn(todo.name, get_todo_names())
+
+		# no request at all
+		frappe.local.request = None
+		self.assertIn(todo.name, get_todo_names())
+
+	def test_version_token(self):
+		token = get_version_token(["ToDo"])
+		self.assertEqual(token, get_version_token(["ToDo"]))
+
+		self._new_todo()
+		self.assertNotEqual(token, get_version_token(["ToDo"]))
+
+		token = get_version_token(["ToDo"])
+		bump_data_version("ToDo")
+		self.assertNotEqual(token, get_version_token(["ToDo"]))
+
+
+def _read_todo(name):
+	return frappe.db.get_value("ToDo", name, "description")
+
+
+def _leave_local_state(name):
+	frappe.flags.crm_pool_test = name
+	frappe.local.cache["crm_pool_test"] = name
+	return frappe.session.user
+
+
+def _get_local_state():
+	return frappe.flags.get("crm_pool_test"), frappe.local.cache.get("crm_pool_test"), frappe.session.user
+
+
+class TestRunConcurrently(FrappeTestCase):
+	"""The threaded path of `run_concurrently`, which tests otherwise run serially"""
+
+	def setUp(self):
+		frappe.set_user("Administrator")
+		# the workers have their own connections and only see committed data
+		self.todos = [
+			frappe.get_doc({"doctype": "ToDo", "description": f"run_concurrently test {i}"}).insert().name
+			for i in range(4)
+		]
+		frappe.db.commit()
+		self.addCleanup(self._delete_todos)
+
+	def _delete_todos(self):
+		for name in self.todos:
+			frappe.delete_doc("ToDo", name, force=1)
+		frappe.db.commit()
+
+	def _run(self, calls):
+		with patch.dict(frappe.flags, {"in_test": False}), patch.dict(frappe.conf, {"crm_concurrent_workers": 2}):
+			return run_concurrently(calls)
+
+	def test_results_in_call_order(self):
+		results = self._run([(_read_todo, (name,)) for name in self.todos])
+		self.assertEqual(results, [f"run_concurrently test {i}" for i in range(4)])
+
+	def test_calls_do_not_share_request_local_state(self):
+		self.assertEqual(self._run([(_leave_local_state, (name,)) for name in self.todos]), ["Administrator"] * 4)
+
+		# the workers that ran those calls are reused; the next calls must not see their state
+		frappe.set_user("Guest")
+		try:
+			results = self._run([(_get_local_state, ()) for _name in self.todos])
+		finally:
+			frappe.set_user("Administrator")
+		self.assertEqual(results, [(None, None, "Guest")] * 4)
+
+	def test_exception_is_raised(self):
+		with self.assertRaises(frappe.DoesNotExistError):
+			self._run([(_read_todo, (self.todos[0],)), (frappe.get_doc, ("ToDo", "no-such-todo"))])